@@ -1,7 +1,12 @@
-from flask import Flask, send_from_directory
+from flask import Flask
 from backend.extensions import db, security, api, migrate
-from backend.config import LocalDevelopmentConfig, ProductionConfig
+from backend.config import LocalDevelopmentConfig, ProductionConfig, TestingConfig
 from backend.security import user_datastore
+from backend.static_assets import init_static_assets
+from backend.compression import init_compression
+from backend.principals import init_principal_cache
+from backend.scheduler import init_scheduler
+from backend.events import init_events
 import os
 from flask_cors import CORS
 
@@ -15,31 +20,28 @@ def createApp():
 
     if os.environ.get('FLASK_ENV') == 'production':
         app.config.from_object(ProductionConfig)
+    elif os.environ.get('FLASK_ENV') == 'testing':
+        app.config.from_object(TestingConfig)
     else:
         app.config.from_object(LocalDevelopmentConfig)
 
+    init_events(app)
     db.init_app(app)
     api.init_app(app)  # Initializes API
     migrate.init_app(app, db)
     security.init_app(app, user_datastore)
+    init_principal_cache(app)
+    init_scheduler(app)
     app.app_context().push()
 
     # --- This is where your API routes are registered ---
     with app.app_context():
         from backend import routes 
 
-    # --- THIS CATCH-ALL ROUTE IS CRITICAL ---
-    @app.route('/', defaults={'path': ''})
-    @app.route('/<path:path>')
-    def catch_all(path):
-        if path.startswith("api/"):
-            return "API route not found", 404
-        
-        static_file_path = os.path.join(app.static_folder, path)
-        if os.path.exists(static_file_path):
-            return send_from_directory(app.static_folder, path)
-        
-        return send_from_directory(app.template_folder, 'index.html')
+    # Static files and client-side routes (the static view falls back to
+    # index.html) are served from an in-memory manifest built here.
+    init_static_assets(app)
+    init_compression(app)
 
     return app
 
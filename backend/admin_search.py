@@ -0,0 +1,177 @@
+import re
+from sqlalchemy import event, select, func, or_, text, inspect, literal, false, Integer, Float
+from sqlalchemy.orm import aliased
+from .models import db, User, Restaurant
+
+# SQLite: one FTS5 table per entity, keyed by the entity's id (rowid) and kept
+# in sync by the mapper hooks below.
+# PostgreSQL: pg_trgm GIN indexes (see migration) serve ILIKE on the source
+# columns directly, and similarity() ranks the matches.
+FTS_TABLES = {
+    'users': ('user_search', ('name', 'email')),
+    'restaurants': ('restaurant_search', ('name', 'city', 'owner_email')),
+}
+
+_ready_binds = set()
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def ensure_search_tables(connection=None):
+    """ Creates the SQLite FTS5 tables if they do not exist. A no-op on other databases. """
+    connection = connection or db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        return
+    for table, columns in FTS_TABLES.values():
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, tokenize='unicode61')"
+        ))
+
+
+def _fts_ready(connection):
+    """ Whether the FTS tables exist on this database; positive answers are remembered. """
+    key = str(connection.engine.url)
+    if key in _ready_binds:
+        return True
+    exists = connection.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_search'"
+    )).first() is not None
+    if exists:
+        _ready_binds.add(key)
+    return exists
+
+
+def fts_query(term):
+    """ Turns free text into an FTS5 query matching every word as a prefix. """
+    words = re.findall(r'\w+', term.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def order_id_term(term):
+    """ Returns the order id when the search term is a plain number (optionally '#123'), else None. """
+    match = re.fullmatch(r'\s*#?(\d{1,18})\s*', term)
+    return int(match.group(1)) if match else None
+
+
+def search_matches(kind, term):
+    """
+    Subquery of (id, rank) for every user or restaurant matching `term`; a
+    lower rank is a better match. Routes join it into their own query, so
+    their other filters, counts and page limit apply to all matches, and
+    keyset-paginate ranked results on (rank, id).
+    """
+    name = f'{kind}_matches'
+    if _dialect() == 'sqlite':
+        query = fts_query(term)
+        table = FTS_TABLES[kind][0]
+        if not query:
+            model = User if kind == 'users' else Restaurant
+            return select(model.id.label('id'), literal(0.0).label('rank')).where(false()).subquery(name)
+        return text(
+            f"SELECT rowid AS id, bm25({table}) AS rank FROM {table} WHERE {table} MATCH :query"
+        ).bindparams(query=query).columns(id=Integer, rank=Float).subquery(name)
+
+    like = f"%{term}%"
+    owner = aliased(User)  # the route's query may join User itself
+    if kind == 'users':
+        entity_id, columns = User.id, (User.name, User.email)
+    else:
+        entity_id, columns = Restaurant.id, (Restaurant.name, Restaurant.city, owner.email)
+    if _dialect() == 'postgresql':
+        rank = -func.greatest(*(func.similarity(column, term) for column in columns))
+    else:
+        rank = literal(0.0)
+    statement = select(entity_id.label('id'), rank.label('rank'))
+    if kind == 'restaurants':
+        statement = statement.join(owner, Restaurant.owner_id == owner.id)
+    return statement.where(or_(*(column.ilike(like) for column in columns))).subquery(name)
+
+
+# --- Index maintenance (SQLite) ---
+
+def _changed(target, *attributes):
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _index_user(connection, user_id, name, email):
+    connection.execute(text("DELETE FROM user_search WHERE rowid = :id"), {'id': user_id})
+    connection.execute(text(
+        "INSERT INTO user_search (rowid, name, email) VALUES (:id, :name, :email)"
+    ), {'id': user_id, 'name': name or '', 'email': email or ''})
+
+
+def _index_restaurant(connection, restaurant_id, name, city, owner_id):
+    owner_email = connection.execute(text('SELECT email FROM "user" WHERE id = :id'), {'id': owner_id}).scalar()
+    connection.execute(text("DELETE FROM restaurant_search WHERE rowid = :id"), {'id': restaurant_id})
+    connection.execute(text(
+        "INSERT INTO restaurant_search (rowid, name, city, owner_email) VALUES (:id, :name, :city, :owner_email)"
+    ), {'id': restaurant_id, 'name': name or '', 'city': city or '', 'owner_email': owner_email or ''})
+
+
+@event.listens_for(User, 'after_insert')
+def _user_inserted(mapper, connection, target):
+    if connection.dialect.name == 'sqlite' and _fts_ready(connection):
+        _index_user(connection, target.id, target.name, target.email)
+
+
+@event.listens_for(User, 'after_update')
+def _user_updated(mapper, connection, target):
+    if connection.dialect.name != 'sqlite' or not _fts_ready(connection):
+        return
+    if not _changed(target, 'name', 'email'):
+        return
+    _index_user(connection, target.id, target.name, target.email)
+    if _changed(target, 'email'):
+        # Restaurants are searchable by their owner's email.
+        owned = connection.execute(
+            select(Restaurant.id, Restaurant.name, Restaurant.city).where(Restaurant.owner_id == target.id)
+        ).all()
+        for restaurant_id, name, city in owned:
+            _index_restaurant(connection, restaurant_id, name, city, target.id)
+
+
+@event.listens_for(Restaurant, 'after_insert')
+def _restaurant_inserted(mapper, connection, target):
+    if connection.dialect.name == 'sqlite' and _fts_ready(connection):
+        _index_restaurant(connection, target.id, target.name, target.city, target.owner_id)
+
+
+@event.listens_for(Restaurant, 'after_update')
+def _restaurant_updated(mapper, connection, target):
+    if connection.dialect.name != 'sqlite' or not _fts_ready(connection):
+        return
+    if _changed(target, 'name', 'city', 'owner_id'):
+        _index_restaurant(connection, target.id, target.name, target.city, target.owner_id)
+
+
+@event.listens_for(User, 'after_delete')
+@event.listens_for(Restaurant, 'after_delete')
+def _entity_deleted(mapper, connection, target):
+    if connection.dialect.name != 'sqlite' or not _fts_ready(connection):
+        return
+    table = 'user_search' if isinstance(target, User) else 'restaurant_search'
+    connection.execute(text(f"DELETE FROM {table} WHERE rowid = :id"), {'id': target.id})
+
+
+def rebuild_search_index():
+    """ Recreates the SQLite FTS tables from users and restaurants. Returns the number of rows indexed. """
+    if _dialect() != 'sqlite':
+        return 0
+    connection = db.session.connection()
+    ensure_search_tables(connection)
+    connection.execute(text("DELETE FROM user_search"))
+    connection.execute(text("DELETE FROM restaurant_search"))
+    users = connection.execute(text(
+        'INSERT INTO user_search (rowid, name, email) '
+        'SELECT id, COALESCE(name, \'\'), COALESCE(email, \'\') FROM "user"'
+    ))
+    restaurants = connection.execute(text(
+        'INSERT INTO restaurant_search (rowid, name, city, owner_email) '
+        'SELECT r.id, r.name, r.city, COALESCE(u.email, \'\') '
+        'FROM restaurant r LEFT JOIN "user" u ON u.id = r.owner_id'
+    ))
+    db.session.commit()
+    return users.rowcount + restaurants.rowcount
@@ -0,0 +1,434 @@
+import bisect
+import heapq
+import re
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from .models import db, Restaurant, MenuItem
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Relative weight of a match in each field.
+RESTAURANT_FIELDS = (('name', 3.0), ('city', 1.5), ('description', 1.0))
+ITEM_FIELDS = (('name', 3.0), ('food_type', 1.5), ('description', 1.0), ('restaurant', 0.5), ('city', 0.5))
+
+# Score multipliers for how a query word matched an indexed term.
+EXACT, PREFIX, FUZZY = 1.0, 0.7, 0.5
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _deletes(term):
+    """ The term plus every variant with one character removed. """
+    return {term} | {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def edit_distance(a, b, limit):
+    """ Levenshtein distance between a and b, or limit + 1 once it is known to exceed `limit`. """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def max_edits(word):
+    """ Typos tolerated in a query word: none for short words, one from 4 letters, two from 8. """
+    if len(word) >= 8:
+        return 2
+    return 1 if len(word) >= 4 else 0
+
+
+class InvertedIndex:
+    """
+    Term -> {document key: weight} postings with a sorted vocabulary for
+    prefix lookups and a one-deletion neighbourhood for typo tolerance.
+    Document keys are ('r', restaurant_id) or ('i', menu_item_id).
+    Not thread-safe on its own; CatalogIndex serializes writers.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.doc_terms = {}
+        self.vocabulary = []
+        self.neighbours = {}
+
+    def _add_term(self, term):
+        bisect.insort(self.vocabulary, term)
+        for variant in _deletes(term):
+            self.neighbours.setdefault(variant, set()).add(term)
+
+    def _drop_term(self, term):
+        index = bisect.bisect_left(self.vocabulary, term)
+        if index < len(self.vocabulary) and self.vocabulary[index] == term:
+            del self.vocabulary[index]
+        for variant in _deletes(term):
+            terms = self.neighbours.get(variant)
+            if terms:
+                terms.discard(term)
+                if not terms:
+                    del self.neighbours[variant]
+
+    def add(self, key, fields):
+        """ Indexes a document given as [(text, weight), ...], replacing any previous version. """
+        self.remove(key)
+        weights = {}
+        for text, weight in fields:
+            for term in tokenize(text):
+                weights[term] = max(weights.get(term, 0.0), weight)
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                self._add_term(term)
+            posting[key] = weight
+        self.doc_terms[key] = tuple(weights)
+
+    def remove(self, key):
+        for term in self.doc_terms.pop(key, ()):
+            posting = self.postings.get(term)
+            if posting is None:
+                continue
+            posting.pop(key, None)
+            if not posting:
+                del self.postings[term]
+                self._drop_term(term)
+
+    def prefix_terms(self, prefix, limit=50):
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        terms = []
+        for term in self.vocabulary[start:start + limit]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def fuzzy_terms(self, word):
+        edits = max_edits(word)
+        if not edits:
+            return []
+        candidates = set()
+        for variant in _deletes(word):
+            candidates |= self.neighbours.get(variant, set())
+        return [term for term in candidates if term != word and edit_distance(word, term, edits) <= edits]
+
+    def expand(self, word, prefix):
+        """ [(term, multiplier)] that a query word matches: exact, then prefix (last word only), then typos. """
+        matches = {}
+        if word in self.postings:
+            matches[word] = EXACT
+        if prefix:
+            for term in self.prefix_terms(word):
+                matches.setdefault(term, PREFIX)
+        if not matches:
+            for term in self.fuzzy_terms(word):
+                matches[term] = FUZZY
+        return matches.items()
+
+    def search(self, text, prefix=True, accept=None):
+        """
+        Scores documents containing every query word (the last one may be a
+        prefix). Returns {key: score}. `accept(key)` can veto documents.
+        """
+        words = tokenize(text)
+        if not words:
+            return {}
+        scores = None
+        for position, word in enumerate(words):
+            word_scores = {}
+            for term, multiplier in self.expand(word, prefix and position == len(words) - 1):
+                for key, weight in self.postings[term].items():
+                    score = weight * multiplier
+                    if score > word_scores.get(key, 0.0):
+                        word_scores[key] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {key: score + word_scores[key] for key, score in scores.items() if key in word_scores}
+            if not scores:
+                return {}
+        if accept is not None:
+            scores = {key: score for key, score in scores.items() if accept(key)}
+        return scores
+
+
+class CatalogIndex:
+    """
+    Per-process search index over listable restaurants and their menu items.
+
+    Committed changes are applied incrementally, one restaurant at a time, on
+    the next search; the whole index is also rebuilt once it is older than
+    CATALOG_INDEX_MAX_AGE seconds so other workers' changes show up. A rebuild
+    fills a new index without holding the lock and swaps it in, so searches
+    keep using the old one meanwhile. Searches and updates are serialized by
+    the lock; a search takes milliseconds.
+    """
+
+    def __init__(self):
+        self.index = None
+        self.restaurants = {}
+        self.items = {}
+        self.restaurant_items = {}
+        self._built_at = 0.0
+        self._pending = set()
+        self._changed_during_rebuild = None
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def mark_changed(self, restaurant_ids):
+        with self._lock:
+            self._pending |= set(restaurant_ids)
+            if self._changed_during_rebuild is not None:
+                self._changed_during_rebuild |= set(restaurant_ids)
+
+    def _is_stale(self):
+        max_age = current_app.config['CATALOG_INDEX_MAX_AGE']
+        return self.index is None or time.monotonic() - self._built_at > max_age
+
+    def add_restaurant(self, restaurant, items):
+        """ Indexes a restaurant and its menu items (model instances or equivalent objects). """
+        self.restaurants[restaurant.id] = {
+            'id': restaurant.id,
+            'name': restaurant.name,
+            'city': restaurant.city,
+            'image': restaurant.gallery[0] if restaurant.gallery else
+                f'https://placehold.co/600x400/E65100/FFF?text={restaurant.name.replace(" ", "+")}',
+        }
+        self.index.add(('r', restaurant.id), [
+            (getattr(restaurant, field), weight) for field, weight in RESTAURANT_FIELDS
+        ])
+        item_ids = []
+        for item in items:
+            self.items[item.id] = {
+                'id': item.id,
+                'name': item.name,
+                'price': item.price,
+                'food_type': item.food_type,
+                'is_available': bool(item.is_available),
+                'image': item.image_url,
+                'restaurant_id': restaurant.id,
+                'restaurantName': restaurant.name,
+                'city': restaurant.city,
+            }
+            values = {'name': item.name, 'food_type': item.food_type, 'description': item.description,
+                      'restaurant': restaurant.name, 'city': restaurant.city}
+            self.index.add(('i', item.id), [(values[field], weight) for field, weight in ITEM_FIELDS])
+            item_ids.append(item.id)
+        self.restaurant_items[restaurant.id] = item_ids
+
+    def remove_restaurant(self, restaurant_id):
+        self.restaurants.pop(restaurant_id, None)
+        self.index.remove(('r', restaurant_id))
+        for item_id in self.restaurant_items.pop(restaurant_id, ()):
+            self.items.pop(item_id, None)
+            self.index.remove(('i', item_id))
+
+    def _listable(self):
+        return Restaurant.query.filter(Restaurant.is_verified == True, Restaurant.is_active == True)
+
+    def _items_by_restaurant(self, restaurant_ids):
+        grouped = {}
+        if restaurant_ids:
+            for item in MenuItem.query.filter(MenuItem.restaurant_id.in_(restaurant_ids)).all():
+                grouped.setdefault(item.restaurant_id, []).append(item)
+        return grouped
+
+    def _load(self, restaurant_ids=None):
+        """ [(restaurant, items)] for every listable restaurant, or only those in `restaurant_ids`. """
+        query = self._listable()
+        if restaurant_ids is not None:
+            query = query.filter(Restaurant.id.in_(restaurant_ids))
+        restaurants = query.all()
+        items = self._items_by_restaurant([r.id for r in restaurants])
+        return [(restaurant, items.get(restaurant.id, ())) for restaurant in restaurants]
+
+    def _rebuild(self):
+        """
+        Loads and indexes the whole catalog into a new CatalogIndex outside the
+        lock, then swaps it in. Restaurants that changed while it was being
+        built stay pending, since the build may have read them before the change.
+        """
+        with self._lock:
+            self._changed_during_rebuild = set()
+        try:
+            fresh = CatalogIndex()
+            fresh.index = InvertedIndex()
+            for restaurant, items in self._load():
+                fresh.add_restaurant(restaurant, items)
+        except Exception:
+            with self._lock:
+                self._changed_during_rebuild = None
+            raise
+        with self._lock:
+            self.index = fresh.index
+            self.restaurants, self.items, self.restaurant_items = fresh.restaurants, fresh.items, fresh.restaurant_items
+            self._pending, self._changed_during_rebuild = self._changed_during_rebuild, None
+            self._built_at = time.monotonic()
+
+    def _apply_pending(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        try:
+            loaded = self._load(pending)
+        except Exception:
+            with self._lock:
+                self._pending |= pending
+            raise
+        with self._lock:
+            for restaurant_id in pending:
+                self.remove_restaurant(restaurant_id)
+            for restaurant, items in loaded:
+                self.add_restaurant(restaurant, items)
+
+    def _refresh(self):
+        """
+        Rebuilds a stale index (one thread at a time; the others go on searching
+        the current index, and only wait when there is none yet), then applies
+        pending changes. Database reads happen outside the lock.
+        """
+        if self._is_stale() and self._rebuild_lock.acquire(blocking=self.index is None):
+            try:
+                if self._is_stale():
+                    self._rebuild()
+            finally:
+                self._rebuild_lock.release()
+        if self._pending:
+            self._apply_pending()
+
+    def search(self, text, city=None, available_only=False, prefix=True, limit=20):
+        """ Returns the top `limit` (restaurants, dishes) as [(score, document)], best first. """
+        city = city.lower() if city else None
+
+        def accept(key):
+            kind, doc_id = key
+            document = self.restaurants.get(doc_id) if kind == 'r' else self.items.get(doc_id)
+            if document is None:
+                return False
+            if kind == 'i' and available_only and not document['is_available']:
+                return False
+            return city is None or (document['city'] or '').lower() == city
+
+        self._refresh()
+        with self._lock:
+            scores = self.index.search(text, prefix=prefix, accept=accept)
+            best = {'r': [], 'i': []}
+            for (kind, doc_id), score in scores.items():
+                best[kind].append((score, -doc_id))
+            found_restaurants = [(score, self.restaurants[-neg_id]) for score, neg_id in heapq.nlargest(limit, best['r'])]
+            found_items = [(score, self.items[-neg_id]) for score, neg_id in heapq.nlargest(limit, best['i'])]
+        return found_restaurants, found_items
+
+
+catalog_index = CatalogIndex()
+
+
+def search_catalog(text, city=None, available_only=False, limit=20):
+    """ Restaurants and dishes matching `text`, each list best match first. """
+    found_restaurants, found_items = catalog_index.search(text, city=city, available_only=available_only, limit=limit)
+    return [r for _, r in found_restaurants], [i for _, i in found_items]
+
+
+def autocomplete(text, city=None, limit=8):
+    """ Suggestions completing the last word of `text`: restaurant and dish names, best first. """
+    found_restaurants, found_items = catalog_index.search(text, city=city, limit=limit * 2)
+    candidates = [(score, 'restaurant', r['name'], r['id']) for score, r in found_restaurants]
+    candidates += [(score, 'dish', i['name'], i['restaurant_id']) for score, i in found_items]
+    candidates.sort(key=lambda candidate: -candidate[0])
+
+    suggestions, seen = [], set()
+    for _, kind, name, restaurant_id in candidates:
+        if name.lower() in seen:
+            continue
+        seen.add(name.lower())
+        suggestions.append({'text': name, 'type': kind, 'restaurant_id': restaurant_id})
+        if len(suggestions) >= limit:
+            break
+    return suggestions
+
+
+# --- Incremental updates ---
+# Mapper events record which restaurants changed; the index picks them up
+# after the transaction commits, so uncommitted rows are never indexed.
+
+def touch_restaurant(restaurant_id):
+    """ Queues a restaurant for reindexing after commit, for changes made with core statements. """
+    db.session.info.setdefault('catalog_changes', set()).add(restaurant_id)
+
+
+def _restaurant_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('catalog_changes', set()).add(target.id)
+
+
+def _menu_item_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('catalog_changes', set()).add(target.restaurant_id)
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Restaurant, _event_name, _restaurant_changed)
+    event.listen(MenuItem, _event_name, _menu_item_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_catalog_changes(session):
+    changed = session.info.pop('catalog_changes', None)
+    if changed:
+        catalog_index.mark_changed(changed)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_catalog_changes(session):
+    session.info.pop('catalog_changes', None)
+
+
+# --- Benchmark ---
+
+BENCHMARK_WORDS = (
+    "biryani paneer tikka masala butter chicken dosa idli vada sambar naan roti dal makhani "
+    "chole bhature pav bhaji samosa kebab korma pulao noodles manchurian momos pizza burger "
+    "pasta lassi kulfi halwa kheer thali paratha uttapam tandoori fish prawn mutton egg curry"
+).split()
+BENCHMARK_QUERIES = ('biryani', 'biriyani', 'paneer tik', 'butter chiken', 'masala dosa bangalore', 'ke')
+
+
+def benchmark_index(item_count, items_per_restaurant=50, repeat=20, seed=1):
+    """
+    Builds an InvertedIndex over `item_count` synthetic menu items and times
+    BENCHMARK_QUERIES against it. Returns (build_seconds, [(query, hits, ms)]).
+    """
+    import random
+    rng = random.Random(seed)
+    cities = ('bangalore', 'mumbai', 'delhi', 'chennai', 'hyderabad', 'pune')
+    index = InvertedIndex()
+    started = time.perf_counter()
+    for item_id in range(item_count):
+        restaurant_id = item_id // items_per_restaurant
+        restaurant = f"{rng.choice(BENCHMARK_WORDS)} house {restaurant_id}"
+        city = cities[restaurant_id % len(cities)]
+        if item_id % items_per_restaurant == 0:
+            index.add(('r', restaurant_id), [(restaurant, 3.0), (city, 1.5)])
+        name = ' '.join(rng.choice(BENCHMARK_WORDS) for _ in range(3))
+        description = ' '.join(rng.choice(BENCHMARK_WORDS) for _ in range(6))
+        index.add(('i', item_id), [(name, 3.0), (description, 1.0), (restaurant, 0.5), (city, 0.5)])
+    build_seconds = time.perf_counter() - started
+
+    results = []
+    for query in BENCHMARK_QUERIES:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            hits = index.search(query)
+        results.append((query, len(hits), (time.perf_counter() - started) / repeat * 1000))
+    return build_seconds, results
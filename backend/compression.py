@@ -0,0 +1,173 @@
+import gzip
+import os
+import tempfile
+import time
+from flask import request
+from .cache import LRUCache
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available.
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/javascript', 'application/x-ndjson',
+    'text/html', 'text/css', 'text/csv', 'text/javascript', 'text/plain', 'image/svg+xml',
+)
+# Static files worth precompressing, by extension.
+PRECOMPRESS_EXTENSIONS = ('.js', '.css', '.html', '.json', '.svg', '.txt', '.map')
+# Encoding -> file suffix of the precompressed sibling.
+SIBLING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, static=False):
+    """
+    Compresses bytes with `encoding`. Static files use the slowest, smallest
+    settings since they are compressed once; responses use fast levels.
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if static else 4)
+    return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+
+
+def negotiate(accept_encodings, offered):
+    """ The first of `offered` (in preference order) that the client accepts, else None. """
+    for encoding in offered:
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+# --- API responses ---
+
+def _compressible(response, min_size):
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_TYPES:
+        return False
+    if 'no-transform' in response.headers.get('Cache-Control', ''):
+        return False
+    return response.content_length is not None and response.content_length >= min_size
+
+
+def init_compression(app):
+    """
+    Compresses buffered text responses of at least COMPRESS_MIN_SIZE bytes
+    with Brotli or gzip, whichever the client prefers of those available.
+    Streamed responses (SSE, exports) and files from send_file are left
+    alone; static files have precompressed siblings instead. Bodies with a
+    strong ETag (cached menu documents) are compressed once per version and
+    URL: an ETag alone may cover several bodies (the order queue's list and
+    its ?since= deltas share the restaurant's version).
+    """
+    min_size = app.config['COMPRESS_MIN_SIZE']
+    compressed_bodies = LRUCache(app.config['COMPRESS_CACHE_SIZE'])
+
+    @app.after_request
+    def compress_response(response):
+        if not app.config['COMPRESS_RESPONSES']:
+            return response
+        response.vary.add('Accept-Encoding')
+        if not _compressible(response, min_size):
+            return response
+        encoding = negotiate(request.accept_encodings, available_encodings())
+        if encoding is None:
+            return response
+
+        etag, weak = response.get_etag()
+        key = (request.full_path, etag, encoding) if etag and not weak else None
+        body = compressed_bodies.get(key) if key else None
+        if body is None:
+            body = compress(response.get_data(), encoding)
+            if key:
+                compressed_bodies.set(key, body)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        if etag:
+            # The compressed bytes are a different representation; If-None-Match
+            # uses weak comparison, so revalidation keeps working.
+            response.set_etag(etag, weak=True)
+        return response
+
+    return compressed_bodies
+
+
+# --- Precompressed static files ---
+
+def precompress_directory(root, min_size, skip=()):
+    """
+    Writes .br/.gz siblings next to every compressible file under `root` that
+    is at least `min_size` bytes, unless a sibling is already newer than its
+    source or would not be smaller. Returns the number of files written.
+    """
+    written = 0
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories[:] = [name for name in subdirectories
+                             if not name.startswith('.') and os.path.join(directory, name) not in skip]
+        for filename in filenames:
+            if filename.startswith('.') or not filename.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(directory, filename)
+            stat = os.stat(path)
+            if stat.st_size < min_size:
+                continue
+            data = None
+            for encoding in available_encodings():
+                sibling = path + SIBLING_SUFFIXES[encoding]
+                if os.path.exists(sibling) and os.stat(sibling).st_mtime >= stat.st_mtime:
+                    continue
+                if data is None:
+                    with open(path, 'rb') as fileobj:
+                        data = fileobj.read()
+                body = compress(data, encoding, static=True)
+                if len(body) >= len(data):
+                    continue
+                # Several workers may precompress at startup; each writes its own temp file.
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+                with os.fdopen(fd, 'wb') as fileobj:
+                    fileobj.write(body)
+                os.replace(tmp_path, sibling)
+                written += 1
+    return written
+
+
+def sibling_encodings(path):
+    """ {encoding: sibling path} of the precompressed copies of `path` that are current. """
+    siblings = {}
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return siblings
+    for encoding, suffix in SIBLING_SUFFIXES.items():
+        try:
+            if os.stat(path + suffix).st_mtime >= mtime:
+                siblings[encoding] = path + suffix
+        except OSError:
+            continue
+    return siblings
+
+
+# --- Benchmark ---
+
+def benchmark_compression(payloads, bandwidths=(1.5, 10, 50), repeat=5):
+    """
+    For each (name, bytes) payload and encoding, measures the compressed size
+    and compression time, and estimates time to first byte plus transfer at
+    each bandwidth (Mbit/s). Returns rows of
+    (name, encoding, size, ratio, compress_ms, {bandwidth: total_ms}).
+    """
+    rows = []
+    for name, data in payloads:
+        for encoding in (None,) + available_encodings():
+            started = time.perf_counter()
+            for _ in range(repeat):
+                body = compress(data, encoding) if encoding else data
+            compress_ms = (time.perf_counter() - started) / repeat * 1000
+            totals = {bandwidth: compress_ms + len(body) * 8 / (bandwidth * 1000)
+                      for bandwidth in bandwidths}
+            rows.append((name, encoding or 'identity', len(body), len(body) / len(data), compress_ms, totals))
+    return rows
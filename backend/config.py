@@ -15,10 +15,125 @@ class Config():
     SECURITY_REDIRECT_BEHAVIOR = "spa" 
     WTF_CSRF_ENABLED = False
 
+    # Nearby restaurant search
+    NEARBY_DEFAULT_RADIUS_KM = 7
+    NEARBY_MAX_RADIUS_KM = 50
+    GEO_INDEX_ENABLED = True
+    GEO_INDEX_CELL_DEGREES = 0.1  # roughly 11 km per cell
+    GEO_INDEX_MAX_AGE = 300  # seconds before other workers' changes are picked up
+
+    # Geocoding (/api/geocode)
+    GEOCODER_PROVIDER = 'backend.geocoding.NominatimProvider'
+    GEOCODER_URL = os.environ.get('GEOCODER_URL', 'https://nominatim.openstreetmap.org/search')
+    GEOCODER_USER_AGENT = 'FoodleApp/1.0 (manimanjunath.v@gmail.com)'
+    GEOCODER_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+    GEOCODER_POOL_SIZE = 4
+    GEOCODER_MIN_INTERVAL = 1.0  # Nominatim allows at most 1 request per second; shared through Redis with EVENT_BROKER=redis
+    GEOCODER_MAX_WAIT = 5.0  # fail fast instead of queueing longer than this
+    GEOCODE_CACHE_TTL = 30 * 24 * 3600
+    GEOCODE_CACHE_MAX_ENTRIES = 50000
+    GEOCODE_CACHE_TOUCH_INTERVAL = 3600  # hits update last_used_at at most this often
+    GEOCODE_CACHE_EVICT_INTERVAL = 600  # seconds between eviction passes per process
+
+    # Server-Sent Events for order updates. 'memory' only reaches streams in
+    # the same process, so the app refuses to start with it when
+    # WEB_CONCURRENCY (gunicorn workers, see gunicorn.conf.py) is above 1.
+    EVENT_BROKER = os.environ.get('EVENT_BROKER', 'memory')
+    EVENT_BROKER_URL = os.environ.get('REDIS_URL', 'redis://localhost:6379/0')
+    EVENT_CHANNEL_PREFIX = 'crav:'
+    WEB_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+    SSE_HEARTBEAT_SECONDS = 15
+    SSE_MAX_STREAM_SECONDS = 300  # streams need the threaded workers configured in gunicorn.conf.py
+    SSE_MAX_STREAMS = 16  # open streams per process; keep below gunicorn's threads so requests still get one
+
+    # Menu document cache
+    MENU_CACHE_SIZE = 512
+    MENU_VERSION_TTL = 5  # seconds before other workers' menu edits are picked up
+
+    # List endpoints (keyset pagination)
+    PAGINATION_DEFAULT_PAGE_SIZE = 50
+    PAGINATION_MAX_PAGE_SIZE = 200  # clients that send neither cursor nor limit get the whole list
+
+    # Customer catalog search
+    CATALOG_INDEX_MAX_AGE = 900  # seconds before a full rebuild picks up other workers' changes
+
+    # Admin dashboard snapshot
+    ADMIN_DASHBOARD_TTL = 60  # seconds; changes committed in other workers show up within this
+
+    # Menu bulk upload
+    MENU_IMPORT_CHUNK_SIZE = 1000  # rows inserted and committed per transaction
+
+    # Image uploads
+    IMAGE_WIDTHS = (100, 400, 800)  # bounding boxes of the generated sizes, in px
+    IMAGE_MAX_WORKERS = None  # image processes; None means one per CPU
+    IMAGE_MAX_PENDING = 16  # uploads processed at once per web process before answering 503
+    IMAGE_PROCESS_TIMEOUT = 30  # seconds
+    IMAGE_MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+
+    # Static files (frontend/) and uploads
+    STATIC_BACKEND = os.environ.get('STATIC_BACKEND', 'manifest')  # 'manifest' or 'whitenoise'
+    STATIC_AUTORELOAD = False  # re-check files on every request; for editing the frontend locally
+    STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60  # seconds, for uploads and ?v=<fingerprint> URLs
+
+    # Compression
+    COMPRESS_RESPONSES = True
+    COMPRESS_MIN_SIZE = 1024  # bytes; smaller bodies are sent as is
+    COMPRESS_CACHE_SIZE = 256  # compressed bodies kept per process, keyed by URL and strong ETag
+    STATIC_PRECOMPRESS = True  # write .br/.gz siblings of frontend files at startup
+
+    # Authenticated principal (token -> user and roles) cache
+    PRINCIPAL_CACHE_SIZE = 10000  # tokens and users kept per process
+    PRINCIPAL_CACHE_TTL = 30  # seconds; other workers hear of changes over EVENT_BROKER, this bounds it if a message is lost
+
+    # Password hashing (bcrypt in a process pool)
+    PASSWORD_BCRYPT_ROUNDS = 12  # changing this rehashes each password at its next login
+    SECURITY_PASSWORD_HASH_PASSLIB_OPTIONS = {'bcrypt__rounds': PASSWORD_BCRYPT_ROUNDS}
+    PASSWORD_HASH_WORKERS = None  # hashing processes; None means one per CPU
+    PASSWORD_MAX_PENDING = 32  # queued + running per web process before answering 503
+    PASSWORD_HASH_TIMEOUT = 10  # seconds
+
+    # Scheduled tasks (one leader thread per deployment runs them)
+    SCHEDULER_ENABLED = True  # start the scheduler thread with the first request
+    SCHEDULER_POLL_INTERVAL = 5  # seconds; longest sleep between checks for due tasks
+    SCHEDULER_LEADER_RETRY = 30  # seconds between attempts to take over leadership
+    SCHEDULER_BATCH_SIZE = 500  # tasks taken per round
+    SCHEDULER_MAX_ATTEMPTS = 5  # a failing task is dropped after this many runs
+    SCHEDULER_LOCK_FILE = os.environ.get('SCHEDULER_LOCK_FILE', os.path.join(os.getcwd(), 'instance', 'scheduler.lock'))
+    OTP_CLEAR_DELAY = 60  # seconds after completion before the pickup OTP is cleared
+    SCHEDULED_ORDER_LEAD_TIME = 45 * 60  # seconds before scheduled_time a held order enters the live queue
+
+    # Scheduled-order slot calendar
+    SLOT_LENGTH_MINUTES = 30
+    SLOT_CALENDAR_DAYS = 7
+    SLOT_CALENDAR_CACHE_SIZE = 5000  # restaurant-days per process
+    SLOT_CALENDAR_TTL = 30  # seconds; bounds how long other workers show stale availability
+    RESTAURANT_UTC_OFFSET_MINUTES = 330  # restaurants' local time (IST); TimeSlot windows are local
+
+    # Exports
+    EXPORT_BATCH_SIZE = 1000  # rows fetched per round trip
+    EXPORT_CHUNK_SIZE = 64 * 1024  # bytes per streamed chunk
+    EXPORT_SPOOL_DIR = os.environ.get('EXPORT_SPOOL_DIR', os.path.join(os.getcwd(), 'instance', 'exports'))
+    EXPORT_MAX_CONCURRENT_JOBS = 2  # export processes per web process
+    EXPORT_MAX_PENDING_JOBS = 5  # queued + running, across all processes
+    EXPORT_PROGRESS_EVERY = 5000  # rows between progress updates
+    EXPORT_RESULT_TTL = 24 * 60 * 60  # seconds a finished file stays downloadable
+    EXPORT_JOB_TIMEOUT = 60 * 60  # seconds before an unfinished job is considered dead
+
 # Configuration for local development using SQLite
 class LocalDevelopmentConfig(Config):
     SQLALCHEMY_DATABASE_URI = "sqlite:///../instance/database.sqlite3" # Adjusted path for instance folder
     DEBUG = True
+    STATIC_AUTORELOAD = True
+
+# Used by the test suite (FLASK_ENV=testing): a private in-memory database
+# and no background threads or files written at startup.
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    STATIC_PRECOMPRESS = False
+    SCHEDULER_ENABLED = False
+    PASSWORD_BCRYPT_ROUNDS = 4
+    SECURITY_PASSWORD_HASH_PASSLIB_OPTIONS = {'bcrypt__rounds': PASSWORD_BCRYPT_ROUNDS}
 
 # ✅ START: ADDED PRODUCTION CONFIG
 # This configuration will be used when deploying to Render
@@ -27,5 +142,6 @@ class ProductionConfig(Config):
     # The replace() call is a necessary fix for SQLAlchemy 2.x compatibility.
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', '').replace('postgres://', 'postgresql://')
     DEBUG = False
+    EVENT_BROKER = os.environ.get('EVENT_BROKER', 'redis')
 # ✅ END: ADDED PRODUCTION CONFIG
 
@@ -2,11 +2,14 @@ from app import app
 from backend.extensions import db
 from backend.security import user_datastore
 from backend.models import Restaurant, Category, MenuItem
+from backend.admin_search import ensure_search_tables
+from backend.passwords import hash_password
 
 def create_data():
     """Function to create initial roles, users, and sample data."""
     with app.app_context():
         db.create_all()
+        ensure_search_tables()
         
         # Role creation
         user_datastore.find_or_create_role(name='admin', description='Superuser')
@@ -15,13 +18,13 @@ def create_data():
 
         # User creation
         if not user_datastore.find_user(email='admin@email.com'):
-            user_datastore.create_user(email='admin@email.com', password='admin123', roles=['admin'])
+            user_datastore.create_user(email='admin@email.com', password=hash_password('admin123'), roles=['admin'])
         
         if not user_datastore.find_user(email='customer1@email.com'):
-            user_datastore.create_user(email='customer1@email.com', password='cust123', roles=['customer'])
+            user_datastore.create_user(email='customer1@email.com', password=hash_password('cust123'), roles=['customer'])
         
         if not user_datastore.find_user(email='owner1@email.com'):
-            user_datastore.create_user(email='owner1@email.com', password='owner123', roles=['owner'])
+            user_datastore.create_user(email='owner1@email.com', password=hash_password('owner123'), roles=['owner'])
         
         db.session.commit()
 
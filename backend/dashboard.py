@@ -0,0 +1,89 @@
+import threading
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session, joinedload
+from .cache import LRUCache
+from .models import db, User, Role, RolesUsers, Restaurant, RestaurantDailyStats
+
+_snapshot_lock = threading.Lock()
+
+
+def _snapshot_cache():
+    cache = current_app.extensions.get('admin_dashboard')
+    if cache is None:
+        with _snapshot_lock:
+            cache = current_app.extensions.get('admin_dashboard')
+            if cache is None:
+                cache = LRUCache(1, ttl=current_app.config['ADMIN_DASHBOARD_TTL'])
+                current_app.extensions['admin_dashboard'] = cache
+    return cache
+
+
+def _platform_totals():
+    """
+    All headline figures in a single round trip. Revenue and order counts come
+    from the daily rollups, so their cost follows the number of restaurant-days
+    rather than the number of orders.
+    """
+    revenue = select(func.coalesce(func.sum(RestaurantDailyStats.revenue), 0.0)).scalar_subquery()
+    orders = select(func.coalesce(func.sum(RestaurantDailyStats.orders_placed), 0)).scalar_subquery()
+    customers = select(func.count(RolesUsers.user_id))\
+        .join(Role, RolesUsers.role_id == Role.id)\
+        .where(Role.name == 'customer').scalar_subquery()
+    restaurants = select(func.count(Restaurant.id)).scalar_subquery()
+    return db.session.execute(select(revenue, orders, customers, restaurants)).one()
+
+
+def _build_snapshot():
+    total_revenue, total_orders, total_customers, total_restaurants = _platform_totals()
+
+    # Eagerly load the 'owner' relationship to prevent extra queries.
+    pending_restaurants = Restaurant.query.options(joinedload(Restaurant.owner)).filter_by(is_verified=False).all()
+
+    return {
+        'stats': {
+            'totalRevenue': round(total_revenue, 2),
+            'totalOrders': total_orders,
+            'totalCustomers': total_customers,
+            'totalRestaurants': total_restaurants
+        },
+        'pendingRestaurants': [{
+            'id': resto.id,
+            'name': resto.name,
+            # This check prevents a server crash if a restaurant has no owner.
+            'ownerEmail': resto.owner.email if resto.owner else 'Owner Not Found',
+            'city': resto.city
+        } for resto in pending_restaurants],
+        'generatedAt': datetime.utcnow().isoformat() + 'Z'
+    }
+
+
+def admin_dashboard_snapshot(refresh=False):
+    """
+    Returns the admin dashboard data, rebuilt at most every ADMIN_DASHBOARD_TTL
+    seconds unless `refresh` is set or an invalidating change was committed in
+    this process.
+    """
+    cache = _snapshot_cache()
+    snapshot = None if refresh else cache.get('snapshot')
+    if snapshot is None:
+        snapshot = _build_snapshot()
+        cache.set('snapshot', snapshot)
+    return snapshot
+
+
+def invalidate_admin_dashboard():
+    """ Drops the dashboard snapshot once the current transaction commits. """
+    db.session.info['admin_dashboard_stale'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_stale_snapshot(session):
+    if session.info.pop('admin_dashboard_stale', None):
+        _snapshot_cache().clear()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_stale_snapshot(session):
+    session.info.pop('admin_dashboard_stale', None)
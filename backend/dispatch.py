@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta, timezone
+from flask import current_app, has_app_context
+from sqlalchemy import select, update, event
+from sqlalchemy.orm import Session
+from .models import db, Order, Restaurant, FINAL_ORDER_STATUSES
+from .scheduler import schedule_task, task_handler
+from .events import publish_order_event
+
+
+def utc_naive(value):
+    """ Converts an aware datetime to the naive UTC the database stores; naive values are assumed UTC. """
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def hold_scheduled_order(order, now=None):
+    """
+    Holds a scheduled order out of the live queue until
+    SCHEDULED_ORDER_LEAD_TIME seconds before its scheduled time, and
+    schedules its release. Orders due sooner go straight to the queue.
+    Call before committing a new order. Returns True if the order is held.
+    """
+    if not order.is_scheduled or order.scheduled_time is None:
+        return False
+    now = now or datetime.utcnow()
+    release_at = order.scheduled_time - timedelta(seconds=current_app.config['SCHEDULED_ORDER_LEAD_TIME'])
+    if release_at <= now:
+        return False
+    order.release_at = release_at
+    schedule_task('release_orders', at=release_at)
+    return True
+
+
+def release_orders(now=None, batch_size=None):
+    """
+    Moves every held order whose release time has passed into the live queue:
+    per restaurant, one order-version bump and one UPDATE stamping the new
+    version, so polling queues pick the orders up as changes. Orders
+    cancelled or refunded while held are skipped. Events are published after
+    the caller commits. Returns the number of orders released.
+    """
+    now = now or datetime.utcnow()
+    batch_size = batch_size or current_app.config['SCHEDULER_BATCH_SIZE']
+    due = db.session.execute(
+        select(Order.id, Order.restaurant_id, Order.status)
+        .where(Order.release_at <= now, Order.status.notin_(FINAL_ORDER_STATUSES))
+        .order_by(Order.release_at)
+        .limit(batch_size)
+    ).all()
+
+    by_restaurant = {}
+    for row in due:
+        by_restaurant.setdefault(row.restaurant_id, []).append(row.id)
+    for restaurant_id, order_ids in by_restaurant.items():
+        version = db.session.execute(
+            update(Restaurant)
+            .where(Restaurant.id == restaurant_id)
+            .values(order_version=Restaurant.order_version + 1)
+            .returning(Restaurant.order_version)
+        ).scalar()
+        db.session.execute(
+            update(Order)
+            .where(Order.id.in_(order_ids))
+            .values(release_at=None, change_version=version)
+        )
+    if due:
+        db.session.info.setdefault('released_orders', []).extend(due)
+    if len(due) == batch_size:
+        schedule_task('release_orders')  # more are due; continue in the next round
+    return len(due)
+
+
+@task_handler('release_orders')
+def release_due_orders(tasks):
+    """ Any due release task sweeps all due orders, so orders whose own task was lost are released too. """
+    release_orders()
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_released(session):
+    released = session.info.pop('released_orders', None)
+    if released and has_app_context():
+        for order in released:
+            publish_order_event(order, 'order_released')
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_released(session):
+    session.info.pop('released_orders', None)
@@ -0,0 +1,198 @@
+import json
+import queue
+import threading
+import time
+from flask import Response, current_app
+
+
+class EventHub:
+    """ Per-process fan-out of events to the SSE streams subscribed to a channel. """
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self.streams = 0
+        self._subscribers = {}
+        self._listeners = {}
+        self._lock = threading.Lock()
+
+    def add_listener(self, channel, callback):
+        """ Calls callback(event) for every event on `channel`, on the thread that dispatches it. """
+        with self._lock:
+            self._listeners.setdefault(channel, []).append(callback)
+
+    def subscribe(self, channel, limit=None):
+        """ A new subscriber queue, or None if `limit` streams are already open in this process. """
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if limit is not None and self.streams >= limit:
+                return None
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+            self.streams += 1
+        return subscriber
+
+    def unsubscribe(self, channel, subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(channel)
+            if subscribers and subscriber in subscribers:
+                subscribers.discard(subscriber)
+                self.streams -= 1
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def dispatch(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+            listeners = list(self._listeners.get(channel, ()))
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Error handling event on {channel}: {e}")
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event)
+            except queue.Full:
+                # A stalled client must not block publishers; it will resync
+                # through its regular fetch when it reconnects.
+                pass
+
+
+class InMemoryBroker:
+    """ Delivers events straight to this process's hub. Used for development and tests. """
+
+    def __init__(self, hub, config):
+        self.hub = hub
+
+    def publish(self, channel, event):
+        self.hub.dispatch(channel, event)
+
+
+class RedisBroker:
+    """ Relays events between processes over Redis pub/sub. """
+
+    def __init__(self, hub, config):
+        import redis
+        self.hub = hub
+        self.prefix = config['EVENT_CHANNEL_PREFIX']
+        self.redis = redis.Redis.from_url(config['EVENT_BROKER_URL'])
+        listener = threading.Thread(target=self._listen, daemon=True)
+        listener.start()
+
+    def publish(self, channel, event):
+        self.redis.publish(self.prefix + channel, json.dumps(event))
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + '*')
+                for message in pubsub.listen():
+                    channel = message['channel'].decode('utf-8')[len(self.prefix):]
+                    self.hub.dispatch(channel, json.loads(message['data']))
+            except Exception as e:
+                print(f"Event broker connection lost, reconnecting: {e}")
+                time.sleep(1)
+
+
+BROKERS = {
+    'memory': InMemoryBroker,
+    'redis': RedisBroker,
+}
+
+_broker_lock = threading.Lock()
+
+
+def init_events(app):
+    """
+    Refuses to start with the in-memory broker behind several workers: an
+    event published in one worker would never reach streams held by the
+    others, and their pages would only catch up on their slow poll.
+    """
+    broker = app.config['EVENT_BROKER']
+    if broker not in BROKERS:
+        raise RuntimeError(f"Unknown EVENT_BROKER '{broker}'; use one of {', '.join(BROKERS)}.")
+    if broker == 'memory' and app.config['WEB_WORKERS'] > 1:
+        raise RuntimeError(
+            f"EVENT_BROKER='memory' cannot deliver events across {app.config['WEB_WORKERS']} workers; "
+            "set EVENT_BROKER=redis and REDIS_URL."
+        )
+
+
+def get_hub():
+    return get_broker().hub
+
+
+def get_broker():
+    """ Returns the app's broker, created on first use from EVENT_BROKER. """
+    broker = current_app.extensions.get('event_broker')
+    if broker is None:
+        with _broker_lock:
+            broker = current_app.extensions.get('event_broker')
+            if broker is None:
+                broker = BROKERS[current_app.config['EVENT_BROKER']](EventHub(), current_app.config)
+                current_app.extensions['event_broker'] = broker
+    return broker
+
+
+def restaurant_channel(restaurant_id):
+    return f'restaurant:{restaurant_id}'
+
+
+def order_channel(order_id):
+    return f'order:{order_id}'
+
+
+def publish_order_event(order, event_type):
+    """
+    Notifies the restaurant's queue stream and the customer's order stream
+    about an order change. Call after the change has been committed.
+    """
+    event = {
+        'type': event_type,
+        'order_id': order.id,
+        'restaurant_id': order.restaurant_id,
+        'status': order.status,
+    }
+    try:
+        broker = get_broker()
+        broker.publish(restaurant_channel(order.restaurant_id), event)
+        broker.publish(order_channel(order.id), event)
+    except Exception as e:
+        # Streams are a latency optimization; clients still resync by fetching.
+        print(f"Error publishing event for order {order.id}: {e}")
+
+
+def event_stream(channel):
+    """
+    Builds a text/event-stream response for a channel. Each open stream holds
+    one worker thread (see gunicorn.conf.py): the stream closes after
+    SSE_MAX_STREAM_SECONDS, and browsers reconnect automatically. Past
+    SSE_MAX_STREAMS open streams, 503 sends the client to its polling fallback.
+    """
+    hub = get_hub()
+    heartbeat = current_app.config['SSE_HEARTBEAT_SECONDS']
+    max_duration = current_app.config['SSE_MAX_STREAM_SECONDS']
+    subscriber = hub.subscribe(channel, limit=current_app.config['SSE_MAX_STREAMS'])
+    if subscriber is None:
+        response = current_app.response_class('Too many open streams.', status=503, mimetype='text/plain')
+        response.headers['Retry-After'] = '60'
+        return response
+
+    def generate():
+        deadline = time.monotonic() + max_duration
+        try:
+            yield 'retry: 3000\n\n'
+            while time.monotonic() < deadline:
+                try:
+                    event = subscriber.get(timeout=heartbeat)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            hub.unsubscribe(channel, subscriber)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
@@ -0,0 +1,270 @@
+import multiprocessing
+import os
+import socket
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update, or_, and_
+from .models import db, ExportJob
+from .exports import get_export, iter_rows, count_rows, write_export
+from .scheduler import schedule_task, task_handler
+
+ACTIVE_JOB_STATUSES = ('queued', 'running')
+
+# Identifies this run of the server: shared by the workers of one gunicorn
+# master (gunicorn.conf.py sets SERVER_INSTANCE_ID before forking them),
+# unique per process otherwise. Jobs record it, so the next run on this host
+# can tell which unfinished jobs no live process is working on.
+SERVER_ID = f"{socket.gethostname()}:{os.environ.get('SERVER_INSTANCE_ID') or uuid.uuid4().hex}"
+
+class ExportBusy(Exception):
+    """ Raised when EXPORT_MAX_PENDING_JOBS exports are already queued or running. """
+
+
+_executor_lock = threading.Lock()
+
+
+# The app of a forked export process, set by _init_worker.
+_worker_app = None
+
+
+def _init_worker(app):
+    """ Runs once in each export process, which is forked with the app already loaded. """
+    global _worker_app
+    _worker_app = app
+    # Connections inherited from the web process stay with it.
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def _executor():
+    """
+    Returns the app's export pool, created on first use. Processes rather than
+    threads: serializing rows (openpyxl above all) is CPU-bound for minutes
+    and would hold the GIL against this worker's request threads. The pool
+    is forked, so its processes start with the app and config of this one.
+    The pool size caps how many exports run at once.
+    """
+    executor = current_app.extensions.get('export_executor')
+    if executor is None:
+        with _executor_lock:
+            executor = current_app.extensions.get('export_executor')
+            if executor is None:
+                executor = ProcessPoolExecutor(
+                    max_workers=current_app.config['EXPORT_MAX_CONCURRENT_JOBS'],
+                    mp_context=multiprocessing.get_context('fork'),
+                    initializer=_init_worker,
+                    initargs=(current_app._get_current_object(),)
+                )
+                current_app.extensions['export_executor'] = executor
+    return executor
+
+
+def _job_done(app, executor, job_id, future):
+    """ Fails a job whose process died before it could record the outcome itself. """
+    error = future.exception()
+    if error is None:
+        return
+    print(f"Export job {job_id} did not finish: {error}")
+    with app.app_context():
+        if isinstance(error, BrokenProcessPool):
+            with _executor_lock:
+                if app.extensions.get('export_executor') is executor:
+                    app.extensions.pop('export_executor')
+            executor.shutdown(wait=False)
+        try:
+            ExportJob.query.filter(ExportJob.id == job_id, ExportJob.status.in_(ACTIVE_JOB_STATUSES))\
+                .update({'status': 'failed', 'error': "Export failed.", 'finished_at': datetime.utcnow()},
+                        synchronize_session=False)
+            db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def _spool_dir():
+    spool_dir = current_app.config['EXPORT_SPOOL_DIR']
+    os.makedirs(spool_dir, exist_ok=True)
+    return spool_dir
+
+
+def serialize_job(job):
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'format': job.format,
+        'status': job.status,
+        'rows_written': max(job.rows_written, _spooled_progress(job)),
+        'total_rows': job.total_rows,
+        'error': job.error,
+        'created_at': job.created_at.isoformat(),
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'expires_at': job.expires_at.isoformat() if job.expires_at else None,
+        'download_url': f'/api/admin/exports/{job.id}/download' if job.status == 'completed' else None,
+    }
+
+
+def enqueue_export(kind, fmt, user_id):
+    """
+    Records a queued export job and hands it to the pool. Raises ExportError
+    for an unknown kind/format and ExportBusy when too many jobs are pending.
+    """
+    get_export(kind, fmt)
+    if not current_app.extensions.get('export_orphans_failed'):
+        fail_orphaned_jobs()
+        current_app.extensions['export_orphans_failed'] = True
+    expire_export_jobs()
+
+    pending = ExportJob.query.filter(ExportJob.status.in_(ACTIVE_JOB_STATUSES)).count()
+    if pending >= current_app.config['EXPORT_MAX_PENDING_JOBS']:
+        raise ExportBusy("Too many exports are in progress. Please try again shortly.")
+
+    job = ExportJob(id=uuid.uuid4().hex, kind=kind, format=fmt, status='queued', created_by=user_id,
+                    server_id=SERVER_ID)
+    db.session.add(job)
+    # Fails the job if it is still unfinished after EXPORT_JOB_TIMEOUT.
+    schedule_task('expire_exports', delay=current_app.config['EXPORT_JOB_TIMEOUT'])
+    db.session.commit()
+
+    app, job_id = current_app._get_current_object(), job.id
+    executor = _executor()
+    future = executor.submit(_run_job, job_id)
+    future.add_done_callback(lambda future: _job_done(app, executor, job_id, future))
+    return job
+
+
+def _progress_path(job_id):
+    return os.path.join(_spool_dir(), f'{job_id}.progress')
+
+
+def _set_progress(job_id, rows_written):
+    # SQLite cannot commit a write from another connection while the export's
+    # cursor holds its read lock ("database is locked"), so there progress goes
+    # to a file in the spool directory. Elsewhere a separate connection records
+    # it for status requests served by any worker, leaving the open cursor alone.
+    if db.engine.dialect.name == 'sqlite':
+        with open(_progress_path(job_id), 'w') as f:
+            f.write(str(rows_written))
+        return
+    with db.engine.begin() as connection:
+        connection.execute(update(ExportJob).where(ExportJob.id == job_id).values(rows_written=rows_written))
+
+
+def _spooled_progress(job):
+    if job.status != 'running' or db.engine.dialect.name != 'sqlite':
+        return 0
+    try:
+        with open(_progress_path(job.id)) as f:
+            return int(f.read() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _tracked(rows, job_id, every):
+    count = 0
+    for row in rows:
+        yield row
+        count += 1
+        if count % every == 0:
+            _set_progress(job_id, count)
+
+
+def _run_job(job_id, app=None):
+    """ Runs a queued job to completion. Called in an export process, or with `app` in this one. """
+    app = app or _worker_app
+    with app.app_context():
+        job = db.session.get(ExportJob, job_id)
+        if job is None or job.status != 'queued':
+            return
+        job.status = 'running'
+        job.started_at = datetime.utcnow()
+        db.session.commit()
+
+        path = os.path.join(_spool_dir(), f'{job.id}.{job.format}')
+        partial_path = path + '.part'
+        try:
+            job.total_rows = count_rows(job.kind)
+            db.session.commit()
+
+            rows = _tracked(iter_rows(job.kind), job.id, app.config['EXPORT_PROGRESS_EVERY'])
+            with open(partial_path, 'wb') as f:
+                write_export(job.kind, job.format, f, rows=rows)
+            os.replace(partial_path, path)
+
+            db.session.refresh(job)
+            job.status = 'completed'
+            job.rows_written = job.total_rows
+            job.file_path = path
+            job.finished_at = datetime.utcnow()
+            job.expires_at = job.finished_at + timedelta(seconds=app.config['EXPORT_RESULT_TTL'])
+            schedule_task('expire_exports', at=job.expires_at)
+            db.session.commit()
+        except Exception as e:
+            print(f"Error running export job {job_id}: {e}")
+            db.session.rollback()
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            job = db.session.get(ExportJob, job_id)
+            job.status = 'failed'
+            job.error = "Export failed."
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        finally:
+            if os.path.exists(_progress_path(job_id)):
+                os.remove(_progress_path(job_id))
+            db.session.remove()
+
+
+def fail_orphaned_jobs():
+    """
+    Fails the queued and running jobs left by an earlier run of the server on
+    this host. Their processes died with it, and they would otherwise count
+    against EXPORT_MAX_PENDING_JOBS until EXPORT_JOB_TIMEOUT. Jobs of other
+    hosts are left to the timeout. Returns the number of jobs failed.
+    """
+    host = SERVER_ID.split(':', 1)[0]
+    failed = ExportJob.query.filter(
+        ExportJob.status.in_(ACTIVE_JOB_STATUSES),
+        or_(
+            ExportJob.server_id == None,
+            and_(ExportJob.server_id.startswith(f'{host}:', autoescape=True), ExportJob.server_id != SERVER_ID)
+        )
+    ).update({'status': 'failed', 'error': "The server restarted during the export.",
+              'finished_at': datetime.utcnow()}, synchronize_session=False)
+    db.session.commit()
+    return failed
+
+
+def expire_export_jobs():
+    """
+    Removes spooled files whose TTL has passed, and fails jobs that have been
+    running longer than EXPORT_JOB_TIMEOUT (e.g. their worker was restarted).
+    Returns the number of jobs expired.
+    """
+    expired = _expire(datetime.utcnow())
+    db.session.commit()
+    return expired
+
+
+@task_handler('expire_exports')
+def expire_due_exports(tasks):
+    """ Scheduled at each job's timeout and at each result's expiry; any due task sweeps them all. """
+    _expire(datetime.utcnow())
+
+
+def _expire(now):
+    expired = ExportJob.query.filter(ExportJob.status == 'completed', ExportJob.expires_at < now).all()
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        job.status = 'expired'
+        job.file_path = None
+
+    stale_before = now - timedelta(seconds=current_app.config['EXPORT_JOB_TIMEOUT'])
+    ExportJob.query.filter(
+        ExportJob.status.in_(ACTIVE_JOB_STATUSES),
+        ExportJob.created_at < stale_before
+    ).update({'status': 'failed', 'error': "Export timed out.", 'finished_at': now}, synchronize_session=False)
+    return len(expired)
@@ -0,0 +1,309 @@
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import openpyxl
+from flask import current_app, Response, stream_with_context
+from sqlalchemy import select, func
+from sqlalchemy.orm import aliased
+from .models import db, User, Role, Restaurant, Order, restaurant_status_expression
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+EXPORT_FORMATS = {
+    'xlsx': XLSX_MIMETYPE,
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class ExportError(ValueError):
+    """ Raised for an unknown export kind or format. """
+
+
+# --- Datasets ---
+# Each dataset selects plain columns (no ORM entities, no relationship loading)
+# and maps every row to the exported values.
+
+def _restaurants_statement():
+    order_metrics = select(
+        Order.restaurant_id,
+        func.count(Order.id).label('total_orders'),
+        func.sum(Order.total_amount).label('total_revenue')
+    ).where(Order.status == 'completed').group_by(Order.restaurant_id).subquery()
+    owner = aliased(User)
+
+    return select(
+        Restaurant.id, Restaurant.name, owner.id, owner.email,
+        Restaurant.city, restaurant_status_expression(owner),
+        func.coalesce(order_metrics.c.total_orders, 0),
+        func.coalesce(order_metrics.c.total_revenue, 0)
+    ).outerjoin(owner, Restaurant.owner_id == owner.id)\
+     .outerjoin(order_metrics, Restaurant.id == order_metrics.c.restaurant_id)\
+     .order_by(Restaurant.id)
+
+
+def _restaurant_row(row):
+    restaurant_id, name, owner_id, owner_email, city, status, total_orders, total_revenue = row
+    return [restaurant_id, name, owner_email if owner_id is not None else 'N/A', city, status,
+            total_orders, round(float(total_revenue), 2)]
+
+
+def _users_statement():
+    orders_subquery = select(
+        Order.user_id,
+        func.count(Order.id).label('total_orders'),
+        func.sum(Order.total_amount).label('total_spent')
+    ).group_by(Order.user_id).subquery()
+
+    return select(
+        User.id, User.name, User.email, User.active,
+        func.coalesce(orders_subquery.c.total_orders, 0),
+        func.coalesce(orders_subquery.c.total_spent, 0)
+    ).outerjoin(orders_subquery, User.id == orders_subquery.c.user_id)\
+     .where(User.roles.any(Role.name == 'customer'))\
+     .order_by(User.id)
+
+
+def _user_row(row):
+    user_id, name, email, active, total_orders, total_spent = row
+    return [user_id, name, email, "Active" if active else "Blocked", total_orders, round(float(total_spent), 2)]
+
+
+def _orders_statement():
+    return select(
+        Order.id, User.name, Restaurant.name, Order.created_at,
+        Order.total_amount, Order.status, Order.order_type
+    ).outerjoin(User, Order.user_id == User.id)\
+     .outerjoin(Restaurant, Order.restaurant_id == Restaurant.id)\
+     .order_by(Order.created_at.desc(), Order.id.desc())
+
+
+def _order_row(row):
+    order_id, customer_name, restaurant_name, created_at, total_amount, status, order_type = row
+    return [
+        order_id,
+        customer_name if customer_name is not None else 'N/A',
+        restaurant_name if restaurant_name is not None else 'N/A',
+        created_at.strftime('%Y-%m-%d %H:%M'),
+        total_amount,
+        status.capitalize(),
+        order_type.capitalize()
+    ]
+
+
+# kind -> (sheet title, headers, statement factory, row mapper)
+EXPORTS = {
+    'restaurants': ("Restaurants", ["ID", "Name", "Owner Email", "City", "Status", "Total Orders", "Total Revenue"],
+                    _restaurants_statement, _restaurant_row),
+    'users': ("Users", ["ID", "Name", "Email", "Status", "Total Orders", "Total Spent"],
+              _users_statement, _user_row),
+    'orders': ("Orders", ["Order ID", "Customer Name", "Restaurant Name", "Date", "Total Amount", "Status", "Order Type"],
+               _orders_statement, _order_row),
+}
+
+
+def get_export(kind, fmt):
+    """ Returns (title, headers, statement factory, row mapper) after validating kind and format. """
+    if kind not in EXPORTS:
+        raise ExportError(f"Unknown export '{kind}'.")
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
+    return EXPORTS[kind]
+
+
+def iter_rows(kind, session=None):
+    """
+    Yields the exported rows of a dataset. Rows are fetched EXPORT_BATCH_SIZE
+    at a time (a server-side cursor where the driver supports one), so memory
+    does not grow with the table.
+    """
+    _, _, statement, to_row = EXPORTS[kind]
+    batch_size = current_app.config['EXPORT_BATCH_SIZE']
+    session = session or db.session
+    result = session.execute(statement().execution_options(yield_per=batch_size))
+    try:
+        for row in result:
+            yield to_row(row)
+    finally:
+        result.close()
+
+
+def count_rows(kind):
+    statement = EXPORTS[kind][2]().order_by(None).subquery()
+    return db.session.execute(select(func.count()).select_from(statement)).scalar()
+
+
+# --- Writers ---
+
+def _csv_chunks(headers, rows, chunk_size):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _ndjson_chunks(headers, rows, chunk_size):
+    lines, size = [], 0
+    for row in rows:
+        line = json.dumps(dict(zip(headers, row)), default=str) + '\n'
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield ''.join(lines).encode('utf-8')
+            lines, size = [], 0
+    yield ''.join(lines).encode('utf-8')
+
+
+def write_xlsx(path, title, headers, rows):
+    """
+    Writes rows to an .xlsx file with openpyxl's write-only mode, which
+    streams rows to disk instead of keeping every cell in memory.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title)
+    sheet.append(headers)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+
+
+def write_export(kind, fmt, fileobj, rows=None):
+    """
+    Writes a complete export of `kind` in `fmt` to a binary file object.
+    `rows` defaults to iter_rows(kind); callers may wrap it, e.g. to track progress.
+    """
+    title, headers, _, _ = get_export(kind, fmt)
+    if rows is None:
+        rows = iter_rows(kind)
+    if fmt == 'xlsx':
+        write_xlsx(fileobj, title, headers, rows)
+        return
+    chunks = _csv_chunks if fmt == 'csv' else _ndjson_chunks
+    for chunk in chunks(headers, rows, current_app.config['EXPORT_CHUNK_SIZE']):
+        fileobj.write(chunk)
+
+
+def _file_chunks(path, chunk_size):
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def export_response(kind, fmt):
+    """
+    Streams an export as a chunked download. CSV and NDJSON are written while
+    rows are fetched; an .xlsx file is a zip archive that can only be finished
+    once all rows are known, so it is built in write-only mode in a temporary
+    file and streamed from there.
+    """
+    title, headers, _, _ = get_export(kind, fmt)
+    chunk_size = current_app.config['EXPORT_CHUNK_SIZE']
+
+    if fmt == 'xlsx':
+        fd, path = tempfile.mkstemp(suffix='.xlsx')
+        os.close(fd)
+        try:
+            write_xlsx(path, title, headers, iter_rows(kind))
+        except Exception:
+            os.remove(path)
+            raise
+        body = _file_chunks(path, chunk_size)
+    elif fmt == 'csv':
+        body = stream_with_context(_csv_chunks(headers, iter_rows(kind), chunk_size))
+    else:
+        body = stream_with_context(_ndjson_chunks(headers, iter_rows(kind), chunk_size))
+
+    return Response(body, mimetype=EXPORT_FORMATS[fmt], headers={
+        'Content-Disposition': f'attachment; filename={kind}_export.{fmt}',
+        'X-Accel-Buffering': 'no',
+    })
+
+
+# --- Benchmark ---
+
+def _rss_mb(field):
+    """ VmRSS (current) or VmHWM (peak) of this process in MB, from /proc (Linux). """
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    raise LookupError(field)
+
+
+def _measure_export(app, database_url, kind, fmt, results):
+    """ Runs in a forked child: resets the peak RSS, writes one export to a temporary file and reports. """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    with open('/proc/self/clear_refs', 'w') as clear_refs:
+        clear_refs.write('5')  # VmHWM := VmRSS, so the peak covers only this export
+    baseline = _rss_mb('VmRSS')
+    engine = create_engine(database_url)
+    with app.app_context(), Session(engine) as session, tempfile.TemporaryFile() as out:
+        started = time.perf_counter()
+        write_export(kind, fmt, out, rows=iter_rows(kind, session=session))
+        seconds = time.perf_counter() - started
+        size = out.tell()
+    results.put((seconds, size, baseline, _rss_mb('VmHWM')))
+
+
+def benchmark_exports(app, row_count, formats=tuple(EXPORT_FORMATS), batch_size=50000):
+    """
+    Exports `row_count` synthetic orders from a temporary SQLite database in
+    each format, each in a forked child process so its peak RSS is its own.
+    Linux only (reads /proc). Returns {format: (seconds, file bytes,
+    baseline RSS MB, peak RSS MB)}.
+    """
+    import multiprocessing
+    from datetime import datetime, timedelta
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.orm import Session
+
+    results = {}
+    with tempfile.TemporaryDirectory() as scratch:
+        database_url = f"sqlite:///{os.path.join(scratch, 'benchmark.sqlite3')}"
+        engine = create_engine(database_url)
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            user_id = session.execute(insert(User).values(
+                email='benchmark@example.com', name='Benchmark Customer', password='-',
+                fs_uniquifier='benchmark', active=True
+            )).inserted_primary_key[0]
+            restaurant_id = session.execute(insert(Restaurant).values(
+                owner_id=user_id, name='Benchmark', address='-', city='-'
+            )).inserted_primary_key[0]
+            started_at = datetime(2024, 1, 1)
+            for start in range(0, row_count, batch_size):
+                session.execute(insert(Order), [{
+                    'user_id': user_id, 'restaurant_id': restaurant_id,
+                    'total_amount': 100 + number % 900, 'status': 'completed', 'order_type': 'takeaway',
+                    'qr_payload': f'benchmark-{number}', 'created_at': started_at + timedelta(seconds=number),
+                } for number in range(start, min(start + batch_size, row_count))])
+            session.commit()
+        engine.dispose()
+
+        context = multiprocessing.get_context('fork')
+        for fmt in formats:
+            queue = context.Queue()
+            child = context.Process(target=_measure_export, args=(app, database_url, 'orders', fmt, queue))
+            child.start()
+            child.join()
+            if child.exitcode != 0:
+                raise RuntimeError(f"The {fmt} export benchmark failed (exit code {child.exitcode}).")
+            results[fmt] = queue.get()
+    return results
@@ -0,0 +1,193 @@
+import math
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from .models import db, Restaurant
+
+# Distances are computed in one vectorized NumPy pass (see requirements.txt);
+# the scalar formula only covers environments installed without it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """
+    Calculate the great-circle distance between two points
+    on the earth (specified in decimal degrees)
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
+    dlon = lon2 - lon1
+    dlat = lat2 - lat1
+    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
+    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a))
+    return c * EARTH_RADIUS_KM
+
+
+def haversine_many(lat, lng, lats, lngs):
+    """ Distances in km from (lat, lng) to every point in lats/lngs. """
+    if not lats:
+        return []
+    if np is None:
+        return [haversine(lat, lng, la, ln) for la, ln in zip(lats, lngs)]
+
+    lat1, lng1 = math.radians(lat), math.radians(lng)
+    lat2 = np.radians(np.asarray(lats, dtype=float))
+    lng2 = np.radians(np.asarray(lngs, dtype=float))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))).tolist()
+
+
+def bounding_box(lat, lng, radius_km):
+    """ Returns (min_lat, max_lat, min_lng, max_lng) enclosing the search circle. """
+    dlat = radius_km / KM_PER_DEGREE_LAT
+    min_lat, max_lat = max(lat - dlat, -90.0), min(lat + dlat, 90.0)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9:
+        return min_lat, max_lat, -180.0, 180.0
+    dlng = radius_km / (KM_PER_DEGREE_LAT * cos_lat)
+    if dlng >= 180:
+        return min_lat, max_lat, -180.0, 180.0
+    # Circles crossing the antimeridian simply widen to the full longitude range.
+    if lng - dlng < -180 or lng + dlng > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lng - dlng, lng + dlng
+
+
+class GridIndex:
+    """ Buckets points into fixed-size latitude/longitude cells. """
+
+    def __init__(self, cell_degrees):
+        self.cell_degrees = cell_degrees
+        self.cells = {}
+        self.size = 0
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_degrees)), int(math.floor(lng / self.cell_degrees))
+
+    def add(self, point_id, lat, lng):
+        ids, lats, lngs = self.cells.setdefault(self._cell(lat, lng), ([], [], []))
+        ids.append(point_id)
+        lats.append(lat)
+        lngs.append(lng)
+        self.size += 1
+
+    def candidates(self, min_lat, max_lat, min_lng, max_lng):
+        """ Returns (ids, lats, lngs) of all points in cells overlapping the box. """
+        lat_lo, lng_lo = self._cell(min_lat, min_lng)
+        lat_hi, lng_hi = self._cell(max_lat, max_lng)
+        ids, lats, lngs = [], [], []
+
+        # For very large boxes it is cheaper to walk the occupied cells.
+        if (lat_hi - lat_lo + 1) * (lng_hi - lng_lo + 1) > len(self.cells):
+            keys = [k for k in self.cells if lat_lo <= k[0] <= lat_hi and lng_lo <= k[1] <= lng_hi]
+        else:
+            keys = [(i, j) for i in range(lat_lo, lat_hi + 1) for j in range(lng_lo, lng_hi + 1)]
+
+        for key in keys:
+            cell = self.cells.get(key)
+            if cell:
+                ids.extend(cell[0])
+                lats.extend(cell[1])
+                lngs.extend(cell[2])
+        return ids, lats, lngs
+
+
+class NearbyIndex:
+    """
+    Per-process spatial index over listable restaurants.
+
+    It is rebuilt lazily after any committed Restaurant change in this process
+    and, to pick up changes made by other workers, once it is older than
+    GEO_INDEX_MAX_AGE seconds.
+    """
+
+    def __init__(self):
+        self._grid = None
+        self._built_at = 0.0
+        self._dirty = True
+        self._lock = threading.Lock()
+
+    def mark_dirty(self):
+        self._dirty = True
+
+    def _is_stale(self):
+        max_age = current_app.config.get('GEO_INDEX_MAX_AGE', 300)
+        return self._dirty or self._grid is None or time.monotonic() - self._built_at > max_age
+
+    def _rebuild(self):
+        rows = db.session.query(Restaurant.id, Restaurant.latitude, Restaurant.longitude).filter(
+            Restaurant.is_verified == True,
+            Restaurant.is_active == True,
+            Restaurant.latitude.isnot(None),
+            Restaurant.longitude.isnot(None)
+        ).all()
+        grid = GridIndex(current_app.config.get('GEO_INDEX_CELL_DEGREES', 0.1))
+        for restaurant_id, lat, lng in rows:
+            grid.add(restaurant_id, lat, lng)
+        self._dirty = False
+        self._grid = grid
+        self._built_at = time.monotonic()
+
+    def grid(self):
+        if self._is_stale():
+            with self._lock:
+                if self._is_stale():
+                    self._rebuild()
+        return self._grid
+
+
+nearby_index = NearbyIndex()
+
+
+def _candidates_from_db(box):
+    """ SQL bounding-box prefilter, used when the in-memory index is disabled. """
+    min_lat, max_lat, min_lng, max_lng = box
+    rows = db.session.query(Restaurant.id, Restaurant.latitude, Restaurant.longitude).filter(
+        Restaurant.is_verified == True,
+        Restaurant.is_active == True,
+        Restaurant.latitude.between(min_lat, max_lat),
+        Restaurant.longitude.between(min_lng, max_lng)
+    ).all()
+    return [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows]
+
+
+def find_nearby(lat, lng, radius_km):
+    """ Returns [(restaurant_id, distance_km), ...] within the radius, nearest first. """
+    box = bounding_box(lat, lng, radius_km)
+    if current_app.config.get('GEO_INDEX_ENABLED', True):
+        ids, lats, lngs = nearby_index.grid().candidates(*box)
+    else:
+        ids, lats, lngs = _candidates_from_db(box)
+
+    distances = haversine_many(lat, lng, lats, lngs)
+    matches = [(rid, dist) for rid, dist in zip(ids, distances) if dist <= radius_km]
+    matches.sort(key=lambda match: match[1])
+    return matches
+
+
+# --- Index invalidation ---
+# Mapper events fire during flush; the index is only marked dirty once the
+# transaction commits so a concurrent rebuild never caches uncommitted rows.
+
+def _restaurant_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['nearby_index_dirty'] = True
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Restaurant, _event_name, _restaurant_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_nearby_index(session):
+    if session.info.pop('nearby_index_dirty', False):
+        nearby_index.mark_dirty()
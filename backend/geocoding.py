@@ -0,0 +1,235 @@
+import abc
+import hashlib
+import importlib
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from .models import db, GeocodeCache
+
+
+class GeocodingError(Exception):
+    """ Raised when the geocoding provider cannot be reached or fails. """
+
+
+class GeocodingRateLimited(GeocodingError):
+    """ Raised when a request would have to wait too long for a rate-limit slot. """
+
+
+def normalize_address(address):
+    """ Lowercases and strips punctuation/extra whitespace so equivalent addresses share a cache entry. """
+    address = re.sub(r'[^\w\s,]', ' ', address.lower())
+    parts = [' '.join(part.split()) for part in address.split(',')]
+    return ', '.join(part for part in parts if part)
+
+
+class RateLimiter:
+    """ Spaces calls at least `min_interval` seconds apart within this process. """
+
+    def __init__(self, min_interval, max_wait):
+        self.min_interval = min_interval
+        self.max_wait = max_wait
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_slot - now
+            if wait > self.max_wait:
+                raise GeocodingRateLimited("Geocoding rate limit reached.")
+            self._next_slot = max(now, self._next_slot) + self.min_interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class RedisRateLimiter:
+    """
+    Spaces calls at least `min_interval` seconds apart across every process
+    sharing the Redis key. The next free slot is reserved atomically by a
+    script timed by the Redis server's clock, so hosts need not agree on time.
+    """
+
+    # KEYS[1]: next free slot (seconds). ARGV: min_interval, max_wait.
+    # Returns the wait in seconds as a string, or -1 past max_wait.
+    RESERVE_SCRIPT = """
+        local clock = redis.call('TIME')
+        local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+        local next_slot = tonumber(redis.call('GET', KEYS[1]) or '0')
+        local wait = next_slot - now
+        if wait > tonumber(ARGV[2]) then
+            return '-1'
+        end
+        local interval = tonumber(ARGV[1])
+        redis.call('SET', KEYS[1], tostring(math.max(now, next_slot) + interval),
+                   'PX', math.ceil((math.max(wait, 0) + interval) * 1000) + 1000)
+        return tostring(math.max(wait, 0))
+    """
+
+    def __init__(self, url, key, min_interval, max_wait):
+        import redis
+        self.redis = redis.Redis.from_url(url)
+        self.key = key
+        self.min_interval = min_interval
+        self.max_wait = max_wait
+        self._reserve = self.redis.register_script(self.RESERVE_SCRIPT)
+
+    def acquire(self):
+        try:
+            wait = float(self._reserve(keys=[self.key], args=[self.min_interval, self.max_wait]))
+        except Exception as e:
+            # Without the shared slot the provider's limit cannot be honoured.
+            raise GeocodingError(f"Geocoding rate limiter unavailable: {e}") from e
+        if wait < 0:
+            raise GeocodingRateLimited("Geocoding rate limit reached.")
+        if wait > 0:
+            time.sleep(wait)
+
+
+def rate_limiter(config):
+    """
+    The limiter for provider calls. Several workers (EVENT_BROKER=redis, which
+    init_events requires for them) share one limit through Redis; a single
+    process keeps it in memory.
+    """
+    if config['EVENT_BROKER'] == 'redis':
+        return RedisRateLimiter(config['EVENT_BROKER_URL'], config['EVENT_CHANNEL_PREFIX'] + 'geocoder:next-slot',
+                                config['GEOCODER_MIN_INTERVAL'], config['GEOCODER_MAX_WAIT'])
+    return RateLimiter(config['GEOCODER_MIN_INTERVAL'], config['GEOCODER_MAX_WAIT'])
+
+
+class GeocodingProvider(abc.ABC):
+    """
+    Interface for geocoding backends. `geocode` returns (latitude, longitude),
+    None when the address is unknown, and raises GeocodingError on failure.
+    """
+
+    def __init__(self, config):
+        self.config = config
+
+    @abc.abstractmethod
+    def geocode(self, address):
+        pass
+
+
+class NominatimProvider(GeocodingProvider):
+    """ OpenStreetMap Nominatim over a pooled HTTP session. """
+
+    def __init__(self, config):
+        super().__init__(config)
+        self.url = config['GEOCODER_URL']
+        self.timeout = config['GEOCODER_TIMEOUT']
+        self.session = requests.Session()
+        # A custom User-Agent is required by Nominatim's terms of service.
+        self.session.headers['User-Agent'] = config['GEOCODER_USER_AGENT']
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=config['GEOCODER_POOL_SIZE'])
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.rate_limiter = rate_limiter(config)
+
+    def geocode(self, address):
+        self.rate_limiter.acquire()
+        params = {'q': address, 'format': 'json', 'limit': 1}
+        try:
+            response = self.session.get(self.url, params=params, timeout=self.timeout)
+            response.raise_for_status()
+            results = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            raise GeocodingError(str(e)) from e
+
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    """ Returns the app's provider, built once from the GEOCODER_PROVIDER dotted path. """
+    provider = current_app.extensions.get('geocoder')
+    if provider is None:
+        with _provider_lock:
+            provider = current_app.extensions.get('geocoder')
+            if provider is None:
+                module_name, _, class_name = current_app.config['GEOCODER_PROVIDER'].rpartition('.')
+                provider_class = getattr(importlib.import_module(module_name), class_name)
+                provider = provider_class(current_app.config)
+                current_app.extensions['geocoder'] = provider
+    return provider
+
+
+_evict_lock = threading.Lock()
+
+
+def _eviction_due():
+    """ True at most once per GEOCODE_CACHE_EVICT_INTERVAL in this process; expired rows are ignored on read meanwhile. """
+    now = time.monotonic()
+    with _evict_lock:
+        last = current_app.extensions.get('geocode_cache_evicted_at')
+        if last is not None and now - last < current_app.config['GEOCODE_CACHE_EVICT_INTERVAL']:
+            return False
+        current_app.extensions['geocode_cache_evicted_at'] = now
+    return True
+
+
+def _evict(now):
+    """ Drops expired entries and trims the cache to its size limit, least recently used first. """
+    ttl = timedelta(seconds=current_app.config['GEOCODE_CACHE_TTL'])
+    GeocodeCache.query.filter(GeocodeCache.created_at < now - ttl).delete(synchronize_session=False)
+
+    max_entries = current_app.config['GEOCODE_CACHE_MAX_ENTRIES']
+    cutoff = db.session.query(GeocodeCache.last_used_at)\
+        .order_by(GeocodeCache.last_used_at.desc())\
+        .offset(max_entries).limit(1).scalar()
+    if cutoff is not None:
+        GeocodeCache.query.filter(GeocodeCache.last_used_at <= cutoff).delete(synchronize_session=False)
+
+
+def geocode(address):
+    """
+    Resolves an address to (latitude, longitude), or None if it is unknown.
+    Results, including misses, are cached in the database. A hit refreshes
+    the entry's last_used_at (its LRU position) at most once per
+    GEOCODE_CACHE_TOUCH_INTERVAL, so repeated lookups stay read-only.
+    """
+    normalized = normalize_address(address)
+    if not normalized:
+        return None
+    address_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+    now = datetime.utcnow()
+    ttl = timedelta(seconds=current_app.config['GEOCODE_CACHE_TTL'])
+
+    entry = db.session.get(GeocodeCache, address_hash)
+    if entry and entry.created_at >= now - ttl:
+        touch_interval = timedelta(seconds=current_app.config['GEOCODE_CACHE_TOUCH_INTERVAL'])
+        if entry.last_used_at is None or entry.last_used_at < now - touch_interval:
+            entry.last_used_at = now
+            db.session.commit()
+        if entry.latitude is None:
+            return None
+        return entry.latitude, entry.longitude
+
+    location = get_provider().geocode(address)
+
+    if entry is None:
+        entry = GeocodeCache(address_hash=address_hash, address=normalized)
+        db.session.add(entry)
+    entry.latitude, entry.longitude = location if location else (None, None)
+    entry.created_at = now
+    entry.last_used_at = now
+    try:
+        db.session.flush()
+        if _eviction_due():
+            _evict(now)
+        db.session.commit()
+    except IntegrityError:
+        # Another request cached the same address concurrently; its row wins.
+        db.session.rollback()
+    return location
@@ -0,0 +1,226 @@
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+IMAGE_EXTENSIONS = ('jpg', 'jpeg', 'png', 'webp')
+# Output format -> (file extension, PIL save options).
+IMAGE_ENCODINGS = {
+    'jpeg': ('jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    'webp': ('webp', {'quality': 80, 'method': 4}),
+}
+UPLOADS_URL = '/assets/uploads'
+
+
+class ImageError(ValueError):
+    """ The upload is not an image PIL can decode, or is too large. """
+
+
+class ImageBusy(Exception):
+    """ Raised when IMAGE_MAX_PENDING uploads are already being processed. """
+
+
+# --- Worker side (runs in the process pool; no app context) ---
+
+def _write_atomic(directory, filename, write):
+    """ Writes through a temp file and renames it, so readers never see a partial file. """
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as fileobj:
+            write(fileobj)
+        os.replace(tmp_path, os.path.join(directory, filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def process_image(data, digest, upload_dir, widths):
+    """
+    Decodes an upload once and writes it fitted into each box in `widths` (a
+    box larger than the image becomes the image's own size) in every
+    IMAGE_ENCODINGS format as '<digest>-<box>.<ext>', plus the '<digest>.json'
+    manifest, written last. Returns the manifest.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        largest = max(widths)
+        # For JPEGs, decode straight at a reduced scale when the source is much larger.
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ImageError(f"The file could not be read as an image: {e}")
+
+    variants = []
+    longest = max(image.size)
+    # Largest first, so each thumbnail is resampled from the previous, smaller copy.
+    for box in sorted({min(width, longest) for width in widths}, reverse=True):
+        image.thumbnail((box, box), Image.LANCZOS)
+        for image_format, (extension, options) in IMAGE_ENCODINGS.items():
+            filename = f"{digest}-{box}.{extension}"
+            _write_atomic(upload_dir, filename, lambda f: image.save(f, image_format, **options))
+            variants.append({
+                'format': image_format,
+                'width': image.width,
+                'height': image.height,
+                'file': filename,
+            })
+
+    manifest = {'hash': digest, 'variants': variants}
+    _write_atomic(upload_dir, f"{digest}.json", lambda f: f.write(json.dumps(manifest).encode('utf-8')))
+    return manifest
+
+
+# --- Request side ---
+
+_executor_lock = threading.Lock()
+
+
+def _executor():
+    """
+    Returns the app's image pool, created on first use. Processes rather than
+    threads: decoding, resizing and encoding are CPU-bound and hold the GIL.
+    """
+    executor = current_app.extensions.get('image_executor')
+    if executor is None:
+        with _executor_lock:
+            executor = current_app.extensions.get('image_executor')
+            if executor is None:
+                executor = ProcessPoolExecutor(max_workers=current_app.config['IMAGE_MAX_WORKERS'])
+                current_app.extensions['image_executor'] = executor
+                current_app.extensions['image_slots'] = threading.BoundedSemaphore(
+                    current_app.config['IMAGE_MAX_PENDING']
+                )
+    return executor
+
+
+def _reset_executor(executor):
+    """ Drops a pool whose worker died, so the next upload starts a fresh one. """
+    with _executor_lock:
+        if current_app.extensions.get('image_executor') is executor:
+            current_app.extensions.pop('image_executor')
+    executor.shutdown(wait=False)
+
+
+def upload_dir():
+    directory = os.path.join(current_app.static_folder, 'assets', 'uploads')
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _load_manifest(directory, digest):
+    try:
+        with open(os.path.join(directory, f"{digest}.json"), encoding='utf-8') as fileobj:
+            return json.load(fileobj)
+    except (OSError, ValueError):
+        return None
+
+
+def _srcset(variants, image_format):
+    return ', '.join(f"{UPLOADS_URL}/{v['file']} {v['width']}w" for v in variants if v['format'] == image_format)
+
+
+def public_manifest(manifest):
+    """
+    The API shape of a manifest. `url` (the largest JPEG) is what image_url
+    and gallery entries store, as before; the srcsets let clients pick a size.
+    """
+    variants = manifest['variants']
+    largest = max((v for v in variants if v['format'] == 'jpeg'), key=lambda v: v['width'])
+    return {
+        'url': f"{UPLOADS_URL}/{largest['file']}",
+        'hash': manifest['hash'],
+        'srcset': _srcset(variants, 'jpeg'),
+        'webpSrcset': _srcset(variants, 'webp'),
+        'variants': [{
+            'url': f"{UPLOADS_URL}/{v['file']}",
+            'format': v['format'],
+            'width': v['width'],
+            'height': v['height'],
+        } for v in variants],
+    }
+
+
+def store_image(data):
+    """
+    Generates (or reuses) the size variants of an uploaded image and returns
+    its public manifest. Identical uploads share one set of files, named after
+    the hash of their content. Raises ImageError or ImageBusy.
+    """
+    if len(data) > current_app.config['IMAGE_MAX_UPLOAD_BYTES']:
+        raise ImageError("The image is too large.")
+    widths = tuple(current_app.config['IMAGE_WIDTHS'])
+    digest = hashlib.sha256(data + repr(widths).encode()).hexdigest()[:32]
+    directory = upload_dir()
+
+    manifest = _load_manifest(directory, digest)
+    if manifest is not None:
+        return public_manifest(manifest)
+
+    executor = _executor()
+    slots = current_app.extensions['image_slots']
+    if not slots.acquire(blocking=False):
+        raise ImageBusy()
+    try:
+        future = executor.submit(process_image, data, digest, directory, widths)
+        try:
+            manifest = future.result(timeout=current_app.config['IMAGE_PROCESS_TIMEOUT'])
+        except BrokenProcessPool:
+            _reset_executor(executor)
+            raise
+        except FutureTimeout:
+            future.cancel()
+            raise
+    finally:
+        slots.release()
+    return public_manifest(manifest)
+
+
+# --- Benchmark ---
+
+def benchmark_uploads(count, concurrency, size=(2400, 1600), seed=1):
+    """
+    Processes `count` distinct synthetic photos through store_image from
+    `concurrency` threads (at most IMAGE_MAX_PENDING), into a temporary
+    static folder. Needs an app context. Returns (seconds, images_per_second).
+    """
+    import random
+    from concurrent.futures import ThreadPoolExecutor
+
+    concurrency = min(concurrency, current_app.config['IMAGE_MAX_PENDING'])
+    rng = random.Random(seed)
+    payloads = []
+    for _ in range(count):
+        image = Image.new('RGB', size, tuple(rng.randrange(256) for _ in range(3)))
+        # Some noise so the encoder does real work and every payload hashes differently.
+        image.putdata([tuple(rng.randrange(256) for _ in range(3)) for _ in range(size[0] * 4)])
+        buffer = io.BytesIO()
+        image.save(buffer, 'jpeg', quality=90)
+        payloads.append(buffer.getvalue())
+
+    app = current_app._get_current_object()
+    static_folder = app.static_folder
+    with tempfile.TemporaryDirectory() as scratch:
+        app.static_folder = scratch
+
+        def upload(data):
+            with app.app_context():
+                return store_image(data)
+
+        try:
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(upload, payloads))
+            seconds = time.perf_counter() - started
+        finally:
+            app.static_folder = static_folder
+    return seconds, count / seconds
@@ -0,0 +1,244 @@
+import csv
+import io
+import os
+import time
+import openpyxl
+from flask import current_app
+from sqlalchemy import select, insert
+from .models import db, Category, MenuItem
+
+# Columns of the upload template, in order.
+MENU_IMPORT_COLUMNS = ('Category', 'Name', 'Description', 'Price', 'Food Type')
+MENU_IMPORT_FORMATS = ('.xlsx', '.csv')
+FOOD_TYPES = {'veg': 'Veg', 'non-veg': 'Non-Veg', 'nonveg': 'Non-Veg', 'non veg': 'Non-Veg'}
+
+# Per-row errors listed in the summary; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+
+class MenuImportError(ValueError):
+    """ The upload as a whole cannot be read (wrong type, unreadable file). """
+
+
+def read_rows(fileobj, filename):
+    """
+    Returns an iterator of (row_number, values) for every data row of an .xlsx
+    or .csv upload, skipping the header. Rows are streamed, never loaded as a
+    whole sheet. Raises MenuImportError for unsupported or unreadable files.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in MENU_IMPORT_FORMATS:
+        raise MenuImportError("Invalid file type. Please upload a .xlsx or .csv file.")
+    if extension == '.csv':
+        return _csv_rows(fileobj)
+    try:
+        # read_only streams rows from the sheet XML instead of building every cell.
+        workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception:
+        raise MenuImportError("The file is not a valid .xlsx workbook.")
+    return _xlsx_rows(workbook)
+
+
+def _xlsx_rows(workbook):
+    try:
+        yield from enumerate(workbook.active.iter_rows(min_row=2, values_only=True), 2)
+    except Exception as e:
+        # read_only parses the sheet lazily, so a damaged archive or sheet
+        # XML only surfaces part-way through the rows.
+        raise MenuImportError(f"The workbook could not be read past this point: {e}") from e
+    finally:
+        workbook.close()
+
+
+def _csv_rows(fileobj):
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        for row_number, values in enumerate(csv.reader(text), 1):
+            if row_number > 1:
+                yield row_number, values
+    except UnicodeDecodeError:
+        raise MenuImportError("The CSV file must be UTF-8 encoded.")
+    except csv.Error as e:
+        raise MenuImportError(f"The CSV file could not be read past this point: {e}") from e
+    finally:
+        text.detach()
+
+
+def _text(value):
+    return str(value).strip() if value is not None else ''
+
+
+def parse_row(values):
+    """
+    Validates one template row. Returns a dict of the item fields, None for
+    blank rows, or raises ValueError with a message for the owner.
+    """
+    category, name, description, price, food_type = (list(values) + [None] * 5)[:5]
+    category, name, description = _text(category), _text(name), _text(description)
+    if not category and not name and _text(price) == '':
+        return None
+    if not category:
+        raise ValueError("Category is required.")
+    if not name:
+        raise ValueError("Name is required.")
+    if len(category) > Category.name.type.length:
+        raise ValueError(f"Category must be at most {Category.name.type.length} characters.")
+    if len(name) > MenuItem.name.type.length:
+        raise ValueError(f"Name must be at most {MenuItem.name.type.length} characters.")
+    try:
+        price = float(_text(price))
+    except ValueError:
+        raise ValueError(f"Price '{_text(price)}' is not a number.")
+    if not price >= 0:
+        raise ValueError("Price must not be negative.")
+    return {
+        'category': category,
+        'name': name,
+        'description': description,
+        'price': price,
+        'food_type': FOOD_TYPES.get(_text(food_type).lower()),
+    }
+
+
+class MenuImport:
+    """
+    Bulk-inserts parsed rows for one restaurant. Categories are loaded once
+    and created in bulk as they first appear; items go in with one executemany
+    INSERT and one commit per chunk, so a failing chunk only loses its own rows.
+    """
+
+    def __init__(self, restaurant_id, session=None, chunk_size=None):
+        self.restaurant_id = restaurant_id
+        self.session = session or db.session
+        self.chunk_size = chunk_size or current_app.config['MENU_IMPORT_CHUNK_SIZE']
+        self.categories = dict(self.session.execute(
+            select(Category.name, Category.id).where(Category.restaurant_id == restaurant_id)
+        ).all())
+        self.rows = 0
+        self.imported = 0
+        self.categories_created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def error(self, row_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'message': message})
+
+    def _create_categories(self, names):
+        self.session.execute(insert(Category), [
+            {'name': name, 'restaurant_id': self.restaurant_id} for name in names
+        ])
+        self.categories.update(self.session.execute(
+            select(Category.name, Category.id)
+            .where(Category.restaurant_id == self.restaurant_id, Category.name.in_(names))
+        ).all())
+
+    def _flush(self, chunk):
+        new_categories = sorted({item['category'] for _, item in chunk} - self.categories.keys())
+        try:
+            if new_categories:
+                self._create_categories(new_categories)
+            self.session.execute(insert(MenuItem), [{
+                'name': item['name'],
+                'description': item['description'],
+                'price': item['price'],
+                'food_type': item['food_type'],
+                'is_available': True,
+                'category_id': self.categories[item['category']],
+                'restaurant_id': self.restaurant_id,
+            } for _, item in chunk])
+            self.session.commit()
+        except Exception as e:
+            self.session.rollback()
+            for name in new_categories:
+                self.categories.pop(name, None)
+            print(f"Error saving menu import rows {chunk[0][0]}-{chunk[-1][0]}: {e}")
+            for row_number, _ in chunk:
+                self.error(row_number, "Could not be saved.")
+            return
+        self.imported += len(chunk)
+        self.categories_created += len(new_categories)
+
+    def run(self, rows):
+        """
+        Imports (row_number, values) pairs and returns the summary. A file that
+        turns unreadable part-way keeps the chunks already committed.
+        """
+        chunk = []
+        try:
+            for row_number, values in rows:
+                try:
+                    item = parse_row(values)
+                except ValueError as e:
+                    self.rows += 1
+                    self.error(row_number, str(e))
+                    continue
+                if item is None:
+                    continue
+                self.rows += 1
+                chunk.append((row_number, item))
+                if len(chunk) >= self.chunk_size:
+                    self._flush(chunk)
+                    chunk = []
+        except MenuImportError as e:
+            self.error(None, str(e))
+        if chunk:
+            self._flush(chunk)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'rows': self.rows,
+            'imported': self.imported,
+            'skipped': self.rows - self.imported,
+            'categoriesCreated': self.categories_created,
+            'errorCount': self.error_count,
+            'errors': self.errors,
+        }
+
+
+# --- Benchmark ---
+
+def benchmark_import(row_count, categories=25, chunk_size=1000, seed=1):
+    """
+    Writes a synthetic .xlsx of `row_count` menu rows and imports it into an
+    in-memory SQLite database. Returns (write_seconds, import_seconds, summary).
+    """
+    import random
+    import tempfile
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from .models import Restaurant
+
+    rng = random.Random(seed)
+    with tempfile.NamedTemporaryFile(suffix='.xlsx') as spool:
+        started = time.perf_counter()
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet('Menu')
+        sheet.append(MENU_IMPORT_COLUMNS)
+        for number in range(row_count):
+            sheet.append((
+                f"Category {number % categories}",
+                f"Dish {number}",
+                "Synthetic benchmark item",
+                round(rng.uniform(50, 500), 2),
+                rng.choice(('Veg', 'Non-Veg')),
+            ))
+        workbook.save(spool.name)
+        write_seconds = time.perf_counter() - started
+
+        engine = create_engine('sqlite://')
+        db.metadata.create_all(engine)
+        with Session(engine) as session:
+            restaurant_id = session.execute(insert(Restaurant).values(
+                owner_id=1, name='Benchmark', address='-', city='-'
+            )).inserted_primary_key[0]
+            session.commit()
+            started = time.perf_counter()
+            with open(spool.name, 'rb') as fileobj:
+                summary = MenuImport(restaurant_id, session=session, chunk_size=chunk_size)\
+                    .run(read_rows(fileobj, spool.name))
+            import_seconds = time.perf_counter() - started
+        engine.dispose()
+    return write_seconds, import_seconds, summary
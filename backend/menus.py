@@ -0,0 +1,143 @@
+import threading
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session, joinedload
+from .cache import LRUCache
+from .models import db, Restaurant, Category
+
+# Columns that make up the public restaurant document's version. The menu
+# version covers menu/profile edits; the rating columns cover reviews.
+STATE_COLUMNS = (
+    Restaurant.menu_version,
+    Restaurant.rating_sum,
+    Restaurant.rating_count,
+)
+
+_caches_lock = threading.Lock()
+
+
+def _caches():
+    """ Returns (state_cache, document_cache) for the current app, creating them on first use. """
+    caches = current_app.extensions.get('menu_caches')
+    if caches is None:
+        with _caches_lock:
+            caches = current_app.extensions.get('menu_caches')
+            if caches is None:
+                size = current_app.config['MENU_CACHE_SIZE']
+                caches = (
+                    LRUCache(size, ttl=current_app.config['MENU_VERSION_TTL']),
+                    LRUCache(size),
+                )
+                current_app.extensions['menu_caches'] = caches
+    return caches
+
+
+def bump_menu_version(restaurant_id):
+    """
+    Invalidates every cached menu document of a restaurant. Runs in the
+    caller's transaction; this process's version cache is dropped on commit.
+    """
+    Restaurant.query.filter_by(id=restaurant_id).update(
+        {Restaurant.menu_version: Restaurant.menu_version + 1}, synchronize_session=False
+    )
+    db.session.info.setdefault('bumped_menus', set()).add(restaurant_id)
+
+
+def _document_state(restaurant_id):
+    """
+    Returns the restaurant's (menu_version, rating_sum, rating_count), or None
+    if it does not exist. Cached for MENU_VERSION_TTL seconds, which bounds how
+    long another worker's edits can take to show up here.
+    """
+    state_cache, _ = _caches()
+    state = state_cache.get(restaurant_id)
+    if state is None:
+        state = db.session.query(*STATE_COLUMNS).filter(Restaurant.id == restaurant_id).first()
+        if state is None:
+            return None
+        state = tuple(state)
+        state_cache.set(restaurant_id, state)
+    return state
+
+
+def _item_image(item, size):
+    return item.image_url or f'https://placehold.co/{size}/E65100/FFF?text={item.name.replace(" ", "+")}'
+
+
+def _serialize_categories(categories, image_size):
+    return [{
+        'id': cat.id,
+        'name': cat.name,
+        'menu_items': [{
+            'id': item.id,
+            'name': item.name,
+            'description': item.description,
+            'price': item.price,
+            'is_available': item.is_available,
+            'image': _item_image(item, image_size)
+        } for item in cat.menu_items]
+    } for cat in categories]
+
+
+def public_menu_document(restaurant_id):
+    """
+    Returns (etag, json_body) of the public restaurant document, or None if the
+    restaurant does not exist. A warm hit costs no queries.
+    """
+    state = _document_state(restaurant_id)
+    if state is None:
+        return None
+
+    _, document_cache = _caches()
+    key = ('public', restaurant_id) + state
+    cached = document_cache.get(key)
+    if cached is not None:
+        return cached
+
+    restaurant = Restaurant.query.options(
+        joinedload(Restaurant.categories).joinedload(Category.menu_items)
+    ).get(restaurant_id)
+    if restaurant is None:
+        return None
+
+    restaurant_data = {
+        'id': restaurant.id, 'name': restaurant.name, 'description': restaurant.description, 'address': restaurant.address, 'city': restaurant.city, 'cuisine': 'Local Favorites',
+        'rating': restaurant.average_rating,
+        'reviews': restaurant.rating_count,
+        'ratingHistogram': restaurant.rating_histogram,
+        'categories': _serialize_categories(restaurant.categories, '600x400')
+    }
+    cached = ('menu-{}-{}-{}-{}'.format(restaurant_id, *state), current_app.json.dumps(restaurant_data))
+    document_cache.set(key, cached)
+    return cached
+
+
+def owner_menu_document(restaurant):
+    """ Returns (etag, json_body) of the owner's menu management view. """
+    _, document_cache = _caches()
+    key = ('owner', restaurant.id, restaurant.menu_version)
+    cached = document_cache.get(key)
+    if cached is not None:
+        return cached
+
+    categories = Category.query.options(joinedload(Category.menu_items)).filter_by(restaurant_id=restaurant.id).all()
+    cached = (
+        f'owner-menu-{restaurant.id}-{restaurant.menu_version}',
+        current_app.json.dumps(_serialize_categories(categories, '100x100'))
+    )
+    document_cache.set(key, cached)
+    return cached
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_bumped_versions(session):
+    bumped = session.info.pop('bumped_menus', None)
+    if bumped:
+        state_cache, _ = _caches()
+        for restaurant_id in bumped:
+            state_cache.pop(restaurant_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_bumped_versions(session):
+    session.info.pop('bumped_menus', None)
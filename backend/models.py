@@ -3,9 +3,19 @@ from flask_security import UserMixin, RoleMixin
 from datetime import datetime
 from .extensions import db 
 
+# Statuses after which an order leaves the owner's live queue.
+FINAL_ORDER_STATUSES = ('completed', 'cancelled', 'rejected', 'refunded')
+
+# Predicate of the partial index behind the live order queue. Queries must use
+# this exact clause (with literal values) for the planner to pick the index.
+ACTIVE_ORDER_CLAUSE = "status NOT IN ('completed', 'cancelled', 'rejected', 'refunded')"
+
 # Association table for the many-to-many relationship between Users and Roles
 class RolesUsers(db.Model):
     __tablename__ = 'roles_users'
+    __table_args__ = (
+        db.Index('ix_roles_users_user_id', 'user_id'),
+    )
     id = db.Column(db.Integer(), primary_key=True)
     user_id = db.Column('user_id', db.Integer(), db.ForeignKey('user.id'))
     role_id = db.Column('role_id', db.Integer(), db.ForeignKey('role.id'))
@@ -33,6 +43,10 @@ class User(db.Model, UserMixin):
     favorites = db.relationship('Restaurant', secondary='favorite', backref='favorited_by', lazy='dynamic')
     
 class Restaurant(db.Model):
+    __table_args__ = (
+        db.Index('ix_restaurant_owner_id', 'owner_id'),
+        db.Index('ix_restaurant_verified_active', 'is_verified', 'is_active'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
@@ -49,6 +63,22 @@ class Restaurant(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     gallery = db.Column(db.JSON, nullable=True)
 
+    # Denormalized review aggregates, maintained by backend/ratings.py
+    rating_sum = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_1 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_2 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_3 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_4 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    rating_5 = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+    # Monotonic counter bumped on every order mutation (see backend/orders.py)
+    order_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bumped on every menu or profile edit; keys the cached menu documents (backend/menus.py)
+    menu_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Scheduled orders accepted per time slot; None means no limit (backend/slots.py)
+    slot_capacity = db.Column(db.Integer, nullable=True)
+
 
 
     owner = db.relationship('User', backref='restaurants_owned')
@@ -58,15 +88,52 @@ class Restaurant(db.Model):
     reviews = db.relationship('Review', backref='restaurant', lazy=True, cascade="all, delete-orphan")
     time_slots = db.relationship('TimeSlot', backref='restaurant', lazy=True, cascade="all, delete-orphan")
 
+    @property
+    def average_rating(self):
+        """ Average review rating, rounded for display. """
+        if not self.rating_count:
+            return 0.0
+        return round(self.rating_sum / self.rating_count, 1)
+
+    @property
+    def rating_histogram(self):
+        """ Number of reviews per star value, keyed 1 to 5. """
+        return {
+            1: self.rating_1, 2: self.rating_2, 3: self.rating_3,
+            4: self.rating_4, 5: self.rating_5
+        }
+
+# Admin-facing restaurant statuses, as produced by restaurant_status_expression.
+RESTAURANT_STATUSES = ('Verified', 'Pending', 'Blocked')
+
+def restaurant_status_expression(owner):
+    """
+    SQL CASE giving a restaurant's admin status from its row and its joined
+    owner (User or an alias of it): 'Verified' once approved with an active
+    owner, 'Blocked' while the owner is deactivated, otherwise 'Pending'.
+    """
+    return db.case(
+        (db.and_(Restaurant.is_verified == True, owner.active == True), 'Verified'),
+        (db.and_(owner.id.isnot(None), db.or_(owner.active.is_(None), owner.active == False)), 'Blocked'),
+        else_='Pending'
+    )
+
 
 # ... (The rest of your models.py file remains unchanged) ...
 class Category(db.Model):
+    __table_args__ = (
+        db.Index('ix_category_restaurant_id', 'restaurant_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), nullable=False)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), nullable=False)
     menu_items = db.relationship('MenuItem', backref='category', lazy=True)
 
 class MenuItem(db.Model):
+    __table_args__ = (
+        db.Index('ix_menu_item_restaurant_category', 'restaurant_id', 'category_id'),
+        db.Index('ix_menu_item_category_id', 'category_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
@@ -79,6 +146,22 @@ class MenuItem(db.Model):
 
 
 class Order(db.Model):
+    __table_args__ = (
+        db.Index('ix_order_restaurant_status_created', 'restaurant_id', 'status', 'created_at'),
+        db.Index('ix_order_restaurant_created', 'restaurant_id', 'created_at'),
+        db.Index('ix_order_user_created', 'user_id', 'created_at'),
+        db.Index('ix_order_created_at', 'created_at'),
+        db.Index('ix_order_restaurant_change', 'restaurant_id', 'change_version'),
+        db.Index('ix_order_restaurant_release', 'restaurant_id', 'release_at'),
+        db.Index('ix_order_release_at', 'release_at'),
+        db.Index('ix_order_restaurant_scheduled', 'restaurant_id', 'scheduled_time'),
+        # Partial index covering only the orders still in the owner's live queue.
+        db.Index(
+            'ix_order_active_queue', 'restaurant_id', 'created_at',
+            sqlite_where=db.text(ACTIVE_ORDER_CLAUSE),
+            postgresql_where=db.text(ACTIVE_ORDER_CLAUSE)
+        ),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), nullable=False)
@@ -91,13 +174,21 @@ class Order(db.Model):
     is_scheduled = db.Column(db.Boolean, default=False)
 
     scheduled_time = db.Column(db.DateTime, nullable=True)
+    # Set while a scheduled order is held out of the live queue; cleared when it is released
+    release_at = db.Column(db.DateTime, nullable=True)
     coupon_code = db.Column(db.String(50), nullable=True)
     discount_amount = db.Column(db.Float, default=0.0)
+    # Restaurant.order_version at this order's last mutation
+    change_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     review = db.relationship('Review', backref='order', uselist=False, cascade="all, delete-orphan")
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade="all, delete-orphan")
 
 class OrderItem(db.Model):
+    __table_args__ = (
+        db.Index('ix_order_item_order_id', 'order_id'),
+        db.Index('ix_order_item_menu_item_id', 'menu_item_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
     menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_item.id'), nullable=False)
@@ -106,6 +197,10 @@ class OrderItem(db.Model):
     menu_item = db.relationship('MenuItem')
 
 class Review(db.Model):
+    __table_args__ = (
+        db.Index('ix_review_restaurant_created', 'restaurant_id', 'created_at'),
+        db.Index('ix_review_created_at', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), nullable=False)
@@ -116,11 +211,17 @@ class Review(db.Model):
     
 class Favorite(db.Model):
     __tablename__ = 'favorite'
+    __table_args__ = (
+        db.Index('ix_favorite_user_id', 'user_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), nullable=False)
 
 class RewardPoint(db.Model):
+    __table_args__ = (
+        db.Index('ix_reward_point_user_created', 'user_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=True)
@@ -130,6 +231,9 @@ class RewardPoint(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class Coupon(db.Model):
+    __table_args__ = (
+        db.Index('ix_coupon_restaurant_id', 'restaurant_id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), nullable=True)
     code = db.Column(db.String(50), unique=True, nullable=False)
@@ -140,8 +244,101 @@ class Coupon(db.Model):
 
 # ✅ ADDED: New TimeSlot model
 class TimeSlot(db.Model):
+    __table_args__ = (
+        db.Index('ix_time_slot_restaurant_day', 'restaurant_id', 'day_of_week'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), nullable=False)
     day_of_week = db.Column(db.String(10), nullable=False) # e.g., "Monday", "Tuesday"
     start_time = db.Column(db.Time, nullable=False)
-    end_time = db.Column(db.Time, nullable=False)
\ No newline at end of file
+    end_time = db.Column(db.Time, nullable=False)
+
+class GeocodeCache(db.Model):
+    """ Cached geocoding results keyed by a hash of the normalized address. """
+    __tablename__ = 'geocode_cache'
+    __table_args__ = (
+        db.Index('ix_geocode_cache_last_used_at', 'last_used_at'),
+    )
+    address_hash = db.Column(db.String(64), primary_key=True)
+    address = db.Column(db.Text, nullable=False)
+    # Both coordinates are NULL when the provider found no match
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+class RestaurantDailyStats(db.Model):
+    """
+    Per-restaurant, per-day order rollup (days are the orders' created_at
+    dates). Maintained incrementally by backend/stats.py as orders change
+    status; `flask rebuild-daily-stats` recomputes it from the orders table.
+    """
+    __tablename__ = 'restaurant_daily_stats'
+    __table_args__ = (
+        db.Index('ix_restaurant_daily_stats_day', 'day'),
+    )
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    # Every order placed that day, whatever its status now
+    orders_placed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    placed_amount = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    # Orders currently in each final status
+    orders_completed = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    orders_cancelled = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    orders_rejected = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    orders_refunded = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Totals over the completed orders
+    revenue = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    discount_total = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+    items_sold = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    refunded_amount = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+
+class MenuItemDailyStats(db.Model):
+    """ Per-menu-item, per-day count of order lines, for the popular items lists. """
+    __tablename__ = 'menu_item_daily_stats'
+    __table_args__ = (
+        db.Index('ix_menu_item_daily_stats_restaurant_day', 'restaurant_id', 'day'),
+    )
+    menu_item_id = db.Column(db.Integer, db.ForeignKey('menu_item.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    restaurant_id = db.Column(db.Integer, db.ForeignKey('restaurant.id'), nullable=False)
+    order_lines = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    quantity = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+
+class ExportJob(db.Model):
+    """ An admin export running in the background, and the spooled file it produced. """
+    __tablename__ = 'export_job'
+    __table_args__ = (
+        db.Index('ix_export_job_status', 'status'),
+        db.Index('ix_export_job_expires_at', 'expires_at'),
+    )
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False) # 'orders', 'users' or 'restaurants'
+    format = db.Column(db.String(10), nullable=False)
+    # queued -> running -> completed | failed; completed -> expired once the file is removed
+    status = db.Column(db.String(20), nullable=False, default='queued')
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    rows_written = db.Column(db.Integer, nullable=False, default=0)
+    total_rows = db.Column(db.Integer, nullable=True)
+    file_path = db.Column(db.String(500), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+    # export_jobs.SERVER_ID of the server run that queued the job
+    server_id = db.Column(db.String(100), nullable=True)
+
+class ScheduledTask(db.Model):
+    """ A delayed job, run by backend/scheduler.py once due_at has passed. """
+    __tablename__ = 'scheduled_task'
+    __table_args__ = (
+        db.Index('ix_scheduled_task_due_at', 'due_at'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False) # a handler registered with @task_handler
+    target_id = db.Column(db.Integer, nullable=True) # e.g. the order id
+    payload = db.Column(db.JSON, nullable=True)
+    due_at = db.Column(db.DateTime, nullable=False)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
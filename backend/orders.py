@@ -0,0 +1,80 @@
+from sqlalchemy import update
+from .models import db, MenuItem, Order, OrderItem, Restaurant
+from .scheduler import task_handler
+
+
+class CartError(Exception):
+    """ Raised when a cart line cannot be turned into an order item. """
+    def __init__(self, message, menu_item_id=None):
+        super().__init__(message)
+        self.message = message
+        self.menu_item_id = menu_item_id
+
+
+def validate_cart(restaurant_id, cart_items):
+    """
+    Validates and prices a cart in a single round trip.
+
+    Every referenced menu item is fetched with one IN query, so the number of
+    queries stays constant no matter how many lines the cart has.
+    Returns a tuple of (order_items, subtotal).
+    """
+    if not cart_items:
+        raise CartError("Cannot place an empty order.")
+
+    lines = []
+    for item_data in cart_items:
+        menu_item_id = item_data.get('menu_item_id')
+        try:
+            menu_item_id = int(menu_item_id)
+        except (TypeError, ValueError):
+            raise CartError("An item in your cart is invalid or unavailable.", menu_item_id)
+        try:
+            quantity = int(item_data.get('quantity'))
+        except (TypeError, ValueError):
+            raise CartError("Invalid quantity in cart.")
+        if quantity <= 0:
+            raise CartError("Invalid quantity in cart.")
+        lines.append((menu_item_id, quantity))
+
+    requested_ids = {menu_item_id for menu_item_id, _ in lines}
+    menu_items = MenuItem.query.filter(MenuItem.id.in_(requested_ids)).all()
+    items_by_id = {item.id: item for item in menu_items}
+
+    order_items = []
+    for menu_item_id, quantity in lines:
+        menu_item = items_by_id.get(menu_item_id)
+        if not menu_item or not menu_item.is_available or menu_item.restaurant_id != restaurant_id:
+            raise CartError("An item in your cart is invalid or unavailable.", menu_item_id)
+        order_items.append(OrderItem(
+            menu_item_id=menu_item.id,
+            quantity=quantity,
+            price_at_order=menu_item.price
+        ))
+
+    subtotal = sum(item.price_at_order * item.quantity for item in order_items)
+    return order_items, subtotal
+
+
+def bump_order_version(order):
+    """
+    Increments the restaurant's order version and stamps it on the order.
+    Call before committing any order mutation. The UPDATE holds the restaurant
+    row lock until commit, so versions become visible in increasing order and
+    a client polling with a `since` cursor never skips a change.
+    """
+    version = db.session.execute(
+        update(Restaurant)
+        .where(Restaurant.id == order.restaurant_id)
+        .values(order_version=Restaurant.order_version + 1)
+        .returning(Restaurant.order_version)
+    ).scalar()
+    order.change_version = version
+    return version
+
+
+@task_handler('clear_otp')
+def clear_otps(tasks):
+    """ Clears the pickup OTP of completed orders, all of a batch in one UPDATE. """
+    order_ids = [task.target_id for task in tasks]
+    db.session.execute(update(Order).where(Order.id.in_(order_ids)).values(otp=None))
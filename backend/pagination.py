@@ -0,0 +1,113 @@
+import base64
+import json
+from datetime import datetime
+from flask import current_app, request, jsonify
+from sqlalchemy import and_, or_
+
+
+class CursorError(ValueError):
+    """ Raised when a client sends a cursor that cannot be decoded. """
+
+
+class Page:
+    """ One page of keyset-paginated results. """
+
+    def __init__(self, items, next_cursor, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.total = total
+
+    @property
+    def has_more(self):
+        return self.next_cursor is not None
+
+
+def encode_cursor(values):
+    """ Packs the sort-key values of the last row into an opaque, URL-safe token. """
+    packed = [{'dt': v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(packed, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, expected_length):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        packed = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [datetime.fromisoformat(v['dt']) if isinstance(v, dict) else v for v in packed]
+    except (ValueError, TypeError, KeyError, UnicodeError):
+        raise CursorError("Invalid cursor.")
+    if len(values) != expected_length:
+        raise CursorError("Invalid cursor.")
+    return values
+
+
+def _after(columns, values, descending):
+    """ Builds `(c1, c2, ...) > (v1, v2, ...)` (or < when descending) in expanded form. """
+    clauses = []
+    for i, (column, value) in enumerate(zip(columns, values)):
+        comparison = column < value if descending else column > value
+        equal_prefix = [c == v for c, v in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal_prefix, comparison))
+    return or_(*clauses)
+
+
+def keyset_page(query, columns, key, cursor=None, limit=50, descending=True, with_total=False):
+    """
+    Returns one Page of `query` ordered by `columns`, which must form a unique
+    sort key (e.g. (Order.created_at, Order.id)). `key(row)` extracts those
+    values from a result row. Seeking past the cursor uses the index on the
+    sort key, so every page costs the same no matter how deep it is. A limit
+    of None returns every remaining row as one page.
+    """
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        query = query.filter(_after(columns, decode_cursor(cursor, len(columns)), descending))
+    ordering = [c.desc() if descending else c.asc() for c in columns]
+    query = query.order_by(*ordering)
+    rows = query.all() if limit is None else query.limit(limit + 1).all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(key(rows[-1]))
+    return Page(rows, next_cursor, total)
+
+
+def page_args():
+    """
+    Reads cursor/limit/with_total from the query string. Returns
+    (cursor, limit, with_total, envelope); `envelope` is True when the client
+    asked for paging explicitly and therefore understands the envelope format.
+    Older clients render whatever list they get, so their limit is None:
+    cutting the list short would silently hide rows from their pages.
+    """
+    envelope = 'cursor' in request.args or 'limit' in request.args
+    with_total = request.args.get('with_total', '').lower() in ('1', 'true')
+    if not envelope:
+        return None, None, with_total, False
+    max_size = current_app.config['PAGINATION_MAX_PAGE_SIZE']
+    limit = request.args.get('limit', current_app.config['PAGINATION_DEFAULT_PAGE_SIZE'], type=int)
+    limit = min(max(limit, 1), max_size)
+    return request.args.get('cursor') or None, limit, with_total, True
+
+
+def page_response(page, items_data, envelope, extra=None):
+    """
+    Paginated list response. Clients that sent cursor/limit get
+    {items, nextCursor, hasMore, total} plus any `extra` keys; older clients
+    keep receiving the complete list, bare, with the total in X-Total-Count.
+    """
+    if envelope:
+        body = {'items': items_data, 'nextCursor': page.next_cursor, 'hasMore': page.has_more}
+        if page.total is not None:
+            body['total'] = page.total
+        body.update(extra or {})
+        return jsonify(body)
+
+    response = jsonify(items_data)
+    if page.next_cursor:
+        response.headers['X-Next-Cursor'] = page.next_cursor
+    if page.total is not None:
+        response.headers['X-Total-Count'] = str(page.total)
+    return response
@@ -0,0 +1,161 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+import bcrypt
+from flask import current_app
+from flask_security.utils import get_hmac, verify_password as verify_legacy_password
+
+# bcrypt only reads the first 72 bytes of a secret; the 88-byte HMAC that
+# Flask-Security feeds it is cut here so bcrypt 5 does not reject it.
+BCRYPT_MAX_BYTES = 72
+BCRYPT_PREFIXES = ('$2a$', '$2b$', '$2y$')
+
+
+class PasswordBusy(Exception):
+    """ Raised when PASSWORD_MAX_PENDING hash operations are already queued or running. """
+
+
+# --- Worker side (runs in the process pool) ---
+
+def _hash(secret, rounds):
+    return bcrypt.hashpw(secret[:BCRYPT_MAX_BYTES], bcrypt.gensalt(rounds)).decode('ascii')
+
+
+def _verify(secret, stored, rounds):
+    """ (matches, new hash if it matched but was made with a different cost, else None). """
+    if not bcrypt.checkpw(secret[:BCRYPT_MAX_BYTES], stored.encode('ascii')):
+        return False, None
+    return True, (_hash(secret, rounds) if bcrypt_rounds(stored) != rounds else None)
+
+
+def bcrypt_rounds(stored):
+    """ The cost factor of a '$2b$12$...' hash. """
+    return int(stored.split('$')[2])
+
+
+# --- Request side ---
+
+_executor_lock = threading.Lock()
+
+
+def _executor():
+    """
+    Returns the app's hashing pool, created on first use. A separate pool
+    keeps bursts of logins from occupying every request worker's CPU, and
+    the pending limit turns overload into an immediate 503.
+    """
+    executor = current_app.extensions.get('password_executor')
+    if executor is None:
+        with _executor_lock:
+            executor = current_app.extensions.get('password_executor')
+            if executor is None:
+                executor = ProcessPoolExecutor(max_workers=current_app.config['PASSWORD_HASH_WORKERS'])
+                current_app.extensions['password_executor'] = executor
+                current_app.extensions['password_slots'] = threading.BoundedSemaphore(
+                    current_app.config['PASSWORD_MAX_PENDING']
+                )
+    return executor
+
+
+def _run(fn, *args):
+    executor = _executor()
+    slots = current_app.extensions['password_slots']
+    if not slots.acquire(blocking=False):
+        raise PasswordBusy()
+    try:
+        future = executor.submit(fn, *args)
+        try:
+            return future.result(timeout=current_app.config['PASSWORD_HASH_TIMEOUT'])
+        except BrokenProcessPool:
+            with _executor_lock:
+                if current_app.extensions.get('password_executor') is executor:
+                    current_app.extensions.pop('password_executor')
+            executor.shutdown(wait=False)
+            raise
+        except FutureTimeout:
+            future.cancel()
+            raise
+    finally:
+        slots.release()
+
+
+def _secret(password):
+    # Flask-Security's double hash for bcrypt: HMAC-SHA512 with the password salt.
+    return get_hmac(password)
+
+
+def hash_password(password):
+    """ A bcrypt hash of `password` that Flask-Security's verify_password also accepts. Raises PasswordBusy. """
+    return _run(_hash, _secret(password), current_app.config['PASSWORD_BCRYPT_ROUNDS'])
+
+
+def check_password(user, password):
+    """
+    Verifies `password` against `user.password`. On success, a hash made with
+    another cost factor, or with a legacy scheme (plaintext rows created before
+    registration hashed passwords), is replaced on `user`; the caller commits.
+    Raises PasswordBusy.
+    """
+    stored = user.password or ''
+    rounds = current_app.config['PASSWORD_BCRYPT_ROUNDS']
+    if stored.startswith(BCRYPT_PREFIXES):
+        matches, new_hash = _run(_verify, _secret(password), stored, rounds)
+    else:
+        # Legacy schemes are cheap to check; only the upgrade needs the pool.
+        try:
+            matches = verify_legacy_password(password, stored)
+        except ValueError:
+            matches = False
+        new_hash = hash_password(password) if matches else None
+    if new_hash:
+        user.password = new_hash
+    return matches
+
+
+# --- Benchmark ---
+
+def benchmark_logins(concurrency, count, password='benchmark-password'):
+    """
+    Verifies one password `count` times from `concurrency` threads, directly
+    on the calling threads ('inline') and through the pool. Needs an app
+    context. Returns {name: (logins_per_second, p50_ms, p95_ms, rejected)}.
+    """
+    from types import SimpleNamespace
+    from concurrent.futures import ThreadPoolExecutor
+
+    app = current_app._get_current_object()
+    rounds = app.config['PASSWORD_BCRYPT_ROUNDS']
+    secret = _secret(password)
+    stored = _hash(secret, rounds)
+
+    def inline():
+        return bcrypt.checkpw(secret[:BCRYPT_MAX_BYTES], stored.encode('ascii'))
+
+    def pooled():
+        with app.app_context():
+            return check_password(SimpleNamespace(password=stored), password)
+
+    hash_password(password)  # start the pool's processes before timing
+    results = {}
+    for name, login in (('inline', inline), ('pool', pooled)):
+        latencies, rejected = [], [0]
+
+        def timed(_):
+            started = time.perf_counter()
+            try:
+                login()
+            except PasswordBusy:
+                rejected[0] += 1
+                return
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as threads:
+            list(threads.map(timed, range(count)))
+        elapsed = time.perf_counter() - started
+        latencies.sort()
+        p50 = latencies[len(latencies) // 2] if latencies else 0
+        p95 = latencies[int(len(latencies) * 0.95)] if latencies else 0
+        results[name] = (len(latencies) / elapsed, p50, p95, rejected[0])
+    return results
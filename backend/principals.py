@@ -0,0 +1,216 @@
+import threading
+import time
+from flask import current_app, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload, object_session
+from flask_security.utils import get_request_attr, set_request_attr
+from .cache import LRUCache
+from .events import get_broker, get_hub
+from .models import db, User, Role, RolesUsers
+
+# Event broker channel on which each process announces the principals it invalidated.
+PRINCIPALS_CHANNEL = 'principals'
+
+
+class PrincipalCache:
+    """
+    Token -> (user id, fs_uniquifier) and user id -> detached User with its
+    roles loaded. A warm request is authenticated without queries: the cached
+    User is merged into the request's session with load=False, so it behaves
+    like a freshly loaded one (lazy relationships, tracked changes).
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.tokens = LRUCache(maxsize, ttl=ttl)
+        self.users = LRUCache(maxsize, ttl=ttl)
+        self.listening = False
+        self._listen_lock = threading.Lock()
+
+    def listen(self):
+        """ Starts applying invalidations broadcast by other processes; called before anything is cached. """
+        with self._listen_lock:
+            if not self.listening:
+                get_hub().add_listener(PRINCIPALS_CHANNEL, lambda event: self.invalidate(event['user_ids']))
+                self.listening = True
+
+    def _snapshot(self, user_id):
+        user = self.users.get(user_id)
+        if user is None:
+            # A separate session, so the cached objects never belong to a request's session.
+            with Session(db.engine) as session:
+                user = session.get(User, user_id, options=[selectinload(User.roles)])
+                if user is None:
+                    return None
+                session.expunge_all()
+            self.users.set(user_id, user)
+        return user
+
+    def lookup(self, token):
+        """ The request-bound User for a token seen before, or None to take the slow path. """
+        entry = self.tokens.get(token)
+        if entry is None:
+            return None
+        user_id, uniquifier = entry
+        user = self._snapshot(user_id)
+        if user is None or not user.active or user.fs_uniquifier != uniquifier:
+            self.tokens.pop(token)
+            return None
+        return db.session.merge(user, load=False)
+
+    def remember(self, token, user):
+        self.tokens.set(token, (user.id, user.fs_uniquifier))
+
+    def invalidate(self, user_ids=None):
+        """ Drops the given users (tokens re-check against the reloaded user), or everything. """
+        if user_ids is None:
+            self.tokens.clear()
+            self.users.clear()
+            return
+        for user_id in user_ids:
+            self.users.pop(user_id)
+
+
+def _request_token(request):
+    config = current_app.config
+    header = config.get('SECURITY_TOKEN_AUTHENTICATION_HEADER', 'Authentication-Token')
+    key = config.get('SECURITY_TOKEN_AUTHENTICATION_KEY', 'auth_token')
+    return request.args.get(key, request.headers.get(header))
+
+
+def init_principal_cache(app):
+    """
+    Puts the principal cache in front of Flask-Security's token loader. A
+    token is verified by Flask-Security the first time it is seen; for
+    PRINCIPAL_CACHE_TTL seconds after that, its user and roles come from
+    memory. Changes to users and role memberships committed in this process
+    take effect immediately, and in other processes as soon as the event
+    broker delivers the invalidation; the TTL only matters if that is lost.
+    """
+    login_manager = app.login_manager
+    load_from_token = login_manager._request_callback
+    cache = PrincipalCache(app.config['PRINCIPAL_CACHE_SIZE'], app.config['PRINCIPAL_CACHE_TTL'])
+    app.extensions['principal_cache'] = cache
+    app.extensions['principal_loader'] = load_from_token
+
+    @login_manager.request_loader
+    def cached_request_loader(req):
+        token = _request_token(req)
+        # Without a header/query token, or once this request is authenticated
+        # (Flask-Security then returns the user Flask-Login stored), defer to it.
+        if not token or get_request_attr('fs_authn_via') == 'token':
+            return load_from_token(req)
+        if not cache.listening:
+            cache.listen()
+        user = cache.lookup(token)
+        if user is not None:
+            set_request_attr('fs_authn_via', 'token')
+            return user
+        user = load_from_token(req)
+        if user is not None and getattr(user, 'is_authenticated', False):
+            cache.remember(token, user)
+        return user
+
+    return cache
+
+
+def invalidate_principal(user_id):
+    """ Drops a user's cached principal once the current transaction commits, for core-statement changes. """
+    _mark_stale(db.session, user_id)
+
+
+# --- Invalidation ---
+# Updating or deleting a user (blocking, unblocking, password or uniquifier
+# changes, and role changes through User.roles, which mark the user dirty)
+# and writing roles_users rows mark the user stale; a renamed or deleted role
+# marks everyone. The cache drops them after commit, so a rolled-back change
+# never evicts anything, and broadcasts them on PRINCIPALS_CHANNEL for the
+# other workers. In session.info and in the event, None means "all users".
+
+def _mark_stale(session, user_id):
+    if session is None:
+        return
+    stale = session.info.setdefault('stale_principals', set())
+    if stale is not None:
+        stale.add(user_id)
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    _mark_stale(object_session(target), target.id)
+
+
+@event.listens_for(RolesUsers, 'after_insert')
+@event.listens_for(RolesUsers, 'after_update')
+@event.listens_for(RolesUsers, 'after_delete')
+def _membership_changed(mapper, connection, target):
+    _mark_stale(object_session(target), target.user_id)
+
+
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def _role_changed(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info['stale_principals'] = None
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_stale_principals(session):
+    if 'stale_principals' not in session.info:
+        return
+    stale = session.info.pop('stale_principals')
+    cache = current_app.extensions.get('principal_cache') if has_app_context() else None
+    if cache is None:
+        return
+    cache.invalidate(stale)
+    user_ids = sorted(stale) if stale is not None else None
+    try:
+        get_broker().publish(PRINCIPALS_CHANNEL, {'type': 'principals_invalidated', 'user_ids': user_ids})
+    except Exception as e:
+        # Other workers still expire the entries after PRINCIPAL_CACHE_TTL.
+        print(f"Error broadcasting principal invalidation: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_stale_principals(session):
+    session.info.pop('stale_principals', None)
+
+
+# --- Benchmark ---
+
+def benchmark_auth(app, user, requests=500):
+    """
+    Times token authentication plus the role check `roles_required` performs,
+    for `requests` simulated requests through Flask-Security's loader and
+    through the cache. Returns {name: (microseconds per request, queries per request)}.
+    """
+    token = user.get_auth_token()
+    header = app.config['SECURITY_TOKEN_AUTHENTICATION_HEADER']
+    cache = app.extensions['principal_cache']
+    loaders = {
+        'flask-security': app.extensions['principal_loader'],
+        'principal cache': app.login_manager._request_callback,
+    }
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    results = {}
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        for name, loader in loaders.items():
+            cache.invalidate()
+            queries[0] = 0
+            started = time.perf_counter()
+            for _ in range(requests):
+                with app.test_request_context(headers={header: token}):
+                    principal = loader(request)
+                    [role.name for role in principal.roles]
+                    db.session.remove()
+            elapsed = time.perf_counter() - started
+            results[name] = (elapsed / requests * 1e6, queries[0] / requests)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    return results
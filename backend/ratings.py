@@ -0,0 +1,55 @@
+from sqlalchemy import func
+from .models import db, Restaurant, Review
+
+# Star value -> histogram column on Restaurant
+RATING_COLUMNS = {
+    1: Restaurant.rating_1,
+    2: Restaurant.rating_2,
+    3: Restaurant.rating_3,
+    4: Restaurant.rating_4,
+    5: Restaurant.rating_5,
+}
+
+
+def apply_rating(restaurant_id, rating, delta=1):
+    """
+    Adds (delta=1) or removes (delta=-1) one review's rating from the
+    restaurant's aggregates. The update is a single atomic UPDATE issued in
+    the caller's transaction, so it commits or rolls back with the review.
+    """
+    values = {
+        Restaurant.rating_sum: Restaurant.rating_sum + delta * rating,
+        Restaurant.rating_count: Restaurant.rating_count + delta,
+    }
+    column = RATING_COLUMNS.get(rating)
+    if column is not None:
+        values[column] = column + delta
+    Restaurant.query.filter_by(id=restaurant_id).update(values, synchronize_session=False)
+
+
+def rebuild_rating_aggregates():
+    """ Recomputes every restaurant's rating aggregates from the Review table. """
+    rows = db.session.query(
+        Review.restaurant_id,
+        Review.rating,
+        func.count(Review.id)
+    ).group_by(Review.restaurant_id, Review.rating).all()
+
+    totals = {}
+    for restaurant_id, rating, count in rows:
+        values = totals.setdefault(restaurant_id, {'rating_sum': 0, 'rating_count': 0})
+        values['rating_sum'] += rating * count
+        values['rating_count'] += count
+        column = RATING_COLUMNS.get(rating)
+        if column is not None:
+            values[column.key] = values.get(column.key, 0) + count
+
+    reset = {'rating_sum': 0, 'rating_count': 0}
+    reset.update({column.key: 0 for column in RATING_COLUMNS.values()})
+    Restaurant.query.update(reset, synchronize_session=False)
+
+    for restaurant_id, values in totals.items():
+        Restaurant.query.filter_by(id=restaurant_id).update(values, synchronize_session=False)
+
+    db.session.commit()
+    return len(totals)
@@ -1,8 +1,10 @@
 import random
 import string
-from flask_restful import Resource, reqparse, fields, marshal_with
+from flask_restful import Resource, reqparse, fields, marshal, marshal_with
 from flask_security import auth_required, current_user
 from .models import db, User, Restaurant, MenuItem, Category, Order, OrderItem, Coupon
+from .orders import validate_cart, CartError
+from .pagination import keyset_page, page_args, page_response, CursorError
 from datetime import datetime
 
 # ... (user_fields, menu_item_fields, etc. are unchanged) ...
@@ -75,11 +77,16 @@ order_parser.add_argument('scheduled_time', type=str, location='json')
 
 class RestaurantListAPI(Resource):
     @auth_required('token')
-    @marshal_with(restaurant_list_fields)
     def get(self):
-        """ Returns a list of all verified and active restaurants """
-        restaurants = Restaurant.query.filter_by(is_verified=True, is_active=True).all()
-        return restaurants
+        """ Returns a page of verified and active restaurants """
+        query = Restaurant.query.filter_by(is_verified=True, is_active=True)
+        try:
+            cursor, limit, with_total, envelope = page_args()
+            page = keyset_page(query, (Restaurant.id,), lambda r: (r.id,), cursor=cursor,
+                               limit=limit, descending=False, with_total=with_total)
+        except CursorError as e:
+            return {'message': str(e)}, 400
+        return page_response(page, marshal(page.items, restaurant_list_fields), envelope)
 
 class RestaurantAPI(Resource):
     @auth_required('token')
@@ -104,26 +111,16 @@ class OrderAPI(Resource):
         
         restaurant = Restaurant.query.get_or_404(args['restaurant_id'])
         
-        total_amount = 0
-        order_items_to_create = []
-
-        for item_data in args['items']:
-            menu_item = MenuItem.query.get(item_data['menu_item_id'])
-            if not menu_item or not menu_item.is_available or menu_item.restaurant_id != restaurant.id:
-                return {'message': f"Menu item with id {item_data['menu_item_id']} is invalid or unavailable"}, 400
-            
-            quantity = item_data['quantity']
-            total_amount += menu_item.price * quantity
-            
-            order_items_to_create.append(OrderItem(
-                menu_item_id=menu_item.id,
-                quantity=quantity,
-                price_at_order=menu_item.price
-            ))
-
-        if not order_items_to_create:
+        if not args['items']:
             return {'message': 'Order must contain at least one item'}, 400
 
+        try:
+            order_items_to_create, total_amount = validate_cart(restaurant.id, args['items'])
+        except CartError as e:
+            if e.menu_item_id is not None:
+                return {'message': f"Menu item with id {e.menu_item_id} is invalid or unavailable"}, 400
+            return {'message': e.message}, 400
+
         # --- ✅ START: MODIFIED LOGIC FOR COUPONS AND SCHEDULING ---
         final_amount = total_amount
         discount_amount = 0
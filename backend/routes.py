@@ -1,21 +1,41 @@
-from flask import current_app as app, jsonify, request, render_template, send_file
+from flask import current_app as app, jsonify, request, send_file
 from .extensions import api 
-from flask_security import auth_required, roles_required, current_user,verify_password
+from flask_security import auth_required, roles_required, current_user
 from werkzeug.security import check_password_hash
-import io
-import openpyxl
+import click
 import math
-import requests
-import time
-import threading
-from PIL import Image
-import uuid
 import os
 
 from .models import db, User, Role, Restaurant ,RolesUsers,Order,OrderItem,MenuItem,Review,Category,RewardPoint,Coupon,TimeSlot
+from .models import ExportJob, RestaurantDailyStats, ACTIVE_ORDER_CLAUSE, FINAL_ORDER_STATUSES
+from .models import RESTAURANT_STATUSES, restaurant_status_expression
 from .security import user_datastore
 from .resources import RestaurantListAPI, RestaurantAPI, OrderAPI
-from sqlalchemy import func,Date, or_
+from .orders import validate_cart, CartError, bump_order_version
+from .ratings import apply_rating, rebuild_rating_aggregates, RATING_COLUMNS
+from .geo import find_nearby
+from .geocoding import geocode, GeocodingError
+from .events import publish_order_event, event_stream, restaurant_channel, order_channel
+from .menus import bump_menu_version, public_menu_document, owner_menu_document
+from .cache import cached_json_response
+from .pagination import keyset_page, page_args, page_response, CursorError
+from .exports import export_response, ExportError, EXPORT_FORMATS, benchmark_exports
+from .export_jobs import enqueue_export, expire_export_jobs, serialize_job, ExportBusy
+from .dashboard import admin_dashboard_snapshot, invalidate_admin_dashboard
+from .admin_search import search_matches, order_id_term, rebuild_search_index
+from .catalog_search import search_catalog, autocomplete, benchmark_index, touch_restaurant
+from .menu_import import MenuImport, MenuImportError, read_rows, benchmark_import
+from .images import store_image, upload_dir, ImageError, ImageBusy, IMAGE_EXTENSIONS, benchmark_uploads
+from .static_assets import index_response
+from .compression import precompress_directory, available_encodings, benchmark_compression
+from .principals import benchmark_auth
+from .passwords import hash_password, check_password, PasswordBusy, benchmark_logins
+from concurrent.futures import TimeoutError as FutureTimeout
+from .scheduler import schedule_task, run_due_tasks, get_scheduler
+from .dispatch import hold_scheduled_order, release_orders, utc_naive
+from .slots import slot_calendar, claim_slot, release_slot, invalidate_slot_calendar, SlotError, SlotFull
+from .stats import record_order_transition, rebuild_daily_stats, date_range_args, restaurant_stats_query, daily_series, popular_items
+from sqlalchemy import func,Date, or_, select
 from datetime import datetime, date,timedelta
 
 from sqlalchemy.orm import joinedload
@@ -40,10 +60,14 @@ def login():
 
     user = user_datastore.find_user(email=data.get('email'))
 
-    # 👇 THIS IS THE CRITICAL CHANGE 👇
-    # Use verify_password instead of check_password_hash
-    if not user or not verify_password(data.get('password'), user.password):
-        return jsonify({"message": "Invalid credentials"}), 401
+    # bcrypt runs in the password pool; a hash made with an outdated cost is replaced.
+    try:
+        if not user or not check_password(user, data.get('password')):
+            return jsonify({"message": "Invalid credentials"}), 401
+    except (PasswordBusy, FutureTimeout):
+        return busy_response()
+    if db.session.is_modified(user):
+        db.session.commit()
     
     # User is authenticated
     return jsonify({
@@ -55,17 +79,30 @@ def login():
     }), 200
 
 
+def busy_response():
+    """ Fast reject while the password pool is saturated or a hash timed out; clients retry shortly. """
+    response = jsonify({"message": "The server is busy. Please try again in a moment."})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
+
 @app.route('/api/register', methods=['POST'])
 def register_customer():
     data = request.get_json()
+    if not data or not data.get('email') or not data.get('password'):
+        return jsonify({"message": "Email and password are required"}), 400
     email = data.get('email')
     if user_datastore.find_user(email=email):
         return jsonify({"message": "User already exists"}), 409
     
     # 👇 HASH THE PASSWORD ON REGISTRATION 👇
+    try:
+        password = hash_password(data.get('password'))
+    except (PasswordBusy, FutureTimeout):
+        return busy_response()
     user_datastore.create_user(
         email=email,
-        password=(data.get('password')), # Use the imported hash_password
+        password=password,
         name=data.get('name'),
         roles=['customer']
     )
@@ -79,13 +116,14 @@ def register_customer():
 @app.route('/api/restaurant/register', methods=['POST'])
 def register_restaurant():
     data = request.get_json()
-    # ... (initial validation remains the same)
+    if not data or not data.get('ownerEmail') or not data.get('password'):
+        return jsonify({"message": "Owner email and password are required"}), 400
     
     # --- Add latitude and longitude to the new restaurant object ---
     try:
         owner = user_datastore.create_user(
             email=data.get('ownerEmail'),
-            password=data.get('password'),
+            password=hash_password(data.get('password')),
             name=data.get('ownerName'),
             roles=['owner']
         )
@@ -101,62 +139,84 @@ def register_restaurant():
             is_verified=False
         )
         db.session.add(new_restaurant)
+        invalidate_admin_dashboard()
         db.session.commit()
         return jsonify({"message": "Restaurant submitted for verification!"}), 201
+    except (PasswordBusy, FutureTimeout):
+        db.session.rollback()
+        return busy_response()
     except Exception as e:
         db.session.rollback()
         return jsonify({"message": "An internal error occurred."}), 500
     
 
+# Keyset sort keys for the admin restaurant list; each ends with the unique id.
+RESTAURANT_SORT_COLUMNS = {
+    'id': lambda status: (Restaurant.id,),
+    'name': lambda status: (Restaurant.name, Restaurant.id),
+    'status': lambda status: (status, Restaurant.id),
+}
+
 @app.route('/api/admin/restaurants', methods=['GET'])
 @auth_required('token')
 @roles_required('admin')
 def get_all_restaurants():
-    """ Fetches all restaurants for the admin panel, with optional filtering. """
+    """
+    Fetches restaurants for the admin panel. Status is computed in SQL, so
+    ?status= filtering, ?sort=id|name|status and the per-status counts are
+    all done by the database, one page at a time.
+    """
     try:
+        status = restaurant_status_expression(User).label('status')
         # Start with a base query
-        query = db.session.query(Restaurant).options(joinedload(Restaurant.owner)).join(User, Restaurant.owner_id == User.id)
+        query = db.session.query(Restaurant.id, Restaurant.name, Restaurant.city, User.email, status)\
+            .join(User, Restaurant.owner_id == User.id)
 
         # Get filter parameters from the request URL
         search_term = request.args.get('search', None)
         status_filter = request.args.get('status', None)
+        sort = request.args.get('sort', 'id')
+        if sort not in RESTAURANT_SORT_COLUMNS:
+            return jsonify({"message": f"Invalid sort '{sort}'."}), 400
 
-        # Apply search filter if provided
+        # Apply search filter if provided (name, city or owner email, via the search index)
+        matches = None
         if search_term:
-            search_like = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    Restaurant.name.ilike(search_like),
-                    Restaurant.city.ilike(search_like),
-                    User.email.ilike(search_like) # Assumes you're searching by owner email
-                )
-            )
+            matches = search_matches('restaurants', search_term)
+            query = query.join(matches, matches.c.id == Restaurant.id).add_columns(matches.c.rank)
 
-        restaurants = query.all() # Execute the query
-        
-        # This part remains the same: determine status string based on flags
-        restaurants_data = []
-        for resto in restaurants:
-            status = "Pending"
-            if resto.is_verified and resto.owner and resto.owner.active:
-                status = "Verified"
-            elif resto.owner and not resto.owner.active:
-                status = "Blocked"
-            
-            # This is server-side filtering for status, after getting all results
-            # This is less efficient, but simpler than complex DB queries for status
-            if status_filter and status_filter != 'All' and status != status_filter:
-                continue
-
-            restaurants_data.append({
-                'id': resto.id,
-                'name': resto.name,
-                'ownerEmail': resto.owner.email if resto.owner else 'Owner Deleted',
-                'city': resto.city,
-                'status': status
-            })
+        cursor, limit, with_total, envelope = page_args()
+
+        # Counts per status for the current search, before the status filter
+        extra = None
+        if envelope:
+            counts = dict(query.with_entities(status, func.count(Restaurant.id)).group_by(status).all())
+            extra = {'statusCounts': {name: counts.get(name, 0) for name in RESTAURANT_STATUSES}}
+
+        if status_filter and status_filter != 'All':
+            if status_filter not in RESTAURANT_STATUSES:
+                return jsonify({"message": f"Invalid status '{status_filter}'."}), 400
+            query = query.filter(status == status_filter)
+
+        if matches is not None and 'sort' not in request.args:
+            # Search results come best match first unless a sort was requested
+            sort_columns = (matches.c.rank, Restaurant.id)
+        else:
+            sort_columns = RESTAURANT_SORT_COLUMNS[sort](status)
+        page = keyset_page(query, sort_columns, lambda row: tuple(getattr(row, c.key) for c in sort_columns),
+                           cursor=cursor, limit=limit, descending=False, with_total=with_total)
+
+        restaurants_data = [{
+            'id': row.id,
+            'name': row.name,
+            'ownerEmail': row.email,
+            'city': row.city,
+            'status': row.status
+        } for row in page.items]
         
-        return jsonify(restaurants_data), 200
+        return page_response(page, restaurants_data, envelope, extra), 200
+    except CursorError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error fetching all restaurants: {e}")
         return jsonify({"message": "An error occurred on the server."}), 500
@@ -176,43 +236,13 @@ def get_all_restaurants():
 @auth_required('token')
 @roles_required('admin')
 def admin_dashboard_stats():
-    """ Gathers and returns all key metrics for the admin dashboard. """
+    """
+    Gathers and returns all key metrics for the admin dashboard. Served from a
+    snapshot that is at most ADMIN_DASHBOARD_TTL seconds old; ?refresh=1 rebuilds it.
+    """
     try:
-        # Calculate total revenue from completed orders
-        total_revenue = db.session.query(func.sum(Order.total_amount)).filter(Order.status == 'completed').scalar() or 0
-
-        # Get total counts
-        total_orders = db.session.query(func.count(Order.id)).scalar() or 0
-
-        # --- MODIFIED QUERY FOR CUSTOMERS ---
-        # This explicit join is more robust than the previous implicit one.
-        total_customers = db.session.query(func.count(User.id)).join(RolesUsers, RolesUsers.user_id == User.id).join(Role, RolesUsers.role_id == Role.id).filter(Role.name == 'customer').scalar() or 0
-        
-        total_restaurants = db.session.query(func.count(Restaurant.id)).scalar() or 0
-
-        # Eagerly load the 'owner' relationship to prevent extra queries and handle potential errors.
-        pending_restaurants = Restaurant.query.options(joinedload(Restaurant.owner)).filter_by(is_verified=False).all()
-        
-        # Format the pending restaurants data, now with a safety check.
-        pending_restaurants_data = [{
-            'id': resto.id,
-            'name': resto.name,
-            # This check prevents a server crash if a restaurant has no owner.
-            'ownerEmail': resto.owner.email if resto.owner else 'Owner Not Found',
-            'city': resto.city
-        } for resto in pending_restaurants]
-
-        stats = {
-            'totalRevenue': round(total_revenue, 2),
-            'totalOrders': total_orders,
-            'totalCustomers': total_customers,
-            'totalRestaurants': total_restaurants
-        }
-        
-        return jsonify({
-            'stats': stats,
-            'pendingRestaurants': pending_restaurants_data
-        }), 200
+        refresh = request.args.get('refresh', '').lower() in ('1', 'true')
+        return jsonify(admin_dashboard_snapshot(refresh=refresh)), 200
 
     except Exception as e:
         print(f"Error fetching admin dashboard data: {e}")
@@ -230,6 +260,7 @@ def verify_restaurant(id):
     """ Approves a restaurant by setting its is_verified flag to True. """
     restaurant = Restaurant.query.get_or_404(id)
     restaurant.is_verified = True
+    invalidate_admin_dashboard()
     db.session.commit()
     return jsonify({"message": f"'{restaurant.name}' has been verified."}), 200
 
@@ -261,6 +292,7 @@ def unblock_restaurant(id):
 def delete_restaurant(id):
     restaurant = Restaurant.query.get_or_404(id)
     db.session.delete(restaurant)
+    invalidate_admin_dashboard()
     db.session.commit()
     return jsonify({"message": f"'{restaurant.name}' has been permanently deleted."}), 200
 
@@ -275,27 +307,35 @@ def admin_get_all_orders():
         query = Order.query.options(
             joinedload(Order.customer),
             joinedload(Order.restaurant)
-        ).join(User, Order.user_id == User.id).join(Restaurant, Order.restaurant_id == Restaurant.id)
+        )
 
         search_term = request.args.get('search', None)
         status_filter = request.args.get('status', 'All')
 
         if search_term:
-            search_like = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    # Search by Order ID (requires casting to string)
-                    Order.id.cast(db.String).ilike(search_like),
-                    User.name.ilike(search_like),
-                    Restaurant.name.ilike(search_like)
+            order_id = order_id_term(search_term)
+            if order_id is not None:
+                # A number is an order id: go straight to the primary key
+                query = query.filter(Order.id == order_id)
+            else:
+                # Otherwise match customers and restaurants through the search index
+                users = search_matches('users', search_term)
+                restaurants = search_matches('restaurants', search_term)
+                query = query.filter(
+                    or_(
+                        Order.user_id.in_(select(users.c.id)),
+                        Order.restaurant_id.in_(select(restaurants.c.id))
+                    )
                 )
-            )
         
         if status_filter and status_filter != 'All':
             # Note: status is stored in lowercase in the db
             query = query.filter(Order.status == status_filter.lower())
 
-        orders = query.order_by(Order.created_at.desc()).all()
+        cursor, limit, with_total, envelope = page_args()
+        page = keyset_page(query, (Order.created_at, Order.id), lambda o: (o.created_at, o.id),
+                           cursor=cursor, limit=limit, with_total=with_total)
+        orders = page.items
 
         orders_data = [{
             'id': order.id,
@@ -306,7 +346,9 @@ def admin_get_all_orders():
             'status': order.status.capitalize()
         } for order in orders]
         
-        return jsonify(orders_data), 200
+        return page_response(page, orders_data, envelope), 200
+    except CursorError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error fetching all orders: {e}")
         return jsonify({"message": "An error occurred on the server."}), 500
@@ -330,19 +372,29 @@ def admin_refund_order(order_id):
     print(f"Admin initiated refund for Order #{order.id} amounting to ${order.total_amount}")
     
     # Update the order status
+    old_status = order.status
     order.status = 'refunded'
+    record_order_transition(order, old_status)
+    bump_order_version(order)
+    release_slot(order)
+    invalidate_admin_dashboard()
     db.session.commit()
+    publish_order_event(order, 'order_refunded')
     
     return jsonify({"message": f"Refund for Order #{order.id} has been successfully processed."}), 200
 @app.route('/api/admin/reviews', methods=['GET'])
 @auth_required('token')
 @roles_required('admin')
 def admin_get_all_reviews():
-    """ Fetches all reviews from all restaurants for the admin panel. """
-    reviews = Review.query.options(
+    """ Fetches all reviews from all restaurants for the admin panel, newest first. """
+    query = Review.query.options(
         joinedload(Review.customer),
         joinedload(Review.restaurant)
-    ).order_by(Review.created_at.desc()).all()
+    )
+    cursor, limit, with_total, envelope = page_args()
+    page = keyset_page(query, (Review.created_at, Review.id), lambda r: (r.created_at, r.id),
+                       cursor=cursor, limit=limit, with_total=with_total)
+    reviews = page.items
 
     reviews_data = [{
         'id': review.id,
@@ -353,7 +405,7 @@ def admin_get_all_reviews():
         'date': review.created_at.strftime('%b %d, %Y')
     } for review in reviews]
     
-    return jsonify(reviews_data), 200
+    return page_response(page, reviews_data, envelope), 200
 
 @app.route('/api/admin/reviews/<int:review_id>', methods=['DELETE'])
 @auth_required('token')
@@ -361,6 +413,8 @@ def admin_get_all_reviews():
 def admin_delete_review(review_id):
     """ Permanently deletes a review. """
     review = Review.query.get_or_404(review_id)
+    # The aggregate update and the delete share one transaction.
+    apply_rating(review.restaurant_id, review.rating, delta=-1)
     db.session.delete(review)
     db.session.commit()
     return jsonify({"message": f"Review #{review.id} has been permanently deleted."}), 200
@@ -425,45 +479,37 @@ from datetime import date, timedelta, datetime # <-- Make sure datetime is impor
 @auth_required('token')
 @roles_required('admin')
 def get_admin_reports():
-    """ Gathers and returns platform-wide analytics for the admin reports page. """
-    
-    # --- Daily Revenue (Last 7 Days) ---
-    seven_days_ago = datetime.now() - timedelta(days=7)
-    
-    # 1. Fetch all completed orders from the last 7 days.
-    # We filter using a full datetime object, which is very reliable.
-    recent_orders = db.session.query(Order.created_at, Order.total_amount).filter(
-        Order.status == 'completed',
-        Order.created_at >= seven_days_ago
-    ).all()
-
-    # 2. Use a Python dictionary to aggregate revenue by day.
-    revenue_by_date = {}
-    for i in range(7):
-        current_date = date.today() - timedelta(days=i)
-        revenue_by_date[current_date] = 0.0
-
-    for order_time, revenue in recent_orders:
-        order_date = order_time.date() # Extract just the date part from the datetime object
-        if order_date in revenue_by_date:
-            revenue_by_date[order_date] += revenue
-
-    # 3. Format the data for the frontend.
-    daily_revenue_data = []
-    for d, r in sorted(revenue_by_date.items()):
-        daily_revenue_data.append({
-            'day': d.strftime('%b %d'),
-            'revenue': round(float(r), 2)
-        })
-
-    # --- Top Performing Restaurants (This part is correct) ---
-    top_restaurants_query = db.session.query(
+    """
+    Gathers and returns platform-wide analytics for the admin reports page.
+    Reads the daily rollups; ?start=&end= (YYYY-MM-DD) narrow the range, which
+    defaults to the last 7 days for the revenue chart and all time for the ranking.
+    """
+    try:
+        series_start, series_end = date_range_args(default_days=7)
+        start, end = date_range_args()
+    except ValueError:
+        return jsonify({"message": "Invalid date range. Use start/end as YYYY-MM-DD."}), 400
+
+    # --- Daily Revenue ---
+    revenue_rows = restaurant_stats_query(
+        RestaurantDailyStats.day, func.sum(RestaurantDailyStats.revenue),
+        start=series_start, end=series_end
+    ).group_by(RestaurantDailyStats.day).all()
+
+    daily_revenue_data = [{
+        'day': d.strftime('%b %d'),
+        'revenue': round(float(r), 2)
+    } for d, r in daily_series(revenue_rows, series_start, series_end)]
+
+    # --- Top Performing Restaurants ---
+    top_restaurants_query = restaurant_stats_query(
         Restaurant.name,
-        func.sum(Order.total_amount).label('total_revenue')
-    ).join(Order, Restaurant.id == Order.restaurant_id)\
-    .filter(Order.status == 'completed')\
-    .group_by(Restaurant.name)\
-    .order_by(func.sum(Order.total_amount).desc()).limit(5).all()
+        func.sum(RestaurantDailyStats.revenue).label('total_revenue'),
+        start=start, end=end
+    ).join(Restaurant, Restaurant.id == RestaurantDailyStats.restaurant_id)\
+    .filter(RestaurantDailyStats.orders_completed > 0)\
+    .group_by(Restaurant.id, Restaurant.name)\
+    .order_by(func.sum(RestaurantDailyStats.revenue).desc()).limit(5).all()
 
     top_restaurants_data = [{
         'rank': index + 1,
@@ -502,16 +548,18 @@ def get_all_users():
 
         # Get search parameter from the request URL
         search_term = request.args.get('search', None)
-        if search_term:
-            search_like = f"%{search_term}%"
-            query = query.filter(
-                or_(
-                    User.name.ilike(search_like),
-                    User.email.ilike(search_like)
-                )
-            )
+        cursor, limit, with_total, envelope = page_args()
 
-        users = query.all()
+        if search_term:
+            # Best matches first, from the search index
+            matches = search_matches('users', search_term)
+            query = query.join(matches, matches.c.id == User.id).add_columns(matches.c.rank)
+            page = keyset_page(query, (matches.c.rank, User.id), lambda row: (row.rank, row[0].id), cursor=cursor,
+                               limit=limit, descending=False, with_total=with_total)
+        else:
+            page = keyset_page(query, (User.id,), lambda row: (row[0].id,), cursor=cursor,
+                               limit=limit, descending=False, with_total=with_total)
+        users = page.items
 
         users_data = [{
             'id': user.id,
@@ -520,9 +568,11 @@ def get_all_users():
             'totalOrders': total_orders,
             'totalSpent': round(float(total_spent), 2),
             'isBlocked': not user.active
-        } for user, total_orders, total_spent in users]
+        } for user, total_orders, total_spent, *_ in users]
 
-        return jsonify(users_data), 200
+        return page_response(page, users_data, envelope), 200
+    except CursorError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error fetching users: {e}")
         return jsonify({"message": "An error occurred on the server."}), 500
@@ -670,24 +720,11 @@ def place_order():
     restaurant = Restaurant.query.get_or_404(restaurant_id)
 
     # --- 1. Secure Server-Side Price Calculation ---
-    subtotal = 0
-    order_items_to_create = []
-    cart_items = data.get('items', [])
-    if not cart_items:
-        return jsonify({"message": "Cannot place an empty order."}), 400
-
-    for item_data in cart_items:
-        menu_item = MenuItem.query.get(item_data.get('menu_item_id'))
-        if not menu_item or not menu_item.is_available or menu_item.restaurant_id != restaurant.id:
-            return jsonify({'message': "An item in your cart is invalid or unavailable."}), 400
-        
-        quantity = item_data.get('quantity')
-        subtotal += menu_item.price * quantity
-        order_items_to_create.append(OrderItem(
-            menu_item_id=menu_item.id,
-            quantity=quantity,
-            price_at_order=menu_item.price
-        ))
+    # All cart lines are validated against a single IN query.
+    try:
+        order_items_to_create, subtotal = validate_cart(restaurant.id, data.get('items', []))
+    except CartError as e:
+        return jsonify({'message': e.message}), 400
 
     # --- 2. Secure Server-Side Coupon Validation ---
     final_total = subtotal
@@ -714,7 +751,7 @@ def place_order():
             # Correctly parse the ISO string from JavaScript's toISOString()
             if iso_string.endswith('Z'):
                 iso_string = iso_string[:-1] + "+00:00"
-            scheduled_time_obj = datetime.fromisoformat(iso_string)
+            scheduled_time_obj = utc_naive(datetime.fromisoformat(iso_string))
         except (ValueError, TypeError):
             return jsonify({"message": "Invalid format for scheduled time."}), 400
 
@@ -740,7 +777,19 @@ def place_order():
     )
 
     db.session.add(new_order)
+    # Orders scheduled for later wait in the upcoming view until their lead time.
+    held = hold_scheduled_order(new_order)
+    record_order_transition(new_order, None)
+    bump_order_version(new_order)
+    if scheduled_time_obj:
+        # Counted under the restaurant row lock taken by bump_order_version.
+        try:
+            claim_slot(restaurant, new_order)
+        except SlotError as e:
+            db.session.rollback()
+            return jsonify({'message': e.message}), 409 if isinstance(e, SlotFull) else 400
     db.session.commit()
+    publish_order_event(new_order, 'order_scheduled' if held else 'order_placed')
     
     return jsonify({'message': 'Order placed successfully!', 'order_id': new_order.id}), 201
 
@@ -827,11 +876,9 @@ def get_favorites():
     """ Fetches all favorite restaurants for the logged-in customer. """
     favorites_data = []
     for resto in current_user.favorites:
-        avg_rating = db.session.query(func.avg(Review.rating)).filter(Review.restaurant_id == resto.id).scalar() or 0.0
-        review_count = db.session.query(func.count(Review.id)).filter(Review.restaurant_id == resto.id).scalar() or 0
         favorites_data.append({
             'id': resto.id, 'name': resto.name, 'cuisine': 'Local Cuisine',
-            'rating': round(float(avg_rating), 1), 'reviews': review_count,
+            'rating': resto.average_rating, 'reviews': resto.rating_count,
             'image': f'https://placehold.co/600x400/E65100/FFF?text={resto.name.replace(" ", "+")}'
         })
     return jsonify(favorites_data), 200
@@ -859,12 +906,6 @@ def get_featured_restaurants():
     restaurants = Restaurant.query.filter_by(is_verified=True, is_active=True).limit(6).all()
     restaurants_data = []
     for resto in restaurants:
-        # Calculate stats
-        stats = db.session.query(
-            func.avg(Review.rating).label('avg_rating'),
-            func.count(Review.id).label('review_count')
-        ).filter(Review.restaurant_id == resto.id).first()
-        
         # ✅ START: LOGIC TO USE GALLERY IMAGE OR FALLBACK
         image_url = f'https://placehold.co/600x400/E65100/FFF?text={resto.name.replace(" ", "+")}'
         if resto.gallery and len(resto.gallery) > 0:
@@ -873,32 +914,49 @@ def get_featured_restaurants():
 
         restaurants_data.append({
             'id': resto.id, 'name': resto.name, 'cuisine': 'Local Favorites',
-            'rating': round(float(stats.avg_rating or 0), 1),
-            'reviews': stats.review_count or 0,
+            'rating': resto.average_rating,
+            'reviews': resto.rating_count,
             'image': image_url # Use the dynamic image_url
         })
     return jsonify(restaurants_data), 200
 
 
 
+@app.route('/api/search', methods=['GET'])
+def search_restaurants_and_dishes():
+    """
+    Searches verified restaurants and their dishes, tolerating typos.
+    Optional filters: ?city= and ?available=1 (only dishes currently available).
+    """
+    query = request.args.get('q', '').strip()
+    city = request.args.get('city') or None
+    available_only = request.args.get('available', '').lower() in ('1', 'true')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), 50)
+    if not query:
+        return jsonify({'restaurants': [], 'dishes': []}), 200
+
+    restaurants, dishes = search_catalog(query, city=city, available_only=available_only, limit=limit)
+    return jsonify({'restaurants': restaurants, 'dishes': dishes}), 200
+
+@app.route('/api/search/autocomplete', methods=['GET'])
+def search_autocomplete():
+    """ Restaurant and dish names completing what the customer has typed so far. """
+    query = request.args.get('q', '').strip()
+    if len(query) < 2:
+        return jsonify([]), 200
+    return jsonify(autocomplete(query, city=request.args.get('city') or None)), 200
+
+
 @app.route('/api/restaurants/<int:restaurant_id>', methods=['GET'])
 def get_restaurant_details(restaurant_id):
-    restaurant = Restaurant.query.options(joinedload(Restaurant.categories).joinedload(Category.menu_items)).get_or_404(restaurant_id)
-    
-    stats = db.session.query(
-        func.avg(Review.rating).label('avg_rating'),
-        func.count(Review.id).label('review_count')
-    ).filter(Review.restaurant_id == restaurant.id).first()
-
-    categories_data = [{'id': cat.id, 'name': cat.name, 'menu_items': [{'id': item.id, 'name': item.name, 'description': item.description, 'price': item.price, 'is_available': item.is_available, 'image': item.image_url or f'https://placehold.co/600x400/E65100/FFF?text={item.name.replace(" ", "+")}'} for item in cat.menu_items]} for cat in restaurant.categories]
-    
-    restaurant_data = {
-        'id': restaurant.id, 'name': restaurant.name, 'description': restaurant.description, 'address': restaurant.address, 'city': restaurant.city, 'cuisine': 'Local Favorites', 
-        'rating': round(float(stats.avg_rating or 0), 1),
-        'reviews': stats.review_count or 0,
-        'categories': categories_data
-    }
-    return jsonify(restaurant_data), 200
+    """
+    Returns the public restaurant document with its full menu. Documents are
+    cached per menu version and served with an ETag for conditional GETs.
+    """
+    document = public_menu_document(restaurant_id)
+    if document is None:
+        return jsonify({"message": "Restaurant not found."}), 404
+    return cached_json_response(*document)
 
 # In backend/routes.py
 
@@ -911,13 +969,15 @@ def get_order_history():
     """ Fetches the order history for the logged-in customer. """
     try:
         # We use joinedload for both restaurant and the new review relationship for efficiency
-        orders = Order.query.options(
+        query = Order.query.options(
                 joinedload(Order.restaurant),
                 joinedload(Order.review) # <-- Eagerly load the review
             )\
-            .filter_by(user_id=current_user.id)\
-            .order_by(Order.created_at.desc())\
-            .all()
+            .filter_by(user_id=current_user.id)
+        cursor, limit, with_total, envelope = page_args()
+        page = keyset_page(query, (Order.created_at, Order.id), lambda o: (o.created_at, o.id),
+                           cursor=cursor, limit=limit, with_total=with_total)
+        orders = page.items
 
         orders_data = [{
             'id': o.id,
@@ -929,7 +989,9 @@ def get_order_history():
             'has_review': bool(o.review) 
         } for o in orders]
         
-        return jsonify(orders_data), 200
+        return page_response(page, orders_data, envelope), 200
+    except CursorError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error fetching order history: {e}")
         return jsonify({"message": "An error occurred while fetching your orders."}), 500
@@ -942,9 +1004,20 @@ def get_order_history():
 @roles_required('customer')
 def get_rewards_data():
     total_points = db.session.query(func.sum(RewardPoint.points)).filter_by(user_id=current_user.id).scalar() or 0
-    history = RewardPoint.query.filter_by(user_id=current_user.id).order_by(RewardPoint.created_at.desc()).all()
-    history_data = [{'id': item.id, 'reason': item.reason, 'points': item.points, 'date': item.created_at.strftime('%b %d, %Y'), 'type': item.transaction_type} for item in history]
-    return jsonify({'points_balance': total_points, 'history': history_data}), 200
+    cursor, limit, with_total, _ = page_args()
+    page = keyset_page(RewardPoint.query.filter_by(user_id=current_user.id),
+                       (RewardPoint.created_at, RewardPoint.id), lambda p: (p.created_at, p.id),
+                       cursor=cursor, limit=limit, with_total=with_total)
+    history_data = [{'id': item.id, 'reason': item.reason, 'points': item.points, 'date': item.created_at.strftime('%b %d, %Y'), 'type': item.transaction_type} for item in page.items]
+    rewards_data = {
+        'points_balance': total_points,
+        'history': history_data,
+        'historyNextCursor': page.next_cursor,
+        'historyHasMore': page.has_more
+    }
+    if page.total is not None:
+        rewards_data['historyTotal'] = page.total
+    return jsonify(rewards_data), 200
 
 @app.route('/api/restaurant/dashboard', methods=['GET'])
 @auth_required('token')
@@ -959,23 +1032,29 @@ def restaurant_dashboard_stats():
     if not restaurant:
         return jsonify({"message": "No restaurant profile found for this account. Please contact support if you believe this is an error."}), 404
     
-    today = date.today()
+    # Stats cover today unless ?start=&end= (YYYY-MM-DD) are given; popular
+    # items cover all time unless a range is given.
+    try:
+        start, end = date_range_args(default_days=1)
+        items_start, items_end = date_range_args()
+    except ValueError:
+        return jsonify({"message": "Invalid date range. Use start/end as YYYY-MM-DD."}), 400
 
     # --- Calculate Stats ---
-    # Today's Revenue
-    todays_revenue = db.session.query(func.sum(Order.total_amount))\
-        .filter(Order.restaurant_id == restaurant.id, func.cast(Order.created_at, Date) == today).scalar() or 0.0
-
-    # Today's Orders
-    todays_orders = db.session.query(func.count(Order.id))\
-        .filter(Order.restaurant_id == restaurant.id, func.cast(Order.created_at, Date) == today).scalar() or 0
+    # Revenue and order count (orders placed in the range, from the daily rollup)
+    todays_revenue, todays_orders = restaurant_stats_query(
+        func.coalesce(func.sum(RestaurantDailyStats.placed_amount), 0.0),
+        func.coalesce(func.sum(RestaurantDailyStats.orders_placed), 0),
+        start=start, end=end
+    ).filter(RestaurantDailyStats.restaurant_id == restaurant.id).one()
         
     # Pending Orders (Placed or Preparing)
     pending_orders = db.session.query(func.count(Order.id))\
         .filter(Order.restaurant_id == restaurant.id, Order.status.in_(['placed', 'preparing'])).scalar() or 0
 
     # Recent Orders
-    recent_orders_query = Order.query.filter_by(restaurant_id=restaurant.id)\
+    recent_orders_query = Order.query.options(joinedload(Order.customer), joinedload(Order.items))\
+        .filter_by(restaurant_id=restaurant.id)\
         .order_by(Order.created_at.desc()).limit(5).all()
     
     recent_orders_data = [{
@@ -987,13 +1066,7 @@ def restaurant_dashboard_stats():
     } for order in recent_orders_query]
 
     # Most Popular Items
-    popular_items_query = db.session.query(
-            MenuItem.name,
-            func.count(OrderItem.id).label('order_count')
-        ).join(OrderItem, MenuItem.id == OrderItem.menu_item_id)\
-        .filter(MenuItem.restaurant_id == restaurant.id)\
-        .group_by(MenuItem.name)\
-        .order_by(func.count(OrderItem.id).desc()).limit(5).all()
+    popular_items_query = popular_items(restaurant.id, items_start, items_end)
 
     popular_items_data = [{'name': name, 'orders': count} for name, count in popular_items_query]
 
@@ -1017,46 +1090,130 @@ def restaurant_dashboard_stats():
 def get_restaurant_orders():
     """ 
     Fetches all active orders for the owner's restaurant.
-    Includes scheduled time for relevant orders.
+    Includes scheduled time for relevant orders. Scheduled orders still held
+    for later are left out; see get_upcoming_orders.
+
+    Supports cheap polling through the restaurant's order version:
+    - If-None-Match with the current ETag returns 304 Not Modified.
+    - ?since=<version> returns only the orders changed after that version,
+      plus the ids of orders that left the queue. since=0 (or a version the
+      server does not know) returns a full snapshot with 'full': true.
     """
     restaurant = Restaurant.query.filter_by(owner_id=current_user.id).first_or_404()
+    version = restaurant.order_version
+    etag = f'orders-{restaurant.id}-{version}'
+
+    # Weak comparison: compressed responses carry the ETag as W/"...".
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    since = request.args.get('since', type=int)
+    full_sync = since is None or since <= 0 or since > version
+
+    query = Order.query.options(
+        joinedload(Order.customer),
+        joinedload(Order.items).joinedload(OrderItem.menu_item)
+    ).filter(Order.restaurant_id == restaurant.id, Order.release_at == None)
+
+    removed = []
+    if full_sync:
+        # Fetches all non-finalized orders. The literal clause matches the
+        # predicate of the partial 'ix_order_active_queue' index.
+        orders = query.filter(db.text(ACTIVE_ORDER_CLAUSE)).order_by(Order.created_at.asc()).all()
+    else:
+        # Sorted here rather than in SQL, so the planner seeks the few changed
+        # rows through 'ix_order_restaurant_change' instead of walking the
+        # restaurant's whole history in created_at order.
+        changed = sorted(query.filter(Order.change_version > since).all(), key=lambda o: (o.created_at, o.id))
+        orders = [o for o in changed if o.status not in FINAL_ORDER_STATUSES]
+        removed = [o.id for o in changed if o.status in FINAL_ORDER_STATUSES]
+
+    orders_data = [serialize_queue_order(order) for order in orders]
+
+    if since is None:
+        # Legacy response shape: the full list of active orders
+        response = jsonify(orders_data)
+    else:
+        response = jsonify({
+            'version': version,
+            'full': full_sync,
+            'orders': orders_data,
+            'removed': removed
+        })
+    response.set_etag(etag)
+    response.headers['X-Order-Version'] = str(version)
+    return response, 200
+
+
+def serialize_queue_order(order):
+    """ Formats an order for the owner's live queue. """
+    items_data = [{'name': item.menu_item.name, 'quantity': item.quantity} for item in order.items]
     
-    # The query correctly fetches all non-finalized orders
-    orders = Order.query.filter(
-        Order.restaurant_id == restaurant.id,
-        Order.status.notin_(['completed', 'cancelled', 'rejected', 'refunded'])
-    ).order_by(Order.created_at.asc()).all()
+    # Convert UTC creation time to IST for display
+    ist_created_time = order.created_at + timedelta(hours=5, minutes=30)
 
-    orders_data = []
-    for order in orders:
-        items_data = [{'name': item.menu_item.name, 'quantity': item.quantity} for item in order.items]
-        
-        # Convert UTC creation time to IST for display
-        ist_created_time = order.created_at + timedelta(hours=5, minutes=30)
+    order_info = {
+        'id': order.id,
+        'customerName': order.customer.name,
+        'createdAt': ist_created_time.strftime('%I:%M %p'),
+        'status': order.status,
+        'order_type': order.order_type,
+        'items': items_data,
+        'is_scheduled': order.is_scheduled, # Pass the flag
+        'scheduled_date': None,
+        'scheduled_time': None
+    }
 
-        order_info = {
-            'id': order.id,
-            'customerName': order.customer.name,
-            'createdAt': ist_created_time.strftime('%I:%M %p'),
-            'status': order.status,
-            'order_type': order.order_type,
-            'items': items_data,
-            'is_scheduled': order.is_scheduled, # Pass the flag
-            'scheduled_date': None,
-            'scheduled_time': None
-        }
+    # If the order is scheduled, add the formatted IST time
+    if order.is_scheduled and order.scheduled_time:
+        ist_scheduled_time = order.scheduled_time + timedelta(hours=5, minutes=30)
+        order_info['scheduled_date'] = ist_scheduled_time.strftime('%b %d, %Y')
+        order_info['scheduled_time'] = ist_scheduled_time.strftime('%I:%M %p')
 
-        # If the order is scheduled, add the formatted IST time
-        if order.is_scheduled and order.scheduled_time:
-            ist_scheduled_time = order.scheduled_time + timedelta(hours=5, minutes=30)
-            order_info['scheduled_date'] = ist_scheduled_time.strftime('%b %d, %Y')
-            order_info['scheduled_time'] = ist_scheduled_time.strftime('%I:%M %p')
+    return order_info
 
-        orders_data.append(order_info)
-        
-    return jsonify(orders_data), 200
 
+@app.route('/api/restaurant/orders/upcoming', methods=['GET'])
+@auth_required('token')
+@roles_required('owner')
+def get_upcoming_orders():
+    """
+    Scheduled orders held out of the live queue, next release first. Each
+    moves to the live queue SCHEDULED_ORDER_LEAD_TIME before its scheduled
+    time, when the scheduler releases it.
+    """
+    restaurant = Restaurant.query.filter_by(owner_id=current_user.id).first_or_404()
+    orders = Order.query.options(
+        joinedload(Order.customer),
+        joinedload(Order.items).joinedload(OrderItem.menu_item)
+    ).filter(
+        Order.restaurant_id == restaurant.id,
+        Order.release_at != None,
+        Order.status.notin_(FINAL_ORDER_STATUSES)
+    ).order_by(Order.release_at.asc()).all()
 
+    upcoming = []
+    for order in orders:
+        order_info = serialize_queue_order(order)
+        ist_release_time = order.release_at + timedelta(hours=5, minutes=30)
+        order_info['releaseTime'] = ist_release_time.strftime('%b %d, %I:%M %p')
+        upcoming.append(order_info)
+    return jsonify(upcoming), 200
+
+
+@app.route('/api/restaurant/orders/stream', methods=['GET'])
+@auth_required('token')
+@roles_required('owner')
+def stream_restaurant_orders():
+    """
+    Server-Sent Events stream that notifies the owner's queue whenever one of
+    the restaurant's orders changes. EventSource cannot set headers, so the
+    token is passed as the 'auth_token' query parameter.
+    """
+    restaurant = Restaurant.query.filter_by(owner_id=current_user.id).first_or_404()
+    return event_stream(restaurant_channel(restaurant.id))
 
 @app.route('/api/restaurant/orders/<int:order_id>/status', methods=['PATCH'])
 @auth_required('token')
@@ -1077,8 +1234,14 @@ def update_order_status(order_id):
     if new_status not in allowed_statuses:
         return jsonify({"message": f"Invalid status '{new_status}'."}), 400
         
+    old_status = order.status
     order.status = new_status
+    record_order_transition(order, old_status)
+    bump_order_version(order)
+    if new_status == 'rejected':
+        release_slot(order)
     db.session.commit()
+    publish_order_event(order, 'order_updated')
     
     return jsonify({"message": f"Order #{order.id} has been updated to '{new_status}'."}), 200
 
@@ -1105,35 +1268,18 @@ def verify_order(order_id):
     # The core logic: compare OTPs
     if otp_submitted == order.otp:
         order.status = 'completed'
+        record_order_transition(order, 'ready')
+        bump_order_version(order)
+        invalidate_admin_dashboard()
+        # The OTP is cleared by the scheduler once OTP_CLEAR_DELAY has passed.
+        schedule_task('clear_otp', delay=app.config['OTP_CLEAR_DELAY'], target_id=order.id)
         db.session.commit()
-
-        # ✅ START: This is the new logic to trigger the background task
-        # We start a new thread to run our clearing function.
-        # This does NOT block the server from sending the response immediately.
-        thread = threading.Thread(
-            target=clear_otp_after_delay,
-            args=(app.app_context(), order.id)
-        )
-        thread.start()
-        # ✅ END: New logic
+        publish_order_event(order, 'order_completed')
 
         return jsonify({"message": f"Order #{order.id} verified and completed successfully!"}), 200
     else:
         return jsonify({"message": "Invalid OTP. Please try again."}), 400
 
-def clear_otp_after_delay(app_context, order_id):
-    """Waits for a delay and then clears the OTP for a given order."""
-    with app_context:
-        print(f"Starting background task to clear OTP for order {order_id} in 60 seconds.")
-        time.sleep(60) # Wait for 1 minute
-        try:
-            order = Order.query.get(order_id)
-            if order:
-                order.otp = None # Clear the OTP field
-                db.session.commit()
-                print(f"Successfully cleared OTP for order {order_id}.")
-        except Exception as e:
-            print(f"Error in background task for order {order_id}: {e}")
 # --- NEW: MENU MANAGEMENT ENDPOINTS ---
 
 @app.route('/api/restaurant/menu', methods=['GET'])
@@ -1142,22 +1288,7 @@ def clear_otp_after_delay(app_context, order_id):
 def get_restaurant_menu():
     """ Fetches all categories and menu items for the owner's restaurant. """
     restaurant = Restaurant.query.filter_by(owner_id=current_user.id).first_or_404()
-    categories = Category.query.options(joinedload(Category.menu_items)).filter_by(restaurant_id=restaurant.id).all()
-    
-    categories_data = [{
-        'id': cat.id,
-        'name': cat.name,
-        'menu_items': [{
-            'id': item.id,
-            'name': item.name,
-            'description': item.description,
-            'price': item.price,
-            'is_available': item.is_available,
-            'image': item.image_url or f'https://placehold.co/100x100/E65100/FFF?text={item.name.replace(" ", "+")}'
-        } for item in cat.menu_items]
-    } for cat in categories]
-    
-    return jsonify(categories_data), 200
+    return cached_json_response(*owner_menu_document(restaurant))
 
 @app.route('/api/restaurant/menu-items', methods=['POST'])
 @auth_required('token')
@@ -1179,6 +1310,7 @@ def create_menu_item():
         image_url=data.get('image', '')
     )
     db.session.add(new_item)
+    bump_menu_version(restaurant.id)
     db.session.commit()
     return jsonify({"message": "Menu item created successfully."}), 201
 
@@ -1199,11 +1331,13 @@ def manage_menu_item(item_id):
         item.price = data.get('price', item.price)
         item.image_url = data.get('image', item.image_url)
         item.category_id = data.get('category_id', item.category_id)
+        bump_menu_version(restaurant.id)
         db.session.commit()
         return jsonify({"message": "Menu item updated successfully."}), 200
 
     if request.method == 'DELETE':
         db.session.delete(item)
+        bump_menu_version(restaurant.id)
         db.session.commit()
         return jsonify({"message": "Menu item deleted successfully."}), 200
 
@@ -1220,6 +1354,7 @@ def toggle_item_availability(item_id):
     data = request.get_json()
     if 'is_available' in data:
         item.is_available = data['is_available']
+        bump_menu_version(restaurant.id)
         db.session.commit()
     
     return jsonify({"message": f"'{item.name}' availability updated."}), 200
@@ -1253,6 +1388,7 @@ def manage_restaurant_profile():
         restaurant.is_active = data.get('isActive', restaurant.is_active)
         # Save the updated gallery list sent from the frontend
         restaurant.gallery = data.get('gallery', restaurant.gallery)
+        bump_menu_version(restaurant.id)
         
         db.session.commit()
         
@@ -1330,13 +1466,21 @@ def manage_specific_promotion(coupon_id):
 def get_restaurant_analytics():
     """ Gathers and returns all key analytics data for the owner's restaurant. """
     restaurant = Restaurant.query.filter_by(owner_id=current_user.id).first_or_404()
+
+    # Totals and popular items cover all time and the sales chart the last
+    # 7 days, unless ?start=&end= (YYYY-MM-DD) are given.
+    try:
+        start, end = date_range_args()
+        series_start, series_end = date_range_args(default_days=7)
+    except ValueError:
+        return jsonify({"message": "Invalid date range. Use start/end as YYYY-MM-DD."}), 400
     
     # --- Aggregate Stats ---
-    total_revenue = db.session.query(func.sum(Order.total_amount))\
-        .filter(Order.restaurant_id == restaurant.id, Order.status == 'completed').scalar() or 0.0
-        
-    total_orders = db.session.query(func.count(Order.id))\
-        .filter(Order.restaurant_id == restaurant.id, Order.status == 'completed').scalar() or 0
+    total_revenue, total_orders = restaurant_stats_query(
+        func.coalesce(func.sum(RestaurantDailyStats.revenue), 0.0),
+        func.coalesce(func.sum(RestaurantDailyStats.orders_completed), 0),
+        start=start, end=end
+    ).filter(RestaurantDailyStats.restaurant_id == restaurant.id).one()
         
     avg_order_value = total_revenue / total_orders if total_orders > 0 else 0.0
 
@@ -1346,37 +1490,19 @@ def get_restaurant_analytics():
         'avgOrderValue': round(avg_order_value, 2)
     }
     
-    # --- Daily Sales (Last 7 Days) ---
-    seven_days_ago = date.today() - timedelta(days=6)
-    daily_sales_query = db.session.query(
-            func.cast(Order.created_at, Date).label('order_date'),
-            func.sum(Order.total_amount).label('daily_revenue')
-        ).filter(
-            Order.restaurant_id == restaurant.id,
-            Order.status == 'completed',
-            func.cast(Order.created_at, Date) >= seven_days_ago
-        ).group_by('order_date').all()
-    
-    # Create a dictionary for easy lookup
-    sales_by_date = {res.order_date: res.daily_revenue for res in daily_sales_query}
-    
-    daily_sales_data = []
-    for i in range(7):
-        current_date = date.today() - timedelta(days=i)
-        daily_sales_data.append({
-            'day': current_date.strftime('%b %d'),
-            'sales': round(sales_by_date.get(current_date, 0), 2)
-        })
-    daily_sales_data.reverse() # Order from oldest to newest
+    # --- Daily Sales ---
+    daily_sales_query = restaurant_stats_query(
+            RestaurantDailyStats.day, RestaurantDailyStats.revenue,
+            start=series_start, end=series_end
+        ).filter(RestaurantDailyStats.restaurant_id == restaurant.id).all()
+
+    daily_sales_data = [{
+        'day': current_date.strftime('%b %d'),
+        'sales': round(sales, 2)
+    } for current_date, sales in daily_series(daily_sales_query, series_start, series_end)]
 
     # --- Most Popular Items ---
-    popular_items_query = db.session.query(
-            MenuItem.name,
-            func.count(OrderItem.id).label('order_count')
-        ).join(OrderItem, MenuItem.id == OrderItem.menu_item_id)\
-        .filter(MenuItem.restaurant_id == restaurant.id)\
-        .group_by(MenuItem.name)\
-        .order_by(func.count(OrderItem.id).desc()).limit(5).all()
+    popular_items_query = popular_items(restaurant.id, start, end)
 
     popular_items_data = [{'name': name, 'orders': count} for name, count in popular_items_query]
 
@@ -1425,6 +1551,15 @@ def get_order_details(order_id):
 
 
 
+@app.route('/api/orders/<int:order_id>/stream', methods=['GET'])
+@auth_required('token')
+@roles_required('customer')
+def stream_order_status(order_id):
+    """ Server-Sent Events stream of status changes for one of the customer's orders. """
+    order = Order.query.filter_by(id=order_id, user_id=current_user.id).first_or_404()
+    return event_stream(order_channel(order.id))
+
+
 @app.route('/api/menu-items/regular', methods=['GET'])
 def get_regular_menu():
     menu_items = MenuItem.query.limit(6).all()
@@ -1459,6 +1594,7 @@ def admin_create_restaurant():
         is_verified=True
     )
     db.session.add(new_restaurant)
+    invalidate_admin_dashboard()
     db.session.commit()
     return jsonify({"message": "Restaurant created successfully."}), 201
 
@@ -1475,6 +1611,7 @@ def admin_update_restaurant(id):
     restaurant.city = data.get('city', restaurant.city)
     restaurant.latitude = data.get('latitude', restaurant.latitude)   # <-- ADDED
     restaurant.longitude = data.get('longitude', restaurant.longitude) # <-- ADDED
+    bump_menu_version(restaurant.id)
     
     db.session.commit()
     return jsonify({"message": "Restaurant updated successfully."}), 200
@@ -1485,60 +1622,9 @@ def admin_update_restaurant(id):
 @roles_required('admin')
 def export_restaurants():
     try:
-        # Subquery to calculate performance metrics
-        order_metrics = db.session.query(
-            Order.restaurant_id,
-            func.count(Order.id).label('total_orders'),
-            func.sum(Order.total_amount).label('total_revenue')
-        ).filter(Order.status == 'completed').group_by(Order.restaurant_id).subquery()
-
-        # Main query to get all restaurant data
-        restaurants = db.session.query(
-            Restaurant,
-            func.coalesce(order_metrics.c.total_orders, 0).label('total_orders'),
-            func.coalesce(order_metrics.c.total_revenue, 0).label('total_revenue')
-        ).outerjoin(order_metrics, Restaurant.id == order_metrics.c.restaurant_id).all()
-
-        # Create an Excel file in memory
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Restaurants"
-
-        # Define headers
-        headers = ["ID", "Name", "Owner Email", "City", "Status", "Total Orders", "Total Revenue"]
-        sheet.append(headers)
-
-        # Populate rows
-        for restaurant, total_orders, total_revenue in restaurants:
-            status = "Pending"
-            if restaurant.is_verified and restaurant.owner and restaurant.owner.active:
-                status = "Verified"
-            elif restaurant.owner and not restaurant.owner.active:
-                status = "Blocked"
-
-            row = [
-                restaurant.id,
-                restaurant.name,
-                restaurant.owner.email if restaurant.owner else 'N/A',
-                restaurant.city,
-                status,
-                total_orders,
-                round(float(total_revenue), 2)
-            ]
-            sheet.append(row)
-
-        # Save the workbook to an in-memory stream
-        output = io.BytesIO()
-        workbook.save(output)
-        output.seek(0)
-
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name='restaurants_export.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-
+        return export_response('restaurants', request.args.get('format', 'xlsx'))
+    except ExportError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error exporting restaurants: {e}")
         return jsonify({"message": "Failed to export data."}), 500
@@ -1548,49 +1634,9 @@ def export_restaurants():
 @roles_required('admin')
 def export_users():
     try:
-        # Re-using the subquery from get_all_users
-        orders_subquery = db.session.query(
-            Order.user_id,
-            func.count(Order.id).label('total_orders'),
-            func.sum(Order.total_amount).label('total_spent')
-        ).group_by(Order.user_id).subquery()
-
-        customer_role = Role.query.filter_by(name='customer').first()
-        users = db.session.query(
-            User,
-            func.coalesce(orders_subquery.c.total_orders, 0).label('total_orders'),
-            func.coalesce(orders_subquery.c.total_spent, 0).label('total_spent')
-        ).outerjoin(orders_subquery, User.id == orders_subquery.c.user_id).filter(User.roles.contains(customer_role)).all()
-
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Users"
-        headers = ["ID", "Name", "Email", "Status", "Total Orders", "Total Spent"]
-        sheet.append(headers)
-
-        for user, total_orders, total_spent in users:
-            status = "Active" if user.active else "Blocked"
-            row = [
-                user.id,
-                user.name,
-                user.email,
-                status,
-                total_orders,
-                round(float(total_spent), 2)
-            ]
-            sheet.append(row)
-
-        output = io.BytesIO()
-        workbook.save(output)
-        output.seek(0)
-
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name='users_export.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-
+        return export_response('users', request.args.get('format', 'xlsx'))
+    except ExportError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error exporting users: {e}")
         return jsonify({"message": "Failed to export user data."}), 500
@@ -1600,45 +1646,55 @@ def export_users():
 @roles_required('admin')
 def export_orders():
     try:
-        # Fetch all orders with related data
-        orders = Order.query.options(
-            joinedload(Order.customer),
-            joinedload(Order.restaurant)
-        ).order_by(Order.created_at.desc()).all()
-
-        workbook = openpyxl.Workbook()
-        sheet = workbook.active
-        sheet.title = "Orders"
-
-        headers = ["Order ID", "Customer Name", "Restaurant Name", "Date", "Total Amount", "Status", "Order Type"]
-        sheet.append(headers)
-
-        for order in orders:
-            row = [
-                order.id,
-                order.customer.name if order.customer else 'N/A',
-                order.restaurant.name if order.restaurant else 'N/A',
-                order.created_at.strftime('%Y-%m-%d %H:%M'),
-                order.total_amount,
-                order.status.capitalize(),
-                order.order_type.capitalize()
-            ]
-            sheet.append(row)
-
-        output = io.BytesIO()
-        workbook.save(output)
-        output.seek(0)
-
-        return send_file(
-            output,
-            as_attachment=True,
-            download_name='orders_export.xlsx',
-            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        )
-
+        return export_response('orders', request.args.get('format', 'xlsx'))
+    except ExportError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         print(f"Error exporting orders: {e}")
         return jsonify({"message": "Failed to export order data."}), 500
+
+@app.route('/api/admin/<kind>/export', methods=['POST'])
+@auth_required('token')
+@roles_required('admin')
+def start_export_job(kind):
+    """ Queues an export to run in the background. Poll the returned job until it is completed. """
+    data = request.get_json(silent=True) or {}
+    try:
+        job = enqueue_export(kind, data.get('format', 'xlsx'), current_user.id)
+    except ExportError as e:
+        return jsonify({"message": str(e)}), 400
+    except ExportBusy as e:
+        return jsonify({"message": str(e)}), 429, {'Retry-After': '30'}
+    except Exception as e:
+        print(f"Error queueing export: {e}")
+        return jsonify({"message": "Failed to start export."}), 500
+
+    return jsonify(serialize_job(job)), 202, {'Location': f'/api/admin/exports/{job.id}'}
+
+@app.route('/api/admin/exports/<job_id>')
+@auth_required('token')
+@roles_required('admin')
+def get_export_job(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+    return jsonify(serialize_job(job)), 200
+
+@app.route('/api/admin/exports/<job_id>/download')
+@auth_required('token')
+@roles_required('admin')
+def download_export_job(job_id):
+    job = ExportJob.query.get_or_404(job_id)
+    if job.status == 'expired':
+        return jsonify({"message": "This export has expired. Please start a new one."}), 410
+    if job.status != 'completed' or not job.file_path or not os.path.exists(job.file_path):
+        return jsonify({"message": "This export is not ready yet."}), 409
+
+    return send_file(
+        job.file_path,
+        as_attachment=True,
+        download_name=f'{job.kind}_export.{job.format}',
+        mimetype=EXPORT_FORMATS[job.format],
+        conditional=True
+    )
 @app.route('/api/admin/coupons/<int:coupon_id>/toggle', methods=['PATCH'])
 @auth_required('token')
 @roles_required('admin')
@@ -1655,63 +1711,64 @@ def admin_toggle_coupon_status(coupon_id):
 
 
 
-# --- ✅ START: HAVERSINE FORMULA HELPER FUNCTION ---
-def haversine(lat1, lon1, lat2, lon2):
-    """
-    Calculate the great-circle distance between two points 
-    on the earth (specified in decimal degrees)
-    """
-    # convert decimal degrees to radians 
-    lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-
-    # haversine formula 
-    dlon = lon2 - lon1 
-    dlat = lat2 - lat1 
-    a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-    c = 2 * math.atan2(math.sqrt(a), math.sqrt(1-a)) 
-    r = 6371 # Radius of earth in kilometers.
-    return c * r
-# --- ✅ END: HAVERSINE FORMULA HELPER FUNCTION ---
-
 # --- ✅ START: NEW GEOLOCATION ENDPOINT ---
 @app.route('/api/restaurants/nearby', methods=['GET'])
 def get_nearby_restaurants():
     """
-    Finds restaurants within a 7km radius of the user's location.
-    Expects 'lat' and 'lng' as query parameters.
+    Finds restaurants within a radius of the user's location, nearest first.
+    Expects 'lat' and 'lng' as query parameters; 'radius' (km), 'page' and
+    'per_page' are optional. Without 'page' or 'per_page' every match is
+    returned. The total match count is sent in X-Total-Count.
     """
     user_lat = request.args.get('lat', type=float)
     user_lng = request.args.get('lng', type=float)
 
     if user_lat is None or user_lng is None:
         return jsonify({"message": "Latitude and longitude are required."}), 400
-
-    # Fetch all verified and active restaurants
-    all_restaurants = Restaurant.query.filter_by(is_verified=True, is_active=True).all()
-    
-    nearby_restaurants = []
-    for resto in all_restaurants:
-        # Ensure the restaurant has location data
-        if resto.latitude and resto.longitude:
-            distance = haversine(user_lat, user_lng, resto.latitude, resto.longitude)
-            if distance <= 7: # Check if within 7km radius
-                nearby_restaurants.append(resto)
+    if not (-90 <= user_lat <= 90 and -180 <= user_lng <= 180):
+        return jsonify({"message": "Latitude or longitude is out of range."}), 400
+
+    radius = request.args.get('radius', app.config['NEARBY_DEFAULT_RADIUS_KM'], type=float)
+    if not math.isfinite(radius):
+        return jsonify({"message": "Radius must be a finite number of kilometres."}), 400
+    radius = min(max(radius, 0.1), app.config['NEARBY_MAX_RADIUS_KM'])
+
+    # Spatial index lookup + batched distance computation, sorted by distance
+    matches = find_nearby(user_lat, user_lng, radius)
+    if 'page' in request.args or 'per_page' in request.args:
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 50)
+        matches_shown = matches[(page - 1) * per_page:page * per_page]
+    else:
+        matches_shown = matches
+    distances = dict(matches_shown)
+
+    # Only the restaurants being returned are loaded from the database
+    restaurants = []
+    if distances:
+        restaurants = Restaurant.query.filter(
+            Restaurant.id.in_(list(distances)),
+            Restaurant.is_verified == True,
+            Restaurant.is_active == True
+        ).all()
+    restaurants.sort(key=lambda resto: distances[resto.id])
 
     # Format the data for the frontend
     restaurants_data = []
-    for resto in nearby_restaurants:
-        avg_rating = db.session.query(func.avg(Review.rating)).filter(Review.restaurant_id == resto.id).scalar() or 0.0
-        review_count = db.session.query(func.count(Review.id)).filter(Review.restaurant_id == resto.id).scalar() or 0
+    for resto in restaurants:
         restaurants_data.append({
             'id': resto.id,
             'name': resto.name,
             'cuisine': 'Local Favorites', # You can enhance this later
-            'rating': round(float(avg_rating), 1),
-            'reviews': review_count,
+            'rating': resto.average_rating,
+            'reviews': resto.rating_count,
+            'distance': round(distances[resto.id], 2),
             'image': f'https://placehold.co/600x400/E65100/FFF?text={resto.name.replace(" ", "+")}'
         })
 
-    return jsonify(restaurants_data), 200
+    response = jsonify(restaurants_data)
+    response.headers['X-Total-Count'] = str(len(matches))
+    return response, 200
 # --- ✅ END: NEW GEOLOCATION ENDPOINT ---
 
 
@@ -1728,29 +1785,20 @@ def geocode_address():
     if not address:
         return jsonify({"message": "Address is required."}), 400
 
-    # A custom User-Agent is required by Nominatim's terms of service.
-    # Replace 'your-email@example.com' with your actual email if possible.
-    headers = {'User-Agent': 'FoodleApp/1.0 (manimanjunath.v@gmail.com)'}
-    params = {'q': address, 'format': 'json', 'limit': 1}
-    
     try:
-        response = requests.get('https://nominatim.openstreetmap.org/search', params=params, headers=headers)
-        response.raise_for_status() # Raise an exception for bad status codes (like 4xx or 5xx)
-        results = response.json()
-
-        if not results:
-            return jsonify({"message": "Address not found. Please try a different format or enter coordinates manually."}), 404
-
-        location = results[0]
-        return jsonify({
-            "latitude": float(location['lat']),
-            "longitude": float(location['lon'])
-        }), 200
-
-    except requests.exceptions.RequestException as e:
+        location = geocode(address)
+    except GeocodingError as e:
         print(f"Geocoding API error: {e}")
         return jsonify({"message": "Could not connect to the geocoding service. Please try again later or enter coordinates manually."}), 503
 
+    if not location:
+        return jsonify({"message": "Address not found. Please try a different format or enter coordinates manually."}), 404
+
+    return jsonify({
+        "latitude": location[0],
+        "longitude": location[1]
+    }), 200
+
 
 
 # --- ============================ ---
@@ -1772,6 +1820,7 @@ def create_category():
         restaurant_id=restaurant.id
     )
     db.session.add(new_category)
+    bump_menu_version(restaurant.id)
     db.session.commit()
     return jsonify({"message": f"Category '{new_category.name}' created successfully."}), 201
 
@@ -1792,6 +1841,7 @@ def manage_category(category_id):
         if not data or not data.get('name'):
             return jsonify({"message": "Category name is required."}), 400
         category.name = data['name']
+        bump_menu_version(restaurant.id)
         db.session.commit()
         return jsonify({"message": "Category updated successfully."}), 200
 
@@ -1801,6 +1851,7 @@ def manage_category(category_id):
             return jsonify({"message": "Cannot delete a category that contains menu items. Please remove the items first."}), 409
         
         db.session.delete(category)
+        bump_menu_version(restaurant.id)
         db.session.commit()
         return jsonify({"message": "Category deleted successfully."}), 200
 
@@ -1810,8 +1861,9 @@ def manage_category(category_id):
 @roles_required('owner')
 def bulk_upload_menu():
     """
-    Processes an Excel file to bulk-add categories and menu items.
-    Expected Excel format: | Category | Name | Description | Price | Food Type (Veg/Non-Veg) |
+    Processes an Excel or CSV file to bulk-add categories and menu items.
+    Expected format: | Category | Name | Description | Price | Food Type (Veg/Non-Veg) |
+    Valid rows are imported in chunks; invalid ones are reported by row number.
     """
     if 'menu_file' not in request.files:
         return jsonify({"message": "No file part in the request."}), 400
@@ -1820,61 +1872,43 @@ def bulk_upload_menu():
 
     if file.filename == '':
         return jsonify({"message": "No file selected."}), 400
-        
-    if not file.filename.endswith('.xlsx'):
-        return jsonify({"message": "Invalid file type. Please upload a .xlsx file."}), 400
 
     restaurant = Restaurant.query.filter_by(owner_id=current_user.id).first_or_404()
     
     try:
-        workbook = openpyxl.load_workbook(file)
-        sheet = workbook.active
-        
-        category_cache = {} # Cache to avoid repeated DB lookups
-        items_to_add = []
-        items_added_count = 0
-
-        # Iterate through rows, skipping the header
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            category_name, item_name, description, price, food_type = (list(row) + [None])[:5]
-            if not category_name or not item_name or price is None:
-                continue # Skip incomplete rows
-            category_id = None
-            if category_name in category_cache:
-                category_id = category_cache[category_name]
-            else:
-                category = Category.query.filter_by(name=category_name, restaurant_id=restaurant.id).first()
-                if category:
-                    category_id = category.id
-                else:
-                    new_category = Category(name=category_name, restaurant_id=restaurant.id)
-                    db.session.add(new_category)
-                    db.session.flush() # Get the new ID before committing
-                    category_id = new_category.id
-                category_cache[category_name] = category_id
-
-            new_item = MenuItem(
-                name=item_name,
-                description=description or "",
-                price=float(price),
-                category_id=category_id,
-                restaurant_id=restaurant.id,
-                food_type=food_type if food_type and food_type.strip().title() in ['Veg', 'Non-Veg'] else None
-            )
-            items_to_add.append(new_item)
-            items_added_count += 1
-        
-        if items_to_add:
-            db.session.add_all(items_to_add)
-            db.session.commit()
-            
-        return jsonify({"message": f"Successfully added {items_added_count} menu items."}), 201
+        rows = read_rows(file.stream, file.filename)
+    except MenuImportError as e:
+        return jsonify({"message": str(e)}), 400
 
+    importer = None
+    summary = None
+    try:
+        importer = MenuImport(restaurant.id)
+        summary = importer.run(rows)
     except Exception as e:
         db.session.rollback()
         print(f"Error during bulk upload: {e}")
+
+    if importer is not None and importer.imported:
+        # Chunks commit as they go, so this runs even when the import failed
+        # part-way. Items were inserted with core statements, which neither
+        # the menu document cache nor the catalog index sees.
+        try:
+            bump_menu_version(restaurant.id)
+            touch_restaurant(restaurant.id)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error refreshing menu after bulk upload: {e}")
+
+    if summary is None:
         return jsonify({"message": "An error occurred while processing the file. Please check the format and data."}), 500
 
+    message = f"Successfully added {summary['imported']} menu items."
+    if summary['errorCount']:
+        message += f" {summary['errorCount']} rows were skipped."
+    return jsonify({"message": message, **summary}), 201
+
 
 
 @app.route('/api/restaurant/timeslots', methods=['GET', 'POST'])
@@ -1895,6 +1929,7 @@ def manage_time_slots():
             end_time=datetime.strptime(data['end_time'], '%H:%M').time()
         )
         db.session.add(new_slot)
+        invalidate_slot_calendar(restaurant.id)
         db.session.commit()
         return jsonify({"message": "Time slot added successfully."}), 201
 
@@ -1907,57 +1942,40 @@ def delete_time_slot(slot_id):
     if slot.restaurant_id != restaurant.id:
         return jsonify({"message": "Unauthorized"}), 403
     db.session.delete(slot)
+    invalidate_slot_calendar(restaurant.id)
     db.session.commit()
     return jsonify({"message": "Time slot deleted successfully."}), 200
 
+@app.route('/api/restaurant/slot-capacity', methods=['GET', 'PUT'])
+@auth_required('token')
+@roles_required('owner')
+def manage_slot_capacity():
+    """ Fetches (GET) or sets (PUT) how many scheduled orders each time slot accepts. null means no limit. """
+    restaurant = Restaurant.query.filter_by(owner_id=current_user.id).first_or_404()
+    if request.method == 'PUT':
+        capacity = request.get_json().get('capacity')
+        if capacity is not None:
+            try:
+                capacity = int(capacity)
+            except (TypeError, ValueError):
+                return jsonify({"message": "Capacity must be a whole number."}), 400
+            if capacity < 1:
+                return jsonify({"message": "Capacity must be at least 1."}), 400
+        restaurant.slot_capacity = capacity
+        db.session.commit()
+    return jsonify({'capacity': restaurant.slot_capacity}), 200
+
 @app.route('/api/restaurants/<int:restaurant_id>/available-slots', methods=['GET'])
 @auth_required('token')
 def get_available_slots(restaurant_id):
     """
-    Calculates and returns a list of available time slots for the next 7 days
-    for a given restaurant. This version is designed to be called once, providing all
-    necessary data to the frontend.
+    Returns the restaurant's bookable time slots for the next 7 days, with
+    the remaining capacity of each. The calendar is cached per restaurant-day
+    (see backend/slots.py), so checkout does not rebuild it on every visit.
     """
+    restaurant = Restaurant.query.get_or_404(restaurant_id)
     try:
-        # Fetch all defined time slots for the restaurant
-        all_slots = db.session.query(TimeSlot).filter_by(restaurant_id=restaurant_id).all()
-        
-        # Group slots by day of the week for easy lookup
-        slots_by_day = {}
-        for slot in all_slots:
-            if slot.day_of_week not in slots_by_day:
-                slots_by_day[slot.day_of_week] = []
-            slots_by_day[slot.day_of_week].append(slot)
-
-        # Generate the available slots for the next 7 days
-        available_days = []
-        today = date.today()
-        for i in range(7):
-            current_date = today + timedelta(days=i)
-            day_name = current_date.strftime('%A') # e.g., "Monday"
-
-            if day_name in slots_by_day:
-                day_slots = []
-                for slot in sorted(slots_by_day[day_name], key=lambda x: x.start_time):
-                    # Generate time slots in 30-minute increments within the defined window
-                    current_time_dt = datetime.combine(current_date, slot.start_time)
-                    end_time_dt = datetime.combine(current_date, slot.end_time)
-                    
-                    while current_time_dt < end_time_dt:
-                        day_slots.append({
-                            "value": current_time_dt.strftime('%Y-%m-%d %H:%M:%S'),
-                            "display": current_time_dt.strftime('%I:%M %p').lstrip('0')
-                        })
-                        current_time_dt += timedelta(minutes=30)
-                
-                if day_slots:
-                    available_days.append({
-                        "date_value": current_date.strftime('%Y-%m-%d'),
-                        "date_display": current_date.strftime('%A, %b %d'), # e.g., "Tuesday, Oct 14"
-                        "slots": day_slots
-                    })
-                    
-        return jsonify(available_days), 200
+        return jsonify(slot_calendar(restaurant)), 200
 
     except Exception as e:
         print(f"Error fetching available slots: {e}")
@@ -1982,21 +2000,34 @@ def submit_review(order_id):
     if not data or not data.get('rating'):
         return jsonify({"message": "Rating is a required field."}), 400
 
+    try:
+        rating = int(data['rating'])
+    except (TypeError, ValueError):
+        rating = None
+    if rating not in RATING_COLUMNS:
+        return jsonify({"message": "Rating must be a whole number between 1 and 5."}), 400
+
     new_review = Review(
         user_id=current_user.id,
         restaurant_id=order.restaurant_id,
         order_id=order.id,
-        rating=data['rating'],
+        rating=rating,
         comment=data.get('comment', '')
     )
     db.session.add(new_review)
+    # The aggregate update commits atomically with the new review.
+    apply_rating(order.restaurant_id, rating)
     db.session.commit()
 
     return jsonify({"message": "Thank you for your review!"}), 201
 
 @app.route('/api/restaurants/<int:restaurant_id>/reviews', methods=['GET'])
 def get_restaurant_reviews(restaurant_id):
-    reviews = Review.query.options(joinedload(Review.customer)).filter_by(restaurant_id=restaurant_id).order_by(Review.created_at.desc()).all()
+    query = Review.query.options(joinedload(Review.customer)).filter_by(restaurant_id=restaurant_id)
+    cursor, limit, with_total, envelope = page_args()
+    page = keyset_page(query, (Review.created_at, Review.id), lambda r: (r.created_at, r.id),
+                       cursor=cursor, limit=limit, with_total=with_total)
+    reviews = page.items
     reviews_data = [{
         'id': r.id,
         'customerName': r.customer.name if r.customer else 'Anonymous',
@@ -2004,7 +2035,7 @@ def get_restaurant_reviews(restaurant_id):
         'comment': r.comment,
         'date': r.created_at.strftime('%b %d, %Y')
     } for r in reviews]
-    return jsonify(reviews_data), 200
+    return page_response(page, reviews_data, envelope), 200
 
 
 
@@ -2022,39 +2053,160 @@ def upload_image():
 
     # Allow more input formats
     ext = file.filename.split('.')[-1].lower()
-    if ext not in ['jpg', 'jpeg', 'png', 'webp']:
+    if ext not in IMAGE_EXTENSIONS:
         return jsonify({"message": "Invalid file type. Please upload JPG, PNG, or WebP."}), 400
-        
-    # --- THIS IS THE KEY FIX ---
-    # We create a new filename and ALWAYS give it a .jpg extension because we are converting to JPEG.
-    unique_filename = f"{uuid.uuid4()}.jpg" 
-    
-    save_path = os.path.join(app.static_folder, 'assets', 'uploads', unique_filename)
 
     try:
-        image = Image.open(file.stream)
-
-        # Convert to RGB to remove transparency and ensure JPEG compatibility
-        if image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
-
-        # Resize to a max width/height of 800px
-        image.thumbnail((800, 800))
-        
-        # Save the compressed image as a JPEG
-        image.save(save_path, 'jpeg', quality=85, optimize=True)
-
-        # The public URL will now correctly point to the .jpg file
-        public_url = f"/assets/uploads/{unique_filename}"
-        
-        return jsonify({"url": public_url}), 201
-
+        # Resizing and encoding run in the image process pool; `url` is the
+        # largest JPEG, and the srcsets list every generated size.
+        data = file.stream.read(app.config['IMAGE_MAX_UPLOAD_BYTES'] + 1)
+        return jsonify(store_image(data)), 201
+
+    except ImageError as e:
+        return jsonify({"message": str(e)}), 400
+    except ImageBusy:
+        return jsonify({"message": "Too many images are being processed. Please try again shortly."}), 503
     except Exception as e:
         print(f"Error during image compression: {e}")
         return jsonify({"message": "An error occurred while processing the image."}), 500
     
 
     
+@app.errorhandler(CursorError)
+def handle_cursor_error(e):
+    return jsonify({"message": str(e)}), 400
+
+
+# --- ======================= ---
+# --- MAINTENANCE CLI COMMANDS ---
+# --- ======================= ---
+
+@app.cli.command('rebuild-ratings')
+def rebuild_ratings_command():
+    """ Rebuilds the denormalized restaurant rating aggregates from reviews. """
+    updated = rebuild_rating_aggregates()
+    print(f"Rebuilt rating aggregates for {updated} restaurants.")
+
+@app.cli.command('rebuild-daily-stats')
+def rebuild_daily_stats_command():
+    """ Recomputes the daily order rollups from the full order history. """
+    days = rebuild_daily_stats()
+    print(f"Rebuilt daily stats for {days} restaurant-days.")
+
+@app.cli.command('benchmark-search')
+@click.option('--items', default=100000, help='Number of synthetic menu items to index.')
+def benchmark_search_command(items):
+    """ Measures catalog search latency on a synthetic index. """
+    build_seconds, results = benchmark_index(items)
+    print(f"Indexed {items} items in {build_seconds:.1f}s")
+    for query, hits, milliseconds in results:
+        print(f"{query!r:28} {hits:7} hits {milliseconds:7.2f} ms")
+
+@app.cli.command('benchmark-menu-import')
+@click.option('--rows', default=20000, help='Number of synthetic menu rows to import.')
+def benchmark_menu_import_command(rows):
+    """ Times a bulk menu upload of a synthetic .xlsx into an in-memory database. """
+    write_seconds, import_seconds, summary = benchmark_import(rows)
+    print(f"Wrote {rows} rows in {write_seconds:.1f}s")
+    print(f"Imported {summary['imported']} items ({summary['categoriesCreated']} categories) "
+          f"in {import_seconds:.2f}s, {summary['errorCount']} errors")
+
+@app.cli.command('benchmark-image-upload')
+@click.option('--images', default=40, help='Number of synthetic photos to upload.')
+@click.option('--concurrency', default=8, help='Concurrent uploads.')
+def benchmark_image_upload_command(images, concurrency):
+    """ Measures image upload throughput through the image process pool. """
+    seconds, per_second = benchmark_uploads(images, concurrency)
+    print(f"Processed {images} images in {seconds:.1f}s ({per_second:.1f} images/s)")
+
+@app.cli.command('benchmark-export')
+@click.option('--rows', default=1000000, help='Number of synthetic orders to export.')
+def benchmark_export_command(rows):
+    """ Reports time, file size and peak memory of exporting synthetic orders as CSV, NDJSON and .xlsx. """
+    print(f"Exporting {rows} orders in each format...")
+    for fmt, (seconds, size, baseline, peak) in benchmark_exports(app._get_current_object(), rows).items():
+        print(f"{fmt:7} {seconds:7.1f}s {size / 2**20:8.1f} MB file  peak RSS {peak:7.1f} MB "
+              f"(+{peak - baseline:.1f} MB over the process at start)")
+
+@app.cli.command('compress-static')
+def compress_static_command():
+    """ Writes .br/.gz siblings of the frontend files, for deploys that build ahead of time. """
+    written = precompress_directory(app.static_folder, app.config['COMPRESS_MIN_SIZE'],
+                                    skip=(upload_dir(),))
+    print(f"Wrote {written} precompressed files ({', '.join(available_encodings())}).")
+
+@app.cli.command('benchmark-compression')
+def benchmark_compression_command():
+    """ Reports size and time trade-offs of compressing a menu document, an admin list and the frontend JS. """
+    restaurant = Restaurant.query.filter_by(is_verified=True).first()
+    payloads = []
+    if restaurant:
+        payloads.append(('menu document', public_menu_document(restaurant.id)[1].encode('utf-8')))
+    users = [{'id': i, 'name': f'Customer {i}', 'email': f'customer{i}@example.com', 'roles': ['customer'],
+              'active': True} for i in range(app.config['PAGINATION_DEFAULT_PAGE_SIZE'])]
+    payloads.append(('admin user page', app.json.dumps({'items': users}).encode('utf-8')))
+    scripts = b''
+    for directory, _, filenames in os.walk(app.static_folder):
+        for filename in sorted(filenames):
+            if filename.endswith('.js'):
+                with open(os.path.join(directory, filename), 'rb') as fileobj:
+                    scripts += fileobj.read()
+    payloads.append(('frontend JS', scripts))
+
+    for name, encoding, size, ratio, compress_ms, totals in benchmark_compression(payloads):
+        transfer = '  '.join(f"{bandwidth:>4} Mbit/s {total:8.1f} ms" for bandwidth, total in totals.items())
+        print(f"{name:16} {encoding:9} {size:9} B {ratio:6.1%} {compress_ms:7.2f} ms  {transfer}")
+
+@app.cli.command('benchmark-auth')
+@click.option('--email', default=None, help='User to authenticate as (defaults to the first active user).')
+@click.option('--requests', 'request_count', default=500, help='Number of simulated requests.')
+def benchmark_auth_command(email, request_count):
+    """ Compares per-request token authentication cost with and without the principal cache. """
+    user = User.query.filter_by(email=email).first() if email else User.query.filter_by(active=True).first()
+    if user is None:
+        print("No such user.")
+        return
+    for name, (microseconds, queries) in benchmark_auth(app._get_current_object(), user, request_count).items():
+        print(f"{name:16} {microseconds:9.1f} us/request {queries:5.2f} queries/request")
+
+@app.cli.command('benchmark-login')
+@click.option('--concurrency', default=16, help='Concurrent logins.')
+@click.option('--logins', default=64, help='Total logins to verify.')
+def benchmark_login_command(concurrency, logins):
+    """ Measures password verification throughput inline and through the password pool. """
+    for name, (per_second, p50, p95, rejected) in benchmark_logins(concurrency, logins).items():
+        print(f"{name:7} {per_second:7.1f} logins/s  p50 {p50:7.1f} ms  p95 {p95:7.1f} ms  {rejected} rejected")
+
+@app.cli.command('run-scheduler')
+@click.option('--once', is_flag=True, help='Run the tasks due now and exit.')
+def run_scheduler_command(once):
+    """ Runs scheduled tasks (OTP clearing, ...) in the foreground, e.g. in a dedicated process. """
+    if once:
+        print(f"Ran {run_due_tasks()} due tasks.")
+        return
+    print("Running the task scheduler. Press Ctrl+C to stop.")
+    get_scheduler().run_forever()
+
+@app.cli.command('release-scheduled-orders')
+def release_scheduled_orders_command():
+    """ Moves held scheduled orders whose lead time has started into the live queue now. """
+    released = release_orders()
+    db.session.commit()
+    print(f"Released {released} scheduled orders.")
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """ Rebuilds the admin full-text search tables (SQLite) from users and restaurants. """
+    indexed = rebuild_search_index()
+    print(f"Indexed {indexed} rows for admin search.")
+
+@app.cli.command('expire-exports')
+def expire_exports_command():
+    """ Deletes export files past their TTL and fails exports that never finished. """
+    expired = expire_export_jobs()
+    print(f"Expired {expired} export files.")
+
+
 # --- ===================== ---
 # --- CUSTOMER API RESOURCES ---
 # --- ===================== ---
@@ -2065,14 +2217,11 @@ api.add_resource(RestaurantListAPI, '/api/restaurants')
 @app.route('/<path:path>')
 def serve_vue_app(path):
     """
-    Serves the index.html file for all non-API, non-static file routes.
+    Serves index.html for '/' and any path the static view does not claim.
     Vue Router will handle the frontend routing.
-    API_BASE_URL is set to an empty string because API calls use relative paths.
     """
-    if os.path.exists(os.path.join(app.static_folder, path)):
-         
-         pass # Let the other route handle it
-
-    return render_template('index.html', API_BASE_URL="")
+    if path.startswith('api/'):
+        return jsonify({"message": "API route not found."}), 404
+    return index_response()
 
 
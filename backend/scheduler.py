@@ -0,0 +1,266 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import select, delete, func, text, event
+from sqlalchemy.orm import Session
+from .models import db, ScheduledTask
+
+# kind -> handler(tasks); a handler receives every due task of its kind in
+# one batch and should apply them with set-based statements.
+TASK_HANDLERS = {}
+
+
+def task_handler(kind):
+    """ Registers the function that runs due tasks of `kind`. """
+    def register(fn):
+        TASK_HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def schedule_task(kind, delay=None, at=None, target_id=None, payload=None):
+    """
+    Schedules a task `delay` seconds from now (or at the naive UTC datetime
+    `at`). The row is added to the current session, so the task exists only
+    if the caller's transaction commits.
+    """
+    due_at = at if at is not None else datetime.utcnow() + timedelta(seconds=delay or 0)
+    task = ScheduledTask(kind=kind, target_id=target_id, payload=payload, due_at=due_at)
+    db.session.add(task)
+    db.session.info['tasks_scheduled'] = True
+    return task
+
+
+def _retry_delay(attempts):
+    return min(60 * 2 ** attempts, 3600)
+
+
+def run_due_tasks(batch_size=None, now=None):
+    """
+    Runs up to `batch_size` due tasks, kinds with the oldest tasks first, one
+    transaction per kind. On PostgreSQL the kind's rows are claimed with
+    FOR UPDATE SKIP LOCKED in the same transaction as the handler and the
+    delete, so the row locks hold until the handler's work commits and a
+    second runner skips them. A failing kind is retried with backoff and
+    dropped after SCHEDULER_MAX_ATTEMPTS. Returns the number of tasks taken.
+    """
+    batch_size = batch_size or current_app.config['SCHEDULER_BATCH_SIZE']
+    now = now or datetime.utcnow()
+    lock_rows = db.session.get_bind().dialect.name == 'postgresql'
+    kinds = db.session.execute(
+        select(ScheduledTask.kind).where(ScheduledTask.due_at <= now)
+        .group_by(ScheduledTask.kind).order_by(func.min(ScheduledTask.due_at))
+    ).scalars().all()
+    db.session.commit()
+
+    taken = 0
+    for kind in kinds:
+        if taken >= batch_size:
+            break
+        statement = select(ScheduledTask)\
+            .where(ScheduledTask.kind == kind, ScheduledTask.due_at <= now)\
+            .order_by(ScheduledTask.due_at).limit(batch_size - taken)
+        if lock_rows:
+            statement = statement.with_for_update(skip_locked=True)
+        ids = []
+        try:
+            tasks = db.session.execute(statement).scalars().all()
+            ids = [task.id for task in tasks]
+            if not tasks:
+                db.session.commit()
+                continue
+            taken += len(tasks)
+            handler = TASK_HANDLERS.get(kind)
+            if handler is None:
+                raise LookupError(f"No handler registered for task kind '{kind}'.")
+            handler(tasks)
+            db.session.execute(delete(ScheduledTask).where(ScheduledTask.id.in_(ids)))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            print(f"Error running {len(ids)} '{kind}' tasks: {e}")
+            if ids:
+                _reschedule(ids, now)
+    return taken
+
+
+def _reschedule(ids, now):
+    max_attempts = current_app.config['SCHEDULER_MAX_ATTEMPTS']
+    for task in db.session.execute(select(ScheduledTask).where(ScheduledTask.id.in_(ids))).scalars():
+        task.attempts += 1
+        if task.attempts >= max_attempts:
+            print(f"Dropping '{task.kind}' task {task.id} after {task.attempts} attempts.")
+            db.session.delete(task)
+        else:
+            task.due_at = now + timedelta(seconds=_retry_delay(task.attempts))
+    db.session.commit()
+
+
+def next_due_at():
+    return db.session.execute(select(func.min(ScheduledTask.due_at))).scalar()
+
+
+# --- Leader election ---
+# Every web process runs a scheduler thread, but only the one holding the
+# lock runs tasks: a PostgreSQL advisory lock (held by a dedicated
+# connection) across hosts, or an exclusive file lock on a single host.
+
+class LeaderLock:
+    ADVISORY_LOCK_KEY = 0x43726176  # arbitrary, fixed
+
+    def __init__(self, app):
+        self.app = app
+        self._connection = None
+        self._file = None
+
+    def acquire(self):
+        """ Whether this process leads; checked every tick, so a lost lock connection ends the leadership. """
+        if self._connection is not None:
+            if self._still_held():
+                return True
+            self.release()
+            return False
+        if self._file is not None:
+            return True
+        if db.engine.dialect.name == 'postgresql':
+            connection = db.engine.connect()
+            if connection.execute(text("SELECT pg_try_advisory_lock(:key)"),
+                                  {'key': self.ADVISORY_LOCK_KEY}).scalar():
+                connection.commit()
+                self._connection = connection
+                return True
+            connection.close()
+            return False
+        try:
+            import fcntl
+        except ImportError:  # Windows: a single development process.
+            self._file = True
+            return True
+        path = self.app.config['SCHEDULER_LOCK_FILE']
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        lock_file = open(path, 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._file = lock_file
+        return True
+
+    def _still_held(self):
+        """ Checks in pg_locks that the dedicated connection is alive and still holds the advisory lock. """
+        try:
+            held = self._connection.execute(text(
+                "SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND pid = pg_backend_pid() "
+                "AND classid = 0 AND objid = :key AND objsubid = 1 AND granted"
+            ), {'key': self.ADVISORY_LOCK_KEY}).first() is not None
+            self._connection.commit()
+        except Exception as e:
+            print(f"Scheduler leader lock connection failed: {e}")
+            return False
+        if not held:
+            print("Scheduler leader lock was lost.")
+        return held
+
+    def release(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+        if self._file not in (None, True):
+            self._file.close()
+        self._file = None
+
+
+class TaskScheduler:
+    """
+    Background thread that sleeps until the earliest due_at (the indexed
+    scheduled_task table is the timer queue) or SCHEDULER_POLL_INTERVAL,
+    whichever comes first, and runs due tasks in batches. Commits in this
+    process that schedule a task wake it early.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.lock = LeaderLock(app)
+        self.wakeup = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run_forever, name='task-scheduler', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.wakeup.set()
+
+    def tick(self):
+        """ Runs one round if this process is the leader. Returns seconds until the next round. """
+        config = self.app.config
+        with self.app.app_context():
+            try:
+                if not self.lock.acquire():
+                    return config['SCHEDULER_LEADER_RETRY']
+                taken = run_due_tasks()
+                if taken >= config['SCHEDULER_BATCH_SIZE']:
+                    return 0
+                due_at = next_due_at()
+            except Exception as e:
+                print(f"Scheduler error: {e}")
+                db.session.rollback()
+                self.lock.release()
+                return config['SCHEDULER_POLL_INTERVAL']
+            finally:
+                db.session.remove()
+        if due_at is None:
+            return config['SCHEDULER_POLL_INTERVAL']
+        wait = (due_at - datetime.utcnow()).total_seconds()
+        return min(max(wait, 0), config['SCHEDULER_POLL_INTERVAL'])
+
+    def run_forever(self):
+        while True:
+            wait = self.tick()
+            if wait > 0:
+                self.wakeup.wait(wait)
+            self.wakeup.clear()
+
+
+def get_scheduler(app=None):
+    app = app or current_app._get_current_object()
+    return app.extensions.get('task_scheduler')
+
+
+def init_scheduler(app):
+    """
+    Creates the app's scheduler. With SCHEDULER_ENABLED it starts with the
+    first request this process serves, so CLI commands and migrations never
+    start it; `flask run-scheduler` runs it in the foreground instead.
+    """
+    scheduler = TaskScheduler(app)
+    app.extensions['task_scheduler'] = scheduler
+
+    if app.config['SCHEDULER_ENABLED']:
+        @app.before_request
+        def start_scheduler():
+            if scheduler._thread is None:
+                scheduler.start()
+
+    return scheduler
+
+
+@event.listens_for(Session, 'after_commit')
+def _wake_scheduler(session):
+    if session.info.pop('tasks_scheduled', None) and has_app_context():
+        scheduler = current_app.extensions.get('task_scheduler')
+        if scheduler is not None:
+            scheduler.wake()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_scheduled(session):
+    session.info.pop('tasks_scheduled', None)
@@ -0,0 +1,234 @@
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import select, func, event
+from sqlalchemy.orm import Session
+from .cache import LRUCache
+from .models import db, Order, TimeSlot
+
+# Orders in these statuses no longer take up their slot.
+SLOT_FREEING_STATUSES = ('cancelled', 'rejected', 'refunded')
+
+
+class SlotError(Exception):
+    """ Raised when a scheduled time is not a bookable slot. """
+    def __init__(self, message):
+        super().__init__(message)
+        self.message = message
+
+
+class SlotFull(SlotError):
+    """ Raised when a slot already has as many orders as the restaurant's capacity. """
+
+
+_cache_lock = threading.Lock()
+
+
+def _cache():
+    """ Returns the (restaurant id, local date) -> [(local slot start, booked count)] cache, created on first use. """
+    cache = current_app.extensions.get('slot_calendar_cache')
+    if cache is None:
+        with _cache_lock:
+            cache = current_app.extensions.get('slot_calendar_cache')
+            if cache is None:
+                cache = LRUCache(current_app.config['SLOT_CALENDAR_CACHE_SIZE'],
+                                 ttl=current_app.config['SLOT_CALENDAR_TTL'])
+                current_app.extensions['slot_calendar_cache'] = cache
+    return cache
+
+
+def _utc_offset():
+    return timedelta(minutes=current_app.config['RESTAURANT_UTC_OFFSET_MINUTES'])
+
+
+def _slot_length():
+    return timedelta(minutes=current_app.config['SLOT_LENGTH_MINUTES'])
+
+
+def local_today():
+    return (datetime.utcnow() + _utc_offset()).date()
+
+
+def _windows(restaurant_id):
+    """ The restaurant's TimeSlot windows as {day name: [(start time, end time)]}, earliest first. """
+    windows = {}
+    slots = db.session.execute(
+        select(TimeSlot.day_of_week, TimeSlot.start_time, TimeSlot.end_time)
+        .where(TimeSlot.restaurant_id == restaurant_id)
+        .order_by(TimeSlot.start_time)
+    ).all()
+    for day_name, start_time, end_time in slots:
+        windows.setdefault(day_name, []).append((start_time, end_time))
+    return windows
+
+
+def _slot_starts(windows, day):
+    """ Local start times of the SLOT_LENGTH_MINUTES slots within the day's windows, sorted and unique. """
+    length = _slot_length()
+    starts = set()
+    for start_time, end_time in windows.get(day.strftime('%A'), ()):
+        current = datetime.combine(day, start_time)
+        end = datetime.combine(day, end_time)
+        while current < end:
+            starts.add(current)
+            current += length
+    return sorted(starts)
+
+
+def _booked(restaurant_id, start, end):
+    """ {scheduled time (UTC): order count} for start <= time < end, in one grouped query. """
+    rows = db.session.execute(
+        select(Order.scheduled_time, func.count(Order.id))
+        .where(
+            Order.restaurant_id == restaurant_id,
+            Order.is_scheduled == True,
+            Order.scheduled_time >= start,
+            Order.scheduled_time < end,
+            Order.status.notin_(SLOT_FREEING_STATUSES)
+        )
+        .group_by(Order.scheduled_time)
+    ).all()
+    return dict(rows)
+
+
+def _build_days(restaurant_id, days):
+    """
+    Slot lists for several local dates from one windows query and one grouped
+    count of the scheduled orders across all of them. Orders at arbitrary
+    times (placed before slots were enforced) count toward the slot they fall in.
+    """
+    windows = _windows(restaurant_id)
+    starts = {day: _slot_starts(windows, day) for day in days}
+    if not any(starts.values()):
+        return {day: [] for day in days}
+
+    offset, length = _utc_offset(), _slot_length()
+    first = datetime.combine(min(days), datetime.min.time()) - offset
+    last = datetime.combine(max(days) + timedelta(days=1), datetime.min.time()) - offset
+    counts = {day: [0] * len(day_starts) for day, day_starts in starts.items()}
+    for scheduled_time, count in _booked(restaurant_id, first, last).items():
+        local = scheduled_time + offset
+        day_starts = starts.get(local.date())
+        if not day_starts:
+            continue
+        index = bisect_right(day_starts, local) - 1
+        if index >= 0 and local < day_starts[index] + length:
+            counts[local.date()][index] += count
+    return {day: list(zip(starts[day], counts[day])) for day in days}
+
+
+def slot_calendar(restaurant):
+    """
+    The bookable slots for the next SLOT_CALENDAR_DAYS days, in the shape the
+    checkout page renders. Each restaurant-day is cached; a slot's value is
+    its UTC start, which the client sends back as the order's scheduled_time.
+    Past slots are left out and full ones are flagged.
+    """
+    cache = _cache()
+    today = local_today()
+    days = [today + timedelta(days=i) for i in range(current_app.config['SLOT_CALENDAR_DAYS'])]
+    calendar = {day: cache.get((restaurant.id, day)) for day in days}
+    missing = [day for day, slots in calendar.items() if slots is None]
+    if missing:
+        for day, slots in _build_days(restaurant.id, missing).items():
+            cache.set((restaurant.id, day), slots)
+            calendar[day] = slots
+
+    offset = _utc_offset()
+    now = datetime.utcnow() + offset
+    capacity = restaurant.slot_capacity
+    available_days = []
+    for day in days:
+        day_slots = []
+        for start, booked in calendar[day]:
+            if start <= now:
+                continue
+            remaining = max(capacity - booked, 0) if capacity is not None else None
+            day_slots.append({
+                "value": (start - offset).strftime('%Y-%m-%dT%H:%M:%SZ'),
+                "display": start.strftime('%I:%M %p').lstrip('0'),
+                "remaining": remaining,
+                "full": remaining == 0
+            })
+        if day_slots:
+            available_days.append({
+                "date_value": day.strftime('%Y-%m-%d'),
+                "date_display": day.strftime('%A, %b %d'), # e.g., "Tuesday, Oct 14"
+                "slots": day_slots
+            })
+    return available_days
+
+
+def claim_slot(restaurant, order):
+    """
+    Checks that a new scheduled order's time lies in a future slot that still
+    has room. Call after bump_order_version, so the count runs while this
+    transaction holds the restaurant row lock and concurrent orders for the
+    restaurant are checked one at a time. The flushed order counts itself.
+    Raises SlotError or SlotFull; the caller rolls back.
+    """
+    offset, length = _utc_offset(), _slot_length()
+    local = order.scheduled_time + offset
+    if order.scheduled_time <= datetime.utcnow():
+        raise SlotError("The selected time slot has already passed.")
+    day_starts = _slot_starts(_windows(restaurant.id), local.date())
+    index = bisect_right(day_starts, local) - 1
+    if index < 0 or local >= day_starts[index] + length:
+        raise SlotError("The selected time is outside the restaurant's scheduling hours.")
+
+    if restaurant.slot_capacity is not None:
+        slot_start = day_starts[index] - offset
+        booked = db.session.execute(
+            select(func.count(Order.id)).where(
+                Order.restaurant_id == restaurant.id,
+                Order.is_scheduled == True,
+                Order.scheduled_time >= slot_start,
+                Order.scheduled_time < slot_start + length,
+                Order.status.notin_(SLOT_FREEING_STATUSES)
+            )
+        ).scalar()
+        if booked > restaurant.slot_capacity:
+            raise SlotFull("This time slot is fully booked. Please choose another time.")
+    _mark_stale(restaurant.id, local.date())
+
+
+def release_slot(order):
+    """ Frees a scheduled order's slot in the cached calendar once the current transaction commits. """
+    if order.is_scheduled and order.scheduled_time is not None:
+        _mark_stale(order.restaurant_id, (order.scheduled_time + _utc_offset()).date())
+
+
+def invalidate_slot_calendar(restaurant_id):
+    """ Drops every cached day of a restaurant once the current transaction commits (timeslot changes). """
+    _mark_stale(restaurant_id, None)
+
+
+# --- Invalidation ---
+# Stale (restaurant id, local date) pairs are dropped after commit, so a
+# rolled-back change never evicts anything. A date of None means every day.
+# Other workers catch up within SLOT_CALENDAR_TTL; place_order's check is
+# made against the database, so a stale calendar never overbooks a slot.
+
+def _mark_stale(restaurant_id, day):
+    db.session.info.setdefault('stale_slot_days', set()).add((restaurant_id, day))
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_stale_slot_days(session):
+    stale = session.info.pop('stale_slot_days', None)
+    if not stale or not has_app_context():
+        return
+    cache = _cache()
+    today = local_today()
+    for restaurant_id, day in stale:
+        if day is not None:
+            cache.pop((restaurant_id, day))
+            continue
+        for i in range(-1, current_app.config['SLOT_CALENDAR_DAYS'] + 1):
+            cache.pop((restaurant_id, today + timedelta(days=i)))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_stale_slot_days(session):
+    session.info.pop('stale_slot_days', None)
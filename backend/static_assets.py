@@ -0,0 +1,238 @@
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from collections import namedtuple
+from flask import current_app, request, send_file, abort, Response
+from werkzeug.security import safe_join
+from .compression import precompress_directory, sibling_encodings, negotiate, SIBLING_SUFFIXES
+
+UPLOADS_PREFIX = 'assets/uploads/'
+# Upload names are a uuid or a content hash and are never reused, so their
+# content never changes. Other files are immutable only under a ?v=<fingerprint> URL.
+UPLOAD_NAME_RE = re.compile(r'[0-9a-zA-Z-]+\.(jpg|jpeg|png|webp|json)')
+FINGERPRINT_LENGTH = 12
+# Local src/href attributes in index.html that get a ?v=<fingerprint>.
+ASSET_REF_RE = re.compile(r'(\s(?:src|href)=")/([^"?#]+)(")')
+
+# encodings: {'br' | 'gzip': path of the precompressed sibling}
+Asset = namedtuple('Asset', 'path etag mimetype size mtime immutable encodings')
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fileobj:
+        for block in iter(lambda: fileobj.read(64 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()[:32]
+
+
+def _mimetype(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+class AssetManifest:
+    """
+    In-memory index of the files under the static folder: relative URL path ->
+    Asset with a content-hash ETag. Built once at startup so that serving a
+    file needs no filesystem lookups. Uploads are not scanned; each is added
+    on its first request, and its name is its ETag.
+    """
+
+    def __init__(self, root, autoreload=False):
+        self.root = os.path.abspath(root)
+        self.autoreload = autoreload
+        self.assets = {}
+        self.index = None
+        self._lock = threading.Lock()
+        self.scan()
+
+    def _asset(self, relative, path, stat):
+        if relative.startswith(UPLOADS_PREFIX):
+            etag = os.path.splitext(os.path.basename(relative))[0]
+            return Asset(path, etag, _mimetype(path), stat.st_size, stat.st_mtime, True, {})
+        return Asset(path, _file_hash(path), _mimetype(path), stat.st_size, stat.st_mtime, False,
+                     sibling_encodings(path))
+
+    def scan(self):
+        assets = {}
+        uploads = os.path.join(self.root, UPLOADS_PREFIX.rstrip('/'))
+        for directory, subdirectories, filenames in os.walk(self.root):
+            subdirectories[:] = [name for name in subdirectories
+                                 if not name.startswith('.') and os.path.join(directory, name) != uploads
+                                 and name != 'node_modules']
+            for filename in filenames:
+                if filename.startswith('.') or filename.endswith(tuple(SIBLING_SUFFIXES.values())):
+                    continue
+                path = os.path.join(directory, filename)
+                relative = os.path.relpath(path, self.root).replace(os.sep, '/')
+                assets[relative] = self._asset(relative, path, os.stat(path))
+        with self._lock:
+            self.assets = assets
+            self.index = None
+
+    def _refresh(self, relative, asset):
+        """ Autoreload mode: re-hashes a file that changed on disk since it was indexed. """
+        try:
+            stat = os.stat(asset.path)
+        except OSError:
+            with self._lock:
+                self.assets.pop(relative, None)
+                self.index = None
+            return None
+        if (stat.st_mtime, stat.st_size) != (asset.mtime, asset.size):
+            asset = self._asset(relative, asset.path, stat)
+            with self._lock:
+                self.assets[relative] = asset
+                self.index = None
+        return asset
+
+    def _add_upload(self, relative):
+        name = relative[len(UPLOADS_PREFIX):]
+        if not UPLOAD_NAME_RE.fullmatch(name):
+            return None
+        path = os.path.join(self.root, UPLOADS_PREFIX, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        asset = self._asset(relative, path, stat)
+        with self._lock:
+            self.assets[relative] = asset
+        return asset
+
+    def _add_new_file(self, relative):
+        """ Autoreload mode: picks up a file created after the scan. """
+        path = safe_join(self.root, relative)
+        name = os.path.basename(path or '')
+        if path is None or not os.path.isfile(path) or name.startswith('.') \
+                or name.endswith(tuple(SIBLING_SUFFIXES.values())):
+            return None
+        asset = self._asset(relative, path, os.stat(path))
+        with self._lock:
+            self.assets[relative] = asset
+            self.index = None
+        return asset
+
+    def get(self, relative):
+        asset = self.assets.get(relative)
+        if asset is None:
+            if relative.startswith(UPLOADS_PREFIX):
+                return self._add_upload(relative)
+            return self._add_new_file(relative) if self.autoreload else None
+        if self.autoreload and not asset.immutable:
+            return self._refresh(relative, asset)
+        return asset
+
+    def fingerprint(self, relative):
+        asset = self.get(relative)
+        return asset.etag[:FINGERPRINT_LENGTH] if asset else None
+
+    def index_document(self):
+        """
+        index.html with every local script and stylesheet URL fingerprinted,
+        as (body, etag). Rebuilt only when the manifest changes.
+        """
+        index = self.index
+        if index is None or self.autoreload:
+            if self.autoreload:
+                for relative in list(self.assets):
+                    self.get(relative)
+            with open(os.path.join(self.root, 'index.html'), encoding='utf-8') as fileobj:
+                html = fileobj.read()
+
+            def versioned(match):
+                fingerprint = self.fingerprint(match.group(2))
+                if fingerprint is None:
+                    return match.group(0)
+                return f"{match.group(1)}/{match.group(2)}?v={fingerprint}{match.group(3)}"
+
+            body = ASSET_REF_RE.sub(versioned, html).encode('utf-8')
+            index = (body, hashlib.sha256(body).hexdigest()[:32])
+            self.index = index
+        return index
+
+
+def get_manifest():
+    return current_app.extensions['asset_manifest']
+
+
+def index_response():
+    """ The SPA shell. Always revalidated (it is tiny and names the current asset versions). """
+    body, etag = get_manifest().index_document()
+    response = Response(body, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def serve_static(filename):
+    """
+    Replaces Flask's static view. Files come from the manifest (or their
+    .br/.gz sibling) with a strong ETag, conditional and Range support from
+    send_file, and a year-long immutable Cache-Control when the URL can never
+    change content. Unknown paths without an extension are client-side
+    routes and get index.html.
+    """
+    if filename.startswith('api/'):
+        abort(404)
+    if filename == 'index.html':
+        return index_response()
+    asset = get_manifest().get(filename)
+    if asset is None:
+        if '.' in filename.rsplit('/', 1)[-1]:
+            abort(404)
+        return index_response()
+
+    immutable = asset.immutable or request.args.get('v') == asset.etag[:FINGERPRINT_LENGTH]
+    # Serve a precompressed sibling when the client accepts it (Brotli first).
+    encoding = negotiate(request.accept_encodings, [e for e in ('br', 'gzip') if e in asset.encodings])
+    response = send_file(
+        asset.encodings[encoding] if encoding else asset.path,
+        mimetype=asset.mimetype,
+        conditional=True,
+        etag=f"{asset.etag}-{encoding}" if encoding else asset.etag,
+        last_modified=asset.mtime,
+        max_age=current_app.config['STATIC_IMMUTABLE_MAX_AGE'] if immutable else 0,
+    )
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if asset.encodings:
+        response.vary.add('Accept-Encoding')
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+
+def init_static_assets(app):
+    """
+    Builds the asset manifest and installs the static view. With
+    STATIC_BACKEND = 'whitenoise', WhiteNoise serves the files present at
+    startup in front of the app, and the manifest view still handles uploads
+    added later and the index fallback.
+    """
+    if app.config['STATIC_PRECOMPRESS']:
+        try:
+            precompress_directory(app.static_folder, app.config['COMPRESS_MIN_SIZE'],
+                                  skip=(os.path.join(app.static_folder, UPLOADS_PREFIX.rstrip('/')),))
+        except OSError as e:
+            print(f"Could not precompress static files: {e}")
+    manifest = AssetManifest(app.static_folder, autoreload=app.config['STATIC_AUTORELOAD'])
+    app.extensions['asset_manifest'] = manifest
+    app.view_functions['static'] = serve_static
+
+    if app.config['STATIC_BACKEND'] == 'whitenoise':
+        from whitenoise import WhiteNoise
+        app.wsgi_app = WhiteNoise(
+            app.wsgi_app,
+            root=app.static_folder,
+            prefix='/',
+            autorefresh=app.config['STATIC_AUTORELOAD'],
+            max_age=60,
+            immutable_file_test=lambda path, url: url.lstrip('/').startswith(UPLOADS_PREFIX),
+        )
+    return manifest
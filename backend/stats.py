@@ -0,0 +1,178 @@
+from datetime import date, timedelta
+from flask import request
+from sqlalchemy import select, insert, func, case
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import db, Order, OrderItem, MenuItem, RestaurantDailyStats, MenuItemDailyStats
+
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+# Final statuses whose orders are counted in restaurant_daily_stats.
+STATUS_COUNTERS = {
+    'completed': 'orders_completed',
+    'cancelled': 'orders_cancelled',
+    'rejected': 'orders_rejected',
+    'refunded': 'orders_refunded',
+}
+
+
+def _upsert(model, keys, increments, fixed=None):
+    """
+    Adds `increments` to the counters of the row identified by `keys`, creating
+    it (with the `fixed` column values) if needed, in one atomic statement.
+    Runs in the caller's transaction.
+    """
+    insert_for_dialect = UPSERT_DIALECTS[db.session.get_bind().dialect.name]
+    stmt = insert_for_dialect(model).values(**keys, **(fixed or {}), **increments)
+    columns = model.__table__.c
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: columns[name] + stmt.excluded[name] for name in increments}
+    )
+    db.session.execute(stmt)
+
+
+def _status_contribution(order, status, sign):
+    counter = STATUS_COUNTERS.get(status)
+    if counter is None:
+        return {}
+    values = {counter: sign}
+    if status == 'completed':
+        values['revenue'] = sign * order.total_amount
+        values['discount_total'] = sign * (order.discount_amount or 0)
+        values['items_sold'] = sign * sum(item.quantity for item in order.items)
+    elif status == 'refunded':
+        values['refunded_amount'] = sign * order.total_amount
+    return values
+
+
+def record_order_transition(order, old_status):
+    """
+    Updates the daily rollups for an order that was just placed (`old_status`
+    is None) or moved from `old_status` to `order.status`. Call before commit.
+    """
+    if order.created_at is None:
+        db.session.flush()
+    day = order.created_at.date()
+    values = {}
+    if old_status is None:
+        values.update(orders_placed=1, placed_amount=order.total_amount)
+        for item in order.items:
+            _upsert(MenuItemDailyStats, {'menu_item_id': item.menu_item_id, 'day': day},
+                    {'order_lines': 1, 'quantity': item.quantity},
+                    fixed={'restaurant_id': order.restaurant_id})
+    else:
+        for name, value in _status_contribution(order, old_status, -1).items():
+            values[name] = values.get(name, 0) + value
+    for name, value in _status_contribution(order, order.status, 1).items():
+        values[name] = values.get(name, 0) + value
+
+    if values:
+        _upsert(RestaurantDailyStats, {'restaurant_id': order.restaurant_id, 'day': day}, values)
+
+
+def rebuild_daily_stats():
+    """ Recomputes both rollup tables from the orders. Returns the number of restaurant-days. """
+    items_per_order = select(
+        OrderItem.order_id,
+        func.sum(OrderItem.quantity).label('quantity')
+    ).group_by(OrderItem.order_id).subquery()
+
+    day = func.date(Order.created_at)
+    completed = Order.status == 'completed'
+
+    def total_when(condition, value):
+        return func.coalesce(func.sum(case((condition, value), else_=0)), 0)
+
+    restaurant_rollup = select(
+        Order.restaurant_id,
+        day,
+        func.count(Order.id),
+        func.sum(Order.total_amount),
+        total_when(completed, 1),
+        total_when(Order.status == 'cancelled', 1),
+        total_when(Order.status == 'rejected', 1),
+        total_when(Order.status == 'refunded', 1),
+        total_when(completed, Order.total_amount),
+        total_when(completed, func.coalesce(Order.discount_amount, 0)),
+        total_when(completed, func.coalesce(items_per_order.c.quantity, 0)),
+        total_when(Order.status == 'refunded', Order.total_amount),
+    ).outerjoin(items_per_order, items_per_order.c.order_id == Order.id)\
+     .group_by(Order.restaurant_id, day)
+
+    item_rollup = select(
+        OrderItem.menu_item_id,
+        day,
+        MenuItem.restaurant_id,
+        func.count(OrderItem.id),
+        func.sum(OrderItem.quantity),
+    ).join(Order, OrderItem.order_id == Order.id)\
+     .join(MenuItem, OrderItem.menu_item_id == MenuItem.id)\
+     .group_by(OrderItem.menu_item_id, day, MenuItem.restaurant_id)
+
+    db.session.execute(RestaurantDailyStats.__table__.delete())
+    db.session.execute(MenuItemDailyStats.__table__.delete())
+    result = db.session.execute(insert(RestaurantDailyStats).from_select([
+        'restaurant_id', 'day', 'orders_placed', 'placed_amount',
+        'orders_completed', 'orders_cancelled', 'orders_rejected', 'orders_refunded',
+        'revenue', 'discount_total', 'items_sold', 'refunded_amount',
+    ], restaurant_rollup))
+    db.session.execute(insert(MenuItemDailyStats).from_select([
+        'menu_item_id', 'day', 'restaurant_id', 'order_lines', 'quantity',
+    ], item_rollup))
+    db.session.commit()
+    return result.rowcount
+
+
+def date_range_args(default_days=None):
+    """
+    Reads an inclusive ?start=YYYY-MM-DD&end=YYYY-MM-DD range. Without `start`,
+    the range covers the last `default_days` days (or all time if None).
+    Raises ValueError for malformed or reversed dates.
+    """
+    end = date.fromisoformat(request.args['end']) if request.args.get('end') else date.today()
+    if request.args.get('start'):
+        start = date.fromisoformat(request.args['start'])
+    elif default_days is not None:
+        start = end - timedelta(days=default_days - 1)
+    else:
+        start = None
+    if start is not None and start > end:
+        raise ValueError("start must not be after end.")
+    return start, end
+
+
+def restaurant_stats_query(*columns, start=None, end=None):
+    """ A query over restaurant_daily_stats restricted to [start, end]. """
+    query = db.session.query(*columns)
+    if start is not None:
+        query = query.filter(RestaurantDailyStats.day >= start)
+    if end is not None:
+        query = query.filter(RestaurantDailyStats.day <= end)
+    return query
+
+
+def daily_series(rows, start, end):
+    """ Expands {day: value} rows into one (day, value) per day of [start, end], filling gaps with 0. """
+    by_day = {}
+    for day, value in rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        by_day[day] = value or 0
+    return [(start + timedelta(days=i), by_day.get(start + timedelta(days=i), 0))
+            for i in range((end - start).days + 1)]
+
+
+def popular_items(restaurant_id, start=None, end=None, limit=5):
+    """ The restaurant's most ordered menu items as (name, order_lines), over [start, end]. """
+    query = db.session.query(MenuItem.name, func.sum(MenuItemDailyStats.order_lines).label('order_count'))\
+        .join(MenuItemDailyStats, MenuItem.id == MenuItemDailyStats.menu_item_id)\
+        .filter(MenuItemDailyStats.restaurant_id == restaurant_id)
+    if start is not None:
+        query = query.filter(MenuItemDailyStats.day >= start)
+    if end is not None:
+        query = query.filter(MenuItemDailyStats.day <= end)
+    return query.group_by(MenuItem.name)\
+        .order_by(func.sum(MenuItemDailyStats.order_lines).desc()).limit(limit).all()
@@ -2,7 +2,10 @@ const MenuItem = {
     props: ['item'],
     template: `
         <div class="card menu-card h-100">
-            <img :src="item.image" class="card-img-top" :alt="item.name">
+            <picture>
+                <source v-if="srcset('webp')" type="image/webp" :srcset="srcset('webp')" :sizes="imageSizes">
+                <img :src="item.image" :srcset="srcset('jpg')" :sizes="imageSizes" class="card-img-top" :alt="item.name">
+            </picture>
             <div class="card-body d-flex flex-column">
                 <h5 class="card-title">{{ item.name }}</h5>                
                 <p v-if="item.description" class="card-text text-muted small flex-grow-1">
@@ -17,7 +20,16 @@ const MenuItem = {
             </div>
         </div>
     `,
+    data() {
+        return {
+            // Cards are one per row on phones and three per row from the md breakpoint up.
+            imageSizes: '(max-width: 767px) 100vw, 33vw'
+        };
+    },
     methods: {
+        srcset(extension) {
+            return imageSrcset(this.item.image, extension);
+        },
         addToCart() {
             // Emits an event to the parent component (CustomerRestaurantDetailPage)
             this.$emit('add-to-cart', this.item);
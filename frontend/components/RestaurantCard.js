@@ -2,7 +2,10 @@ const RestaurantCard = {
     props: ['restaurant'],
     template: `
         <div class="card restaurant-card h-100">
-            <img :src="restaurant.image" class="card-img-top" :alt="restaurant.name">
+            <picture>
+                <source v-if="srcset('webp')" type="image/webp" :srcset="srcset('webp')" :sizes="imageSizes">
+                <img :src="restaurant.image" :srcset="srcset('jpg')" :sizes="imageSizes" class="card-img-top" :alt="restaurant.name">
+            </picture>
             <div class="card-body">
                 <h5 class="card-title">{{ restaurant.name }}</h5>
                 <p class="card-text text-muted">{{ restaurant.cuisine }}</p>
@@ -20,7 +23,16 @@ const RestaurantCard = {
             </div>
         </div>
     `,
+    data() {
+        return {
+            // Cards are one per row on phones and three per row from the md breakpoint up.
+            imageSizes: '(max-width: 767px) 100vw, 33vw'
+        };
+    },
     methods: {
+        srcset(extension) {
+            return imageSrcset(this.restaurant.image, extension);
+        },
         viewMenu() {
             console.log('Navigating to restaurant:', this.restaurant.id);
             this.$router.push({ name: 'RestaurantDetail', params: { id: this.restaurant.id } });
@@ -93,12 +93,12 @@ const AdminDashboardPage = {
         }
     },
     methods: {
-        async fetchDashboardData() {
+        async fetchDashboardData(refresh = false) {
             this.loading = true;
             this.error = null;
             try {
-                // Use apiService.get
-                const data = await apiService.get('/api/admin/dashboard');
+                // The dashboard is cached server-side; refresh=1 forces fresh figures
+                const data = await apiService.get(`/api/admin/dashboard${refresh ? '?refresh=1' : ''}`);
                 this.stats = data.stats;
                 this.pendingRestaurants = data.pendingRestaurants;
             } catch (err) {
@@ -117,7 +117,7 @@ const AdminDashboardPage = {
                 const data = await apiService.patch(`/api/admin/restaurants/${restaurantId}/verify`);
                 alert(data.message);
                 // Refresh the dashboard data after approval.
-                this.fetchDashboardData();
+                this.fetchDashboardData(true);
             } catch (err) {
                  console.error("Error approving restaurant:", err);
                 alert('Error: ' + err.message);
@@ -16,10 +16,10 @@ const AdminOrderManagementPage = {
                 <div class="card-header bg-white">
                     <div class="row align-items-center">
                         <div class="col-md-4">
-                            <input type="text" v-model="searchQuery" @input="fetchOrders" class="form-control" placeholder="Search by Order ID, Customer, or Restaurant...">
+                            <input type="text" v-model="searchQuery" @input="fetchOrders()" class="form-control" placeholder="Search by Order ID, Customer, or Restaurant...">
                         </div>
                         <div class="col-md-3">
-                            <select class="form-control" v-model="filterStatus" @change="fetchOrders">
+                            <select class="form-control" v-model="filterStatus" @change="fetchOrders()">
                                 <option value="All">All Statuses</option>
                                 <option value="Placed">Placed</option>
                                 <option value="Preparing">Preparing</option>
@@ -68,6 +68,11 @@ const AdminOrderManagementPage = {
                             </tbody>
                         </table>
                     </div>
+                    <div v-if="nextCursor" class="text-center">
+                        <button class="btn btn-outline-secondary" @click="fetchOrders(true)" :disabled="loadingMore">
+                            {{ loadingMore ? 'Loading...' : 'Load more' }}
+                        </button>
+                    </div>
                 </div>
             </div>
         </div>
@@ -79,26 +84,34 @@ const AdminOrderManagementPage = {
             searchQuery: '',
             filterStatus: 'All',
             orders: [],
+            nextCursor: null,
+            loadingMore: false,
             isExporting: false,
         };
     },
     methods: {
-        async fetchOrders() {
+        async fetchOrders(loadMore = false) {
             this.error = null;
             if (this.orders.length === 0) {
                 this.loading = true;
             }
+            this.loadingMore = loadMore;
             try {
-                const params = new URLSearchParams();
+                const params = new URLSearchParams({ limit: 50 });
                 if (this.searchQuery) params.append('search', this.searchQuery);
                 if (this.filterStatus) params.append('status', this.filterStatus);
+                if (loadMore && this.nextCursor) params.append('cursor', this.nextCursor);
                 
+                // The list is paged server-side
                 const endpoint = `/api/admin/orders?${params.toString()}`;
-                this.orders = await apiService.get(endpoint);
+                const data = await apiService.get(endpoint);
+                this.orders = loadMore ? this.orders.concat(data.items) : data.items;
+                this.nextCursor = data.nextCursor;
             } catch (err) {
                 this.error = err.message;
             } finally {
                 this.loading = false;
+                this.loadingMore = false;
             }
         },
         viewDetails(orderId) {
@@ -118,18 +131,8 @@ const AdminOrderManagementPage = {
         async exportData() {
             this.isExporting = true;
             try {
-                // NOTE: This uses fetch directly because apiService is built for JSON,
-                // and this endpoint returns an Excel file (blob).
-                const token = this.$store.state.token;
-                const response = await fetch(`${window.API_URL}/api/admin/orders/export`, {
-                    headers: { 'Authentication-Token': token }
-                });
-
-                if (!response.ok) {
-                    throw new Error('Failed to download file.');
-                }
-                
-                const blob = await response.blob();
+                // Runs as a background job, so large exports don't time out
+                const blob = await apiService.exportFile('orders');
                 const url = window.URL.createObjectURL(blob);
                 const a = document.createElement('a');
                 a.style.display = 'none';
@@ -24,11 +24,11 @@ const AdminRestaurantManagementPage = {
                             <input type="text" v-model="searchQuery" @input="debouncedFetchRestaurants" class="form-control" placeholder="Search by name, owner, or city...">
                         </div>
                         <div class="col-md-3">
-                            <select class="form-control" v-model="filterStatus" @change="fetchRestaurants">
-                                <option value="All">All Statuses</option>
-                                <option value="Verified">Verified</option>
-                                <option value="Pending">Pending</option>
-                                <option value="Blocked">Blocked</option>
+                            <select class="form-control" v-model="filterStatus" @change="fetchRestaurants()">
+                                <option value="All">All Statuses ({{ totalCount }})</option>
+                                <option value="Verified">Verified ({{ statusCounts.Verified }})</option>
+                                <option value="Pending">Pending ({{ statusCounts.Pending }})</option>
+                                <option value="Blocked">Blocked ({{ statusCounts.Blocked }})</option>
                             </select>
                         </div>
                     </div>
@@ -67,6 +67,11 @@ const AdminRestaurantManagementPage = {
                             </tbody>
                         </table>
                     </div>
+                    <div v-if="nextCursor" class="text-center">
+                        <button class="btn btn-outline-secondary" @click="fetchRestaurants(true)" :disabled="loadingMore">
+                            {{ loadingMore ? 'Loading...' : 'Load more' }}
+                        </button>
+                    </div>
                 </div>
             </div>
 
@@ -137,6 +142,9 @@ const AdminRestaurantManagementPage = {
             searchQuery: '',
             filterStatus: 'All',
             restaurants: [],
+            statusCounts: { Verified: 0, Pending: 0, Blocked: 0 },
+            nextCursor: null,
+            loadingMore: false,
             isEditMode: false,
             currentRestaurant: {
                 id: null, name: '', ownerEmail: '', address: '', city: '',
@@ -148,6 +156,11 @@ const AdminRestaurantManagementPage = {
             debounceTimer: null,
         };
     },
+    computed: {
+        totalCount() {
+            return this.statusCounts.Verified + this.statusCounts.Pending + this.statusCounts.Blocked;
+        }
+    },
     methods: {
         debouncedFetchRestaurants() {
             clearTimeout(this.debounceTimer);
@@ -155,24 +168,30 @@ const AdminRestaurantManagementPage = {
                 this.fetchRestaurants();
             }, 500);
         },
-        async fetchRestaurants() {
+        async fetchRestaurants(loadMore = false) {
             this.error = null;
             // Only set loading on initial load
             if (this.restaurants.length === 0) {
                  this.loading = true;
             }
+            this.loadingMore = loadMore;
             try {
-                const params = new URLSearchParams();
+                const params = new URLSearchParams({ limit: 50 });
                 if (this.searchQuery) params.append('search', this.searchQuery);
                 if (this.filterStatus && this.filterStatus !== 'All') params.append('status', this.filterStatus);
+                if (loadMore && this.nextCursor) params.append('cursor', this.nextCursor);
 
-                // Use apiService.get
-                this.restaurants = await apiService.get(`/api/admin/restaurants?${params.toString()}`);
+                // Use apiService.get; the list is paged server-side
+                const data = await apiService.get(`/api/admin/restaurants?${params.toString()}`);
+                this.restaurants = loadMore ? this.restaurants.concat(data.items) : data.items;
+                this.nextCursor = data.nextCursor;
+                this.statusCounts = data.statusCounts;
             } catch (err) {
                 this.error = err.message;
                  console.error("Error fetching restaurants:", err);
             } finally {
                 this.loading = false;
+                this.loadingMore = false;
             }
         },
         statusBadgeClass(status) {
@@ -279,8 +298,8 @@ const AdminRestaurantManagementPage = {
         async exportData() {
             this.isExporting = true;
             try {
-                 // Use apiService.download
-                 const blob = await apiService.download('/api/admin/restaurants/export');
+                 // Runs as a background job, so large exports don't time out
+                 const blob = await apiService.exportFile('restaurants');
                  if (!blob) throw new Error("Received empty export file.");
 
                 const url = window.URL.createObjectURL(blob);
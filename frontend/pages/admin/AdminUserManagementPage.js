@@ -55,6 +55,11 @@ const AdminUserManagementPage = {
                             </tbody>
                         </table>
                     </div>
+                    <div v-if="nextCursor" class="text-center">
+                        <button class="btn btn-outline-secondary" @click="fetchUsers(true)" :disabled="loadingMore">
+                            {{ loadingMore ? 'Loading...' : 'Load more' }}
+                        </button>
+                    </div>
                 </div>
             </div>
         </div>
@@ -65,6 +70,8 @@ const AdminUserManagementPage = {
             error: null,
             searchQuery: '',
             users: [],
+            nextCursor: null,
+            loadingMore: false,
             isExporting: false,
              debounceTimer: null,
         };
@@ -76,22 +83,27 @@ const AdminUserManagementPage = {
                  this.fetchUsers();
              }, 500); // 500ms delay
          },
-        async fetchUsers() {
+        async fetchUsers(loadMore = false) {
             this.error = null;
              // Only show main loading indicator on initial load
              if (this.users.length === 0) {
                  this.loading = true;
              }
+            this.loadingMore = loadMore;
             try {
-                const params = new URLSearchParams();
+                const params = new URLSearchParams({ limit: 50 });
                 if (this.searchQuery) params.append('search', this.searchQuery);
-                // Use apiService.get
-                this.users = await apiService.get(`/api/admin/users?${params.toString()}`);
+                if (loadMore && this.nextCursor) params.append('cursor', this.nextCursor);
+                // Use apiService.get; the list is paged server-side
+                const data = await apiService.get(`/api/admin/users?${params.toString()}`);
+                this.users = loadMore ? this.users.concat(data.items) : data.items;
+                this.nextCursor = data.nextCursor;
             } catch (err) {
                 this.error = err.message;
                  console.error("Error fetching users:", err);
             } finally {
                 this.loading = false;
+                this.loadingMore = false;
             }
         },
         async blockUser(user) {
@@ -121,8 +133,8 @@ const AdminUserManagementPage = {
         async exportData() {
             this.isExporting = true;
             try {
-                 // Use apiService.download
-                 const blob = await apiService.download('/api/admin/users/export');
+                 // Runs as a background job, so large exports don't time out
+                 const blob = await apiService.exportFile('users');
                  if (!blob) throw new Error("Received empty export file.");
 
                 // Create a link and click it to trigger download
@@ -58,8 +58,8 @@ const CustomerCheckoutPage = {
                                         <label for="scheduleTime">Select Time</label>
                                         <select id="scheduleTime" class="form-control" v-model="selectedTime" required>
                                             <option :value="null">-- Please select --</option>
-                                            <option v-for="slot in slotsForSelectedDay" :key="slot.value" :value="slot.value">
-                                                {{ slot.display }}
+                                            <option v-for="slot in slotsForSelectedDay" :key="slot.value" :value="slot.value" :disabled="slot.full">
+                                                {{ slot.display }}{{ slot.full ? ' (Full)' : (slot.remaining !== null && slot.remaining <= 3 ? ' (' + slot.remaining + ' left)' : '') }}
                                             </option>
                                         </select>
                                     </div>
@@ -211,7 +211,7 @@ const CustomerCheckoutPage = {
             this.slotsError = null;
             try {
                 // ✅ UPDATED: Use apiService.get
-                this.availableDays = await apiService.get(`/api/restaurant/${this.cartRestaurantId}/available-slots`);
+                this.availableDays = await apiService.get(`/api/restaurants/${this.cartRestaurantId}/available-slots`);
                 if (this.availableDays.length === 0) {
                     this.slotsError = "This restaurant has no scheduled time slots available for any day.";
                 } else {
@@ -274,13 +274,10 @@ const CustomerCheckoutPage = {
                 return;
             }
             
-            // Construct the full ISO 8601-like string for the backend
+            // A slot's value is already its full UTC start time, e.g. "2025-10-25T09:00:00Z"
             let fullScheduledTime = null;
             if(this.isScheduling && this.selectedDate && this.selectedTime) {
-                // e.g., "2025-10-25" + "T" + "14:30:00"
-                // Assuming selectedTime is "HH:MM" (like 14:30), we add ":00" for seconds.
-                // If your backend is flexible, "YYYY-MM-DDTHH:MM" might also work.
-                fullScheduledTime = `${this.selectedDate}T${this.selectedTime}:00`; 
+                fullScheduledTime = this.selectedTime;
             }
 
             const payload = {
@@ -12,7 +12,36 @@ const CustomerHomePage = {
                 <div class="container">
                     <h1 class="hero-title">Delicious food, delivered.</h1>
                     <p class="lead text-muted">The best restaurants at your fingertips.</p>
-                    <button class="btn btn-brand btn-lg mt-3" @click="scrollToFeatured">Browse Restaurants</button>
+                    <form class="form-inline justify-content-center mt-3" @submit.prevent="runSearch">
+                        <input type="search" class="form-control form-control-lg mr-2" list="search-suggestions"
+                               v-model="searchQuery" @input="debouncedAutocomplete" placeholder="Search restaurants or dishes, e.g. biryani">
+                        <datalist id="search-suggestions">
+                            <option v-for="s in suggestions" :key="s.type + s.text" :value="s.text"></option>
+                        </datalist>
+                        <button type="submit" class="btn btn-brand btn-lg">Search</button>
+                    </form>
+                    <button class="btn btn-link mt-2" @click="scrollToFeatured">Browse Restaurants</button>
+                </div>
+            </section>
+
+            <!-- SEARCH RESULTS -->
+            <section class="container" v-if="searchResults">
+                <h2>Results for "{{ searchResults.query }}"</h2>
+                <p v-if="searchResults.restaurants.length === 0 && searchResults.dishes.length === 0" class="text-muted">
+                    Nothing matched your search.
+                </p>
+                <div v-if="searchResults.restaurants.length" class="list-group mb-4">
+                    <router-link v-for="r in searchResults.restaurants" :key="'r' + r.id"
+                                 :to="{ name: 'RestaurantDetail', params: { id: r.id } }" class="list-group-item list-group-item-action">
+                        <strong>{{ r.name }}</strong> <small class="text-muted">{{ r.city }}</small>
+                    </router-link>
+                </div>
+                <div v-if="searchResults.dishes.length" class="list-group mb-4">
+                    <router-link v-for="d in searchResults.dishes" :key="'d' + d.id"
+                                 :to="{ name: 'RestaurantDetail', params: { id: d.restaurant_id } }" class="list-group-item list-group-item-action d-flex justify-content-between">
+                        <span><strong>{{ d.name }}</strong> <small class="text-muted">at {{ d.restaurantName }}, {{ d.city }}</small></span>
+                        <span>₹{{ d.price }} <small v-if="!d.is_available" class="text-muted">(unavailable)</small></span>
+                    </router-link>
                 </div>
             </section>
             
@@ -67,9 +96,42 @@ const CustomerHomePage = {
             locationError: null,
             menuError: null,
             isLocating: true,
+            searchQuery: '',
+            suggestions: [],
+            searchResults: null,
+            autocompleteTimer: null,
         };
     },
     methods: {
+        // --- CATALOG SEARCH ---
+        debouncedAutocomplete() {
+            clearTimeout(this.autocompleteTimer);
+            this.autocompleteTimer = setTimeout(async () => {
+                if (this.searchQuery.trim().length < 2) {
+                    this.suggestions = [];
+                    return;
+                }
+                try {
+                    this.suggestions = await apiService.get(`/api/search/autocomplete?q=${encodeURIComponent(this.searchQuery)}`);
+                } catch (err) {
+                    this.suggestions = [];
+                }
+            }, 200);
+        },
+        async runSearch() {
+            const query = this.searchQuery.trim();
+            if (!query) {
+                this.searchResults = null;
+                return;
+            }
+            try {
+                const data = await apiService.get(`/api/search?q=${encodeURIComponent(query)}`);
+                this.searchResults = { query, ...data };
+            } catch (err) {
+                console.error("Search failed:", err);
+                this.searchResults = { query, restaurants: [], dishes: [] };
+            }
+        },
         // --- GEOLOCATION AND DATA FETCHING LOGIC ---
         findNearbyRestaurants() {
             this.isLocating = true;
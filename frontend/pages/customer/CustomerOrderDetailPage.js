@@ -79,26 +79,49 @@ const CustomerOrderDetailPage = {
         return {
             loading: true,
             error: null,
-            order: null
+            order: null,
+            eventSource: null // Live status updates (Server-Sent Events)
         };
     },
-    async mounted() {
-        this.loading = true;
-        this.error = null;
-        try {
+    methods: {
+        async fetchOrder() {
             // Get the order ID from the URL parameter
             const orderId = this.$route.params.id;
             
             // ✅ UPDATED: Use apiService.get
             // It automatically handles the token and relative path
             this.order = await apiService.get(`/api/orders/${orderId}`);
-            
+        },
+        openStream() {
+            const token = localStorage.getItem('auth-token');
+            if (!window.EventSource || !token) return;
+            const orderId = this.$route.params.id;
+            // EventSource cannot send headers, so the token goes in the query string
+            this.eventSource = new EventSource(`/api/orders/${orderId}/stream?auth_token=${encodeURIComponent(token)}`);
+            ['order_updated', 'order_completed', 'order_refunded'].forEach(type => {
+                this.eventSource.addEventListener(type, () => {
+                    this.fetchOrder().catch(err => console.error("Error refreshing order:", err));
+                });
+            });
+        }
+    },
+    async mounted() {
+        this.loading = true;
+        this.error = null;
+        try {
+            await this.fetchOrder();
+            this.openStream();
         } catch (err) {
             this.error = err.message;
             console.error("Error fetching order details:", err);
         } finally {
             this.loading = false;
         }
+    },
+    beforeDestroy() {
+        if (this.eventSource) {
+            this.eventSource.close();
+        }
     }
 };
 // NOTE: No export default needed
@@ -52,6 +52,11 @@ const CustomerOrderHistoryPage = {
                         <review-form @review-submitted="submitReviewForOrder(order.id, $event)"></review-form>
                     </div>
                 </div>
+                <div v-if="nextCursor" class="text-center">
+                    <button class="btn btn-outline-secondary" @click="fetchOrderHistory(true)" :disabled="loadingMore">
+                        {{ loadingMore ? 'Loading...' : 'Load more' }}
+                    </button>
+                </div>
             </div>
             
             <!-- Empty state if no orders are found -->
@@ -68,21 +73,29 @@ const CustomerOrderHistoryPage = {
             loading: true,
             error: null,
             orders: [],
+            nextCursor: null,
+            loadingMore: false,
             activeReviewOrderId: null, // Tracks which order's review form is open
         };
     },
     methods: {
-        async fetchOrderHistory() {
-            this.loading = true;
+        async fetchOrderHistory(loadMore = false) {
+            this.loading = !loadMore;
+            this.loadingMore = loadMore;
             this.error = null;
             try {
-                // ✅ UPDATED: Use apiService.get
-                this.orders = await apiService.get('/api/orders');
+                // ✅ UPDATED: Use apiService.get; the history is paged server-side
+                const params = new URLSearchParams({ limit: 20 });
+                if (loadMore && this.nextCursor) params.append('cursor', this.nextCursor);
+                const data = await apiService.get(`/api/orders?${params.toString()}`);
+                this.orders = loadMore ? this.orders.concat(data.items) : data.items;
+                this.nextCursor = data.nextCursor;
             } catch (err) {
                 this.error = err.message;
                 console.error("Error fetching order history:", err);
             } finally {
                 this.loading = false;
+                this.loadingMore = false;
             }
         },
         viewOrderDetails(orderId) {
@@ -21,12 +21,21 @@ const RestaurantMenuManagementPage = {
                         <p class="text-muted">Save time by uploading all your categories and menu items at once using our Excel template.</p>
                         <div v-if="uploadError" class="alert alert-danger">{{ uploadError }}</div>
                         <div v-if="uploadSuccess" class="alert alert-success">{{ uploadSuccess }}</div>
+                        <div v-if="uploadRowErrors.length" class="alert alert-warning">
+                            <strong>Skipped rows</strong>
+                            <ul class="mb-0 pl-3">
+                                <li v-for="rowError in uploadRowErrors" :key="String(rowError.row) + rowError.message">
+                                    <span v-if="rowError.row">Row {{ rowError.row }}: </span>{{ rowError.message }}
+                                </li>
+                            </ul>
+                            <small v-if="uploadErrorCount > uploadRowErrors.length">...and {{ uploadErrorCount - uploadRowErrors.length }} more.</small>
+                        </div>
                         <div class="d-flex align-items-center">
                             <button class="btn btn-outline-secondary mr-3" @click="downloadTemplate">
                                 <i class="fas fa-download mr-2"></i>Download Template
                             </button>
                             <div class="custom-file">
-                                <input type="file" class="custom-file-input" id="menuFile" @change="handleFileSelect" accept=".xlsx">
+                                <input type="file" class="custom-file-input" id="menuFile" @change="handleFileSelect" accept=".xlsx,.csv">
                                 <label class="custom-file-label" for="menuFile">{{ selectedFile ? selectedFile.name : 'Choose Excel file...' }}</label>
                             </div>
                             <button class="btn btn-brand ml-3" @click="handleFileUpload" :disabled="!selectedFile || isUploading">
@@ -113,6 +122,7 @@ const RestaurantMenuManagementPage = {
         return { 
             loading: true, error: null, categories: [], isEditMode: false, currentItem: {},
             isUploading: false, uploadError: null, uploadSuccess: null, selectedFile: null,
+            uploadRowErrors: [], uploadErrorCount: 0,
             isSaving: false, imageFile: null, imagePreview: null
         };
     },
@@ -223,7 +233,7 @@ const RestaurantMenuManagementPage = {
             XLSX.writeFile(workbook, "menu_template.xlsx");
         },
         handleFileSelect(event) {
-            this.uploadSuccess = null; this.uploadError = null;
+            this.uploadSuccess = null; this.uploadError = null; this.uploadRowErrors = [];
             this.selectedFile = event.target.files[0];
             // Update file label
              const label = document.querySelector('.custom-file-label[for="menuFile"]');
@@ -233,13 +243,15 @@ const RestaurantMenuManagementPage = {
         },
         async handleFileUpload() {
             if (!this.selectedFile) { this.uploadError = "Please select a file first."; return; }
-            this.isUploading = true; this.uploadError = null; this.uploadSuccess = null;
+            this.isUploading = true; this.uploadError = null; this.uploadSuccess = null; this.uploadRowErrors = [];
             const formData = new FormData();
             formData.append('menu_file', this.selectedFile);
             try {
                 // ✅ UPDATED: Use apiService.post
                 const data = await apiService.post('/api/restaurant/menu/bulk-upload', formData);
                 this.uploadSuccess = data.message;
+                this.uploadRowErrors = data.errors || [];
+                this.uploadErrorCount = data.errorCount || 0;
                 this.selectedFile = null; 
                 document.getElementById('menuFile').value = null;
                 // Reset file label
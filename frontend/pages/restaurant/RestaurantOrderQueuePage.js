@@ -4,7 +4,18 @@ const RestaurantOrderQueuePage = {
     template: `
         <div class="admin-container">
             <h2 class="admin-page-title">Live Order Queue</h2>
-            <p class="text-muted">This page automatically refreshes every 30 seconds with new and updated orders.</p>
+            <p class="text-muted">New and updated orders appear automatically.</p>
+
+            <ul class="nav nav-tabs mb-4">
+                <li class="nav-item">
+                    <a class="nav-link" :class="{ active: tab === 'live' }" href="#" @click.prevent="tab = 'live'">Live Queue</a>
+                </li>
+                <li class="nav-item">
+                    <a class="nav-link" :class="{ active: tab === 'upcoming' }" href="#" @click.prevent="tab = 'upcoming'">
+                        Upcoming <span class="badge badge-secondary">{{ upcomingOrders.length }}</span>
+                    </a>
+                </li>
+            </ul>
 
             <div v-if="loading" class="text-center p-5">
                 <div class="spinner-border text-brand" role="status">
@@ -14,7 +25,29 @@ const RestaurantOrderQueuePage = {
             </div>
             <div v-if="error" class="alert alert-danger">{{ error }}</div>
 
-            <div v-if="!loading && !error" class="row">
+            <!-- Upcoming: scheduled orders that enter the live queue shortly before their time -->
+            <div v-if="!loading && !error && tab === 'upcoming'">
+                <div v-if="upcomingOrders.length === 0" class="text-center text-muted p-5">
+                    <i class="fas fa-calendar-alt fa-2x mb-2"></i>
+                    <p>No upcoming scheduled orders.</p>
+                </div>
+                <div v-for="order in upcomingOrders" :key="order.id" class="card order-card">
+                    <div class="card-body">
+                        <div class="d-flex justify-content-between">
+                            <h5 class="card-title font-weight-bold">Order #{{ order.id }}</h5>
+                            <span class="text-muted small">Moves to queue: {{ order.releaseTime }}</span>
+                        </div>
+                        <h6 class="card-subtitle mb-2 text-muted">For: {{ order.customerName }}</h6>
+                        <div class="alert alert-info small p-2 mt-2 mb-2">
+                            <i class="fas fa-calendar-alt mr-2"></i>
+                            <strong>Scheduled: {{ order.scheduled_date }}, {{ order.scheduled_time }}</strong>
+                        </div>
+                        <ul class="item-list list-unstyled"><li v-for="item in order.items" :key="item.name">{{ item.quantity }} x {{ item.name }}</li></ul>
+                    </div>
+                </div>
+            </div>
+
+            <div v-if="!loading && !error && tab === 'live'" class="row">
 
                 <!-- New Orders Column -->
                 <div class="col-lg-4 mb-4">
@@ -138,7 +171,12 @@ const RestaurantOrderQueuePage = {
             loading: true,
             error: null,
             orders: [],
-            intervalId: null, // To store the timer for auto-refresh
+            upcomingOrders: [], // Scheduled orders not yet released to the live queue
+            tab: 'live',
+            version: 0, // Last order version received; 0 requests a full snapshot
+            intervalId: null, // Polling timer: every 30 s while the live stream is down, every 60 s while it is up
+            pollInterval: null,
+            eventSource: null, // Live order stream (Server-Sent Events)
             otpInputs: {}, // Object to hold OTP input for each order
         };
     },
@@ -152,12 +190,21 @@ const RestaurantOrderQueuePage = {
         async fetchOrders() {
             this.error = null;
             try {
-                // ✅ UPDATED: Use apiService.get
-                const data = await apiService.get('/api/restaurant/orders');
-                this.orders = data;
+                // Only orders changed since the last known version are sent back
+                const data = await apiService.get(`/api/restaurant/orders?since=${this.version}`);
+                if (data.full) {
+                    this.orders = data.orders;
+                } else {
+                    const changedIds = new Set(data.orders.map(o => o.id));
+                    const removedIds = new Set(data.removed);
+                    this.orders = this.orders
+                        .filter(o => !changedIds.has(o.id) && !removedIds.has(o.id))
+                        .concat(data.orders);
+                }
+                this.version = data.version;
                 
                 // Initialize otpInputs for new orders that aren't in the object yet
-                data.forEach(order => {
+                data.orders.forEach(order => {
                     if (!this.otpInputs.hasOwnProperty(order.id)) {
                         // Use Vue.set to make the new property reactive
                         this.$set(this.otpInputs, order.id, '');
@@ -166,11 +213,57 @@ const RestaurantOrderQueuePage = {
             } catch (err) {
                 this.error = "Failed to load orders: " + err.message;
                 console.error("Error fetching orders:", err);
-                clearInterval(this.intervalId); // Stop polling on error
+                this.stopPolling(); // Stop polling on error
             } finally {
                 this.loading = false;
             }
         },
+        async fetchUpcoming() {
+            try {
+                this.upcomingOrders = await apiService.get('/api/restaurant/orders/upcoming');
+            } catch (err) {
+                console.error("Error fetching upcoming orders:", err);
+            }
+        },
+        refresh() {
+            this.fetchOrders();
+            this.fetchUpcoming();
+        },
+        startPolling(interval = 30000) {
+            if (this.intervalId && this.pollInterval === interval) return;
+            this.stopPolling();
+            this.pollInterval = interval;
+            this.intervalId = setInterval(this.refresh, interval);
+        },
+        stopPolling() {
+            clearInterval(this.intervalId);
+            this.intervalId = null;
+            this.pollInterval = null;
+        },
+        openStream() {
+            const token = localStorage.getItem('auth-token');
+            if (!window.EventSource || !token) {
+                this.startPolling();
+                return;
+            }
+            // EventSource cannot send headers, so the token goes in the query string
+            this.eventSource = new EventSource(`/api/restaurant/orders/stream?auth_token=${encodeURIComponent(token)}`);
+            this.eventSource.onopen = () => {
+                // Keep a slow poll as a safety net in case an event is missed
+                this.startPolling(60000);
+                this.refresh(); // Catch up on anything missed while disconnected
+            };
+            this.eventSource.onerror = () => {
+                // The browser reconnects on its own; poll until it does
+                this.startPolling();
+            };
+            ['order_placed', 'order_updated', 'order_completed', 'order_refunded'].forEach(type => {
+                this.eventSource.addEventListener(type, () => this.fetchOrders());
+            });
+            this.eventSource.addEventListener('order_scheduled', () => this.fetchUpcoming());
+            // A held scheduled order reached its lead time and joined the live queue
+            this.eventSource.addEventListener('order_released', () => this.refresh());
+        },
         async updateStatus(orderId, newStatus) {
             const confirmMessage = newStatus === 'rejected' ? 'Are you sure you want to reject this order?' : null;
             if (confirmMessage && !confirm(confirmMessage)) return;
@@ -203,14 +296,17 @@ const RestaurantOrderQueuePage = {
         }
     },
     mounted() {
-        this.fetchOrders(); // Fetch immediately
-        // Set up auto-refresh
-        this.intervalId = setInterval(this.fetchOrders, 30000); // 30 seconds
+        this.refresh(); // Fetch immediately
+        // Live updates, with polling as a fallback
+        this.openStream();
     },
     beforeDestroy() {
-        // Important: Clear the interval when the component is destroyed
-        // to prevent memory leaks.
-        clearInterval(this.intervalId);
+        // Important: Close the stream and clear the interval when the component
+        // is destroyed to prevent memory leaks.
+        if (this.eventSource) {
+            this.eventSource.close();
+        }
+        this.stopPolling();
     }
 };
 // NOTE: No export default needed
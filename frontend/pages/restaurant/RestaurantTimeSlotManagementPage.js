@@ -39,6 +39,22 @@ const RestaurantTimeSlotManagementPage = {
                             </form>
                         </div>
                     </div>
+
+                    <!-- Orders accepted per slot -->
+                    <div class="card mt-4">
+                        <div class="card-body">
+                            <h4 class="card-title">Slot Capacity</h4>
+                            <p class="text-muted small">Maximum scheduled orders per 30-minute slot. Leave empty for no limit.</p>
+                            <form @submit.prevent="saveCapacity">
+                                <div class="form-group">
+                                    <input type="number" min="1" class="form-control" v-model.number="capacity" placeholder="No limit">
+                                </div>
+                                <button type="submit" class="btn btn-outline-brand btn-block" :disabled="isSavingCapacity">
+                                    {{ isSavingCapacity ? 'Saving...' : 'Save Capacity' }}
+                                </button>
+                            </form>
+                        </div>
+                    </div>
                 </div>
 
                 <!-- Existing Slots Display -->
@@ -72,8 +88,10 @@ const RestaurantTimeSlotManagementPage = {
         return {
             loading: true,
             isSaving: false,
+            isSavingCapacity: false,
             error: null,
             slots: [],
+            capacity: null, // Scheduled orders per slot; null means no limit
             newSlot: {
                 day_of_week: 'Monday',
                 start_time: '09:00',
@@ -123,6 +141,28 @@ const RestaurantTimeSlotManagementPage = {
                 console.error("Error in deleteSlot:", err);
             }
         },
+        async fetchCapacity() {
+            try {
+                const data = await apiService.get('/api/restaurant/slot-capacity');
+                this.capacity = data.capacity;
+            } catch (err) {
+                console.error("Error in fetchCapacity:", err);
+            }
+        },
+        async saveCapacity() {
+            this.isSavingCapacity = true;
+            try {
+                const capacity = this.capacity === '' ? null : this.capacity;
+                const data = await apiService.put('/api/restaurant/slot-capacity', { capacity: capacity });
+                this.capacity = data.capacity;
+                alert("Slot capacity saved.");
+            } catch (err) {
+                this.error = "Error saving capacity: " + err.message;
+                console.error("Error in saveCapacity:", err);
+            } finally {
+                this.isSavingCapacity = false;
+            }
+        },
         getSlotsForDay(day) {
             return this.slots.filter(slot => slot.day_of_week === day);
         },
@@ -137,6 +177,7 @@ const RestaurantTimeSlotManagementPage = {
     },
     mounted() {
         this.fetchSlots();
+        this.fetchCapacity();
     }
 };
 // NOTE: No export default needed
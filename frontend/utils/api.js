@@ -22,6 +22,18 @@ const apiService = {
     download(endpoint) {
         return this.request('GET', endpoint, null, 'blob');
     },
+    // Runs an admin export in the background and resolves with the finished file
+    async exportFile(kind, format = 'xlsx', pollInterval = 1000) {
+        let job = await this.post(`/api/admin/${kind}/export`, { format });
+        while (job.status === 'queued' || job.status === 'running') {
+            await new Promise(resolve => setTimeout(resolve, pollInterval));
+            job = await this.get(`/api/admin/exports/${job.id}`);
+        }
+        if (job.status !== 'completed') {
+            throw new Error(job.error || 'Export failed.');
+        }
+        return this.download(job.download_url);
+    },
 
     // Core request function
     async request(method, endpoint, body = null, responseType = 'json') {
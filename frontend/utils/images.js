@@ -0,0 +1,16 @@
+// Responsive image helpers for uploads made through /api/upload/image.
+// The API stores the largest JPEG ('<hash>-<box>.jpg') as the image URL; the
+// smaller sizes and the WebP copies sit next to it under the same hash.
+
+// Must match IMAGE_WIDTHS in backend/config.py.
+const IMAGE_WIDTHS = [100, 400, 800];
+const UPLOAD_VARIANT_RE = /^(\/assets\/uploads\/[0-9a-f]{32})-(\d+)\.jpg$/;
+
+function imageSrcset(url, extension = 'jpg') {
+    const match = UPLOAD_VARIANT_RE.exec(url || '');
+    if (!match) return null; // Older uploads and external URLs have a single size.
+    const base = match[1];
+    const largest = parseInt(match[2], 10);
+    const boxes = IMAGE_WIDTHS.filter(width => width < largest).concat([largest]);
+    return boxes.map(box => `${base}-${box}.${extension} ${box}w`).join(', ');
+}
@@ -0,0 +1,23 @@
+# gunicorn settings; `gunicorn app:app` reads this file from the working directory.
+import os
+import uuid
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '10000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+
+# Order streams (Server-Sent Events) stay open for up to SSE_MAX_STREAM_SECONDS.
+# A sync worker would be blocked by a single stream and killed after `timeout`;
+# threaded workers keep heartbeating while a thread serves a stream. Keep
+# SSE_MAX_STREAMS below `threads` so ordinary requests always find a thread.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 32))
+timeout = 30
+
+# The app checks this against EVENT_BROKER: several workers need Redis.
+raw_env = [f'WEB_CONCURRENCY={workers}']
+
+
+def on_starting(server):
+    # One id per server run, inherited by every worker. Export jobs recorded
+    # under an earlier run on this host are failed instead of counting as pending.
+    os.environ['SERVER_INSTANCE_ID'] = uuid.uuid4().hex
@@ -0,0 +1,93 @@
+"""daily stats rollups
+
+Revision ID: 0a7d4e6c2f18
+Revises: f3c9a27d5b61
+Create Date: 2026-10-18 14:41:09.517362
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a7d4e6c2f18'
+down_revision = 'f3c9a27d5b61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('restaurant_daily_stats',
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('orders_placed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('placed_amount', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('orders_completed', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('orders_cancelled', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('orders_rejected', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('orders_refunded', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('revenue', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('discount_total', sa.Float(), nullable=False, server_default='0'),
+    sa.Column('items_sold', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('refunded_amount', sa.Float(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+    sa.PrimaryKeyConstraint('restaurant_id', 'day')
+    )
+    with op.batch_alter_table('restaurant_daily_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_restaurant_daily_stats_day', ['day'], unique=False)
+
+    op.create_table('menu_item_daily_stats',
+    sa.Column('menu_item_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('restaurant_id', sa.Integer(), nullable=False),
+    sa.Column('order_lines', sa.Integer(), nullable=False, server_default='0'),
+    sa.Column('quantity', sa.Integer(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['menu_item_id'], ['menu_item.id'], ),
+    sa.ForeignKeyConstraint(['restaurant_id'], ['restaurant.id'], ),
+    sa.PrimaryKeyConstraint('menu_item_id', 'day')
+    )
+    with op.batch_alter_table('menu_item_daily_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_menu_item_daily_stats_restaurant_day', ['restaurant_id', 'day'], unique=False)
+
+    # Backfill from the existing orders (same figures as `flask rebuild-daily-stats`).
+    op.execute("""
+        INSERT INTO restaurant_daily_stats (
+            restaurant_id, day, orders_placed, placed_amount,
+            orders_completed, orders_cancelled, orders_rejected, orders_refunded,
+            revenue, discount_total, items_sold, refunded_amount
+        )
+        SELECT
+            o.restaurant_id, DATE(o.created_at), COUNT(o.id), SUM(o.total_amount),
+            SUM(CASE WHEN o.status = 'completed' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN o.status = 'cancelled' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN o.status = 'rejected' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN o.status = 'refunded' THEN 1 ELSE 0 END),
+            SUM(CASE WHEN o.status = 'completed' THEN o.total_amount ELSE 0 END),
+            SUM(CASE WHEN o.status = 'completed' THEN COALESCE(o.discount_amount, 0) ELSE 0 END),
+            SUM(CASE WHEN o.status = 'completed' THEN COALESCE(q.quantity, 0) ELSE 0 END),
+            SUM(CASE WHEN o.status = 'refunded' THEN o.total_amount ELSE 0 END)
+        FROM "order" o
+        LEFT JOIN (
+            SELECT order_id, SUM(quantity) AS quantity FROM order_item GROUP BY order_id
+        ) q ON q.order_id = o.id
+        GROUP BY o.restaurant_id, DATE(o.created_at)
+    """)
+    op.execute("""
+        INSERT INTO menu_item_daily_stats (menu_item_id, day, restaurant_id, order_lines, quantity)
+        SELECT oi.menu_item_id, DATE(o.created_at), mi.restaurant_id, COUNT(oi.id), SUM(oi.quantity)
+        FROM order_item oi
+        JOIN "order" o ON o.id = oi.order_id
+        JOIN menu_item mi ON mi.id = oi.menu_item_id
+        GROUP BY oi.menu_item_id, DATE(o.created_at), mi.restaurant_id
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('menu_item_daily_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_menu_item_daily_stats_restaurant_day')
+
+    op.drop_table('menu_item_daily_stats')
+    with op.batch_alter_table('restaurant_daily_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_restaurant_daily_stats_day')
+
+    op.drop_table('restaurant_daily_stats')
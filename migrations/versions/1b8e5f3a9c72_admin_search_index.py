@@ -0,0 +1,54 @@
+"""admin search index
+
+Revision ID: 1b8e5f3a9c72
+Revises: 0a7d4e6c2f18
+Create Date: 2026-10-18 15:20:36.804117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1b8e5f3a9c72'
+down_revision = '0a7d4e6c2f18'
+branch_labels = None
+depends_on = None
+
+
+TRIGRAM_INDEXES = [
+    ('ix_user_name_trgm', 'user', 'name'),
+    ('ix_user_email_trgm', 'user', 'email'),
+    ('ix_restaurant_name_trgm', 'restaurant', 'name'),
+    ('ix_restaurant_city_trgm', 'restaurant', 'city'),
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS user_search USING fts5(name, email, tokenize='unicode61')")
+        op.execute("CREATE VIRTUAL TABLE IF NOT EXISTS restaurant_search USING fts5(name, city, owner_email, tokenize='unicode61')")
+        op.execute("""
+            INSERT INTO user_search (rowid, name, email)
+            SELECT id, COALESCE(name, ''), COALESCE(email, '') FROM "user"
+        """)
+        op.execute("""
+            INSERT INTO restaurant_search (rowid, name, city, owner_email)
+            SELECT r.id, r.name, r.city, COALESCE(u.email, '')
+            FROM restaurant r LEFT JOIN "user" u ON u.id = r.owner_id
+        """)
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for name, table, column in TRIGRAM_INDEXES:
+            op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON "{table}" USING gin ({column} gin_trgm_ops)')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("DROP TABLE IF EXISTS restaurant_search")
+        op.execute("DROP TABLE IF EXISTS user_search")
+    elif dialect == 'postgresql':
+        for name, _, _ in reversed(TRIGRAM_INDEXES):
+            op.execute(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,42 @@
+"""scheduled tasks
+
+Revision ID: 2c4f9d1e7a35
+Revises: 1b8e5f3a9c72
+Create Date: 2026-10-18 15:48:12.517306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2c4f9d1e7a35'
+down_revision = '1b8e5f3a9c72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduled_task',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=50), nullable=False),
+    sa.Column('target_id', sa.Integer(), nullable=True),
+    sa.Column('payload', sa.JSON(), nullable=True),
+    sa.Column('due_at', sa.DateTime(), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('scheduled_task', schema=None) as batch_op:
+        batch_op.create_index('ix_scheduled_task_due_at', ['due_at'], unique=False)
+
+    # OTP clears that were pending in threads at deploy time are lost; clear
+    # them for every order that is already completed.
+    op.execute("""UPDATE "order" SET otp = NULL WHERE status = 'completed' AND otp IS NOT NULL""")
+
+
+def downgrade():
+    with op.batch_alter_table('scheduled_task', schema=None) as batch_op:
+        batch_op.drop_index('ix_scheduled_task_due_at')
+
+    op.drop_table('scheduled_task')
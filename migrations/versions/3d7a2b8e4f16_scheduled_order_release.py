@@ -0,0 +1,31 @@
+"""scheduled order release
+
+Revision ID: 3d7a2b8e4f16
+Revises: 2c4f9d1e7a35
+Create Date: 2026-10-18 16:21:05.238470
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3d7a2b8e4f16'
+down_revision = '2c4f9d1e7a35'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing scheduled orders are already in the live queue and stay there.
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('release_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_order_restaurant_release', ['restaurant_id', 'release_at'], unique=False)
+        batch_op.create_index('ix_order_release_at', ['release_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_release_at')
+        batch_op.drop_index('ix_order_restaurant_release')
+        batch_op.drop_column('release_at')
@@ -0,0 +1,32 @@
+"""slot capacity
+
+Revision ID: 4e8b3c9f5a27
+Revises: 3d7a2b8e4f16
+Create Date: 2026-10-18 16:54:39.671203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e8b3c9f5a27'
+down_revision = '3d7a2b8e4f16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('slot_capacity', sa.Integer(), nullable=True))
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index('ix_order_restaurant_scheduled', ['restaurant_id', 'scheduled_time'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_restaurant_scheduled')
+
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.drop_column('slot_capacity')
@@ -0,0 +1,26 @@
+"""export job server
+
+Revision ID: 5f1c7d2a8b39
+Revises: 4e8b3c9f5a27
+Create Date: 2026-10-18 18:12:44.905137
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5f1c7d2a8b39'
+down_revision = '4e8b3c9f5a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('export_job', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('server_id', sa.String(length=100), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('export_job', schema=None) as batch_op:
+        batch_op.drop_column('server_id')
@@ -0,0 +1,109 @@
+"""add secondary indexes for hot filters
+
+Revision ID: 7a3e91c4d2b8
+Revises: 1ed577d5f7d4
+Create Date: 2026-10-18 10:12:41.517204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a3e91c4d2b8'
+down_revision = '1ed577d5f7d4'
+branch_labels = None
+depends_on = None
+
+
+ACTIVE_ORDER_CLAUSE = "status NOT IN ('completed', 'cancelled', 'rejected', 'refunded')"
+
+
+def upgrade():
+    with op.batch_alter_table('roles_users', schema=None) as batch_op:
+        batch_op.create_index('ix_roles_users_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.create_index('ix_restaurant_owner_id', ['owner_id'], unique=False)
+        batch_op.create_index('ix_restaurant_verified_active', ['is_verified', 'is_active'], unique=False)
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.create_index('ix_category_restaurant_id', ['restaurant_id'], unique=False)
+
+    with op.batch_alter_table('menu_item', schema=None) as batch_op:
+        batch_op.create_index('ix_menu_item_restaurant_category', ['restaurant_id', 'category_id'], unique=False)
+        batch_op.create_index('ix_menu_item_category_id', ['category_id'], unique=False)
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.create_index('ix_order_restaurant_status_created', ['restaurant_id', 'status', 'created_at'], unique=False)
+        batch_op.create_index('ix_order_restaurant_created', ['restaurant_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_order_user_created', ['user_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_order_created_at', ['created_at'], unique=False)
+        batch_op.create_index(
+            'ix_order_active_queue', ['restaurant_id', 'created_at'], unique=False,
+            sqlite_where=sa.text(ACTIVE_ORDER_CLAUSE),
+            postgresql_where=sa.text(ACTIVE_ORDER_CLAUSE)
+        )
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.create_index('ix_order_item_order_id', ['order_id'], unique=False)
+        batch_op.create_index('ix_order_item_menu_item_id', ['menu_item_id'], unique=False)
+
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.create_index('ix_review_restaurant_created', ['restaurant_id', 'created_at'], unique=False)
+        batch_op.create_index('ix_review_created_at', ['created_at'], unique=False)
+
+    with op.batch_alter_table('favorite', schema=None) as batch_op:
+        batch_op.create_index('ix_favorite_user_id', ['user_id'], unique=False)
+
+    with op.batch_alter_table('reward_point', schema=None) as batch_op:
+        batch_op.create_index('ix_reward_point_user_created', ['user_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('coupon', schema=None) as batch_op:
+        batch_op.create_index('ix_coupon_restaurant_id', ['restaurant_id'], unique=False)
+
+    with op.batch_alter_table('time_slot', schema=None) as batch_op:
+        batch_op.create_index('ix_time_slot_restaurant_day', ['restaurant_id', 'day_of_week'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('time_slot', schema=None) as batch_op:
+        batch_op.drop_index('ix_time_slot_restaurant_day')
+
+    with op.batch_alter_table('coupon', schema=None) as batch_op:
+        batch_op.drop_index('ix_coupon_restaurant_id')
+
+    with op.batch_alter_table('reward_point', schema=None) as batch_op:
+        batch_op.drop_index('ix_reward_point_user_created')
+
+    with op.batch_alter_table('favorite', schema=None) as batch_op:
+        batch_op.drop_index('ix_favorite_user_id')
+
+    with op.batch_alter_table('review', schema=None) as batch_op:
+        batch_op.drop_index('ix_review_created_at')
+        batch_op.drop_index('ix_review_restaurant_created')
+
+    with op.batch_alter_table('order_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_item_menu_item_id')
+        batch_op.drop_index('ix_order_item_order_id')
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_active_queue')
+        batch_op.drop_index('ix_order_created_at')
+        batch_op.drop_index('ix_order_user_created')
+        batch_op.drop_index('ix_order_restaurant_created')
+        batch_op.drop_index('ix_order_restaurant_status_created')
+
+    with op.batch_alter_table('menu_item', schema=None) as batch_op:
+        batch_op.drop_index('ix_menu_item_category_id')
+        batch_op.drop_index('ix_menu_item_restaurant_category')
+
+    with op.batch_alter_table('category', schema=None) as batch_op:
+        batch_op.drop_index('ix_category_restaurant_id')
+
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.drop_index('ix_restaurant_verified_active')
+        batch_op.drop_index('ix_restaurant_owner_id')
+
+    with op.batch_alter_table('roles_users', schema=None) as batch_op:
+        batch_op.drop_index('ix_roles_users_user_id')
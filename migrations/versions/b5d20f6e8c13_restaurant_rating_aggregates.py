@@ -0,0 +1,43 @@
+"""restaurant rating aggregates
+
+Revision ID: b5d20f6e8c13
+Revises: 7a3e91c4d2b8
+Create Date: 2026-10-18 11:02:17.330958
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d20f6e8c13'
+down_revision = '7a3e91c4d2b8'
+branch_labels = None
+depends_on = None
+
+
+RATING_COLUMNS = ['rating_sum', 'rating_count', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5']
+
+
+def upgrade():
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        for column in RATING_COLUMNS:
+            batch_op.add_column(sa.Column(column, sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill the aggregates from the existing reviews.
+    op.execute("""
+        UPDATE restaurant SET
+            rating_sum = (SELECT COALESCE(SUM(rating), 0) FROM review WHERE review.restaurant_id = restaurant.id),
+            rating_count = (SELECT COUNT(id) FROM review WHERE review.restaurant_id = restaurant.id),
+            rating_1 = (SELECT COUNT(id) FROM review WHERE review.restaurant_id = restaurant.id AND rating = 1),
+            rating_2 = (SELECT COUNT(id) FROM review WHERE review.restaurant_id = restaurant.id AND rating = 2),
+            rating_3 = (SELECT COUNT(id) FROM review WHERE review.restaurant_id = restaurant.id AND rating = 3),
+            rating_4 = (SELECT COUNT(id) FROM review WHERE review.restaurant_id = restaurant.id AND rating = 4),
+            rating_5 = (SELECT COUNT(id) FROM review WHERE review.restaurant_id = restaurant.id AND rating = 5)
+    """)
+
+
+def downgrade():
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        for column in reversed(RATING_COLUMNS):
+            batch_op.drop_column(column)
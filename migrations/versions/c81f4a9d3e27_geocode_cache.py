@@ -0,0 +1,37 @@
+"""geocode cache
+
+Revision ID: c81f4a9d3e27
+Revises: b5d20f6e8c13
+Create Date: 2026-10-18 11:48:05.112874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c81f4a9d3e27'
+down_revision = 'b5d20f6e8c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('geocode_cache',
+    sa.Column('address_hash', sa.String(length=64), nullable=False),
+    sa.Column('address', sa.Text(), nullable=False),
+    sa.Column('latitude', sa.Float(), nullable=True),
+    sa.Column('longitude', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('address_hash')
+    )
+    with op.batch_alter_table('geocode_cache', schema=None) as batch_op:
+        batch_op.create_index('ix_geocode_cache_last_used_at', ['last_used_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('geocode_cache', schema=None) as batch_op:
+        batch_op.drop_index('ix_geocode_cache_last_used_at')
+
+    op.drop_table('geocode_cache')
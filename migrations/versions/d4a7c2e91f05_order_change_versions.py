@@ -0,0 +1,34 @@
+"""order change versions for delta sync
+
+Revision ID: d4a7c2e91f05
+Revises: c81f4a9d3e27
+Create Date: 2026-10-18 12:30:52.604113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7c2e91f05'
+down_revision = 'c81f4a9d3e27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('order_version', sa.Integer(), nullable=False, server_default='0'))
+
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_version', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.create_index('ix_order_restaurant_change', ['restaurant_id', 'change_version'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('order', schema=None) as batch_op:
+        batch_op.drop_index('ix_order_restaurant_change')
+        batch_op.drop_column('change_version')
+
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.drop_column('order_version')
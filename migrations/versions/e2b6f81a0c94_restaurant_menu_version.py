@@ -0,0 +1,26 @@
+"""restaurant menu version
+
+Revision ID: e2b6f81a0c94
+Revises: d4a7c2e91f05
+Create Date: 2026-10-18 13:14:26.881402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6f81a0c94'
+down_revision = 'd4a7c2e91f05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('menu_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('restaurant', schema=None) as batch_op:
+        batch_op.drop_column('menu_version')
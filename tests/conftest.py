@@ -0,0 +1,136 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event, text
+
+# Selects TestingConfig (in-memory SQLite, no scheduler); must be set before
+# app.py creates the app on import.
+os.environ['FLASK_ENV'] = 'testing'
+
+from app import app as flask_app
+from flask_migrate import upgrade
+from backend import admin_search
+from backend.models import db
+from backend.security import user_datastore
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+@pytest.fixture(scope='session')
+def app():
+    return flask_app
+
+
+def _add_roles():
+    for name in ('admin', 'owner', 'customer'):
+        user_datastore.find_or_create_role(name=name)
+    db.session.commit()
+
+
+def _discard_database(app):
+    """ Closes the in-memory database; the next connection starts from an empty one. """
+    db.session.remove()
+    db.engine.dispose()
+    admin_search._ready_binds.clear()
+    app.extensions['principal_cache'].invalidate()
+
+
+@pytest.fixture
+def database(app):
+    """ A fresh schema for each test, built from the models. """
+    db.create_all()
+    _add_roles()
+    yield db
+    _discard_database(app)
+
+
+@pytest.fixture
+def migrated_database(app):
+    """ A fresh schema built by the Alembic migrations, as deployed databases are. """
+    upgrade(directory=MIGRATIONS)
+    _add_roles()
+    yield db
+    _discard_database(app)
+
+
+@pytest.fixture
+def postgres_database(app, monkeypatch):
+    """
+    The migrated schema on the PostgreSQL server named by DATABASE_URL, built
+    in a throwaway schema that is dropped afterwards. Skips without one.
+    """
+    url = os.environ.get('DATABASE_URL', '').replace('postgres://', 'postgresql://')
+    if not url.startswith('postgresql'):
+        pytest.skip("DATABASE_URL does not name a PostgreSQL database")
+    schema = f'crav_test_{uuid.uuid4().hex[:12]}'
+    admin_engine = create_engine(url)
+    with admin_engine.begin() as connection:
+        connection.execute(text(f'CREATE SCHEMA {schema}'))
+    engine = create_engine(url, connect_args={'options': f'-csearch_path={schema},public'})
+    db.session.remove()
+    monkeypatch.setitem(db._app_engines[app], None, engine)
+    try:
+        upgrade(directory=MIGRATIONS)
+        _add_roles()
+        yield db
+    finally:
+        _discard_database(app)
+        with admin_engine.begin() as connection:
+            connection.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        admin_engine.dispose()
+
+
+@pytest.fixture
+def make_user():
+    count = 0
+
+    def make(role, name=None):
+        nonlocal count
+        count += 1
+        user = user_datastore.create_user(email=f'{role}{count}@example.com', password='password',
+                                          name=name or f'{role.title()} {count}', roles=[role])
+        db.session.commit()
+        return user
+    return make
+
+
+@pytest.fixture
+def client(app):
+    """ get/post(user, url, headers=None, **kwargs) as that user; each request gets its own app context (and flask.g). """
+    test_client = app.test_client()
+    tokens = {}
+
+    class Client:
+        def open(self, method, user, url, headers=None, **kwargs):
+            if user.id not in tokens:
+                tokens[user.id] = user.get_auth_token()
+            with app.app_context():
+                return test_client.open(url, method=method, headers={'Authentication-Token': tokens[user.id], **(headers or {})},
+                                        **kwargs)
+
+        def get(self, user, url, headers=None, **kwargs):
+            return self.open('GET', user, url, headers, **kwargs)
+
+        def post(self, user, url, headers=None, **kwargs):
+            return self.open('POST', user, url, headers, **kwargs)
+    return Client()
+
+
+@pytest.fixture
+def captured_statements():
+    """ A context manager collecting the (statement, parameters) pairs sent to the database inside it. """
+    @contextmanager
+    def capture():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            yield statements
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+    return capture
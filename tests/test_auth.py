@@ -0,0 +1,46 @@
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import pytest
+
+from backend import routes
+
+
+@pytest.fixture
+def post(app):
+    test_client = app.test_client()
+
+    def post(url, data):
+        with app.app_context():
+            return test_client.post(url, json=data)
+    return post
+
+
+def _timed_out(*args):
+    raise FutureTimeout()
+
+
+@pytest.mark.parametrize('url, data', [
+    ('/api/register', {'email': 'new@example.com', 'name': 'New'}),
+    ('/api/restaurant/register', {'ownerEmail': 'owner@example.com', 'ownerName': 'Owner', 'restaurantName': 'Cafe'}),
+])
+def test_register_without_password_is_rejected(database, post, url, data):
+    response = post(url, data)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('url, data', [
+    ('/api/register', {'email': 'new@example.com', 'password': 'secret'}),
+    ('/api/restaurant/register', {'ownerEmail': 'owner@example.com', 'password': 'secret', 'restaurantName': 'Cafe'}),
+])
+def test_register_hash_timeout_is_busy(database, post, monkeypatch, url, data):
+    monkeypatch.setattr(routes, 'hash_password', _timed_out)
+    response = post(url, data)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_login_hash_timeout_is_busy(database, make_user, post, monkeypatch):
+    user = make_user('customer')
+    monkeypatch.setattr(routes, 'check_password', _timed_out)
+    response = post('/api/login', {'email': user.email, 'password': 'password'})
+    assert response.status_code == 503
@@ -0,0 +1,53 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import db, Order, Restaurant
+
+GZIP = {'Accept-Encoding': 'gzip'}
+
+
+@pytest.fixture
+def queue(database, make_user):
+    """ A restaurant whose live queue holds 20 placed orders, enough for a compressed response. """
+    owner, customer = make_user('owner'), make_user('customer')
+    restaurant = Restaurant(name='Spice Route', address='1 Main St', city='Pune', owner_id=owner.id,
+                            is_verified=True, is_active=True, order_version=20)
+    db.session.add(restaurant)
+    db.session.flush()
+    now = datetime.utcnow()
+    for i in range(20):
+        db.session.add(Order(user_id=customer.id, restaurant_id=restaurant.id, total_amount=100,
+                             order_type='takeaway', status='placed', qr_payload=f'order-{i}',
+                             created_at=now - timedelta(minutes=i), change_version=i + 1))
+    db.session.commit()
+    return owner
+
+
+def body(response):
+    assert response.headers['Content-Encoding'] == 'gzip'
+    return json.loads(gzip.decompress(response.get_data()))
+
+
+def test_bodies_sharing_an_etag_are_cached_per_url(queue, client):
+    legacy = client.get(queue, '/api/restaurant/orders', headers=GZIP)
+    snapshot = client.get(queue, '/api/restaurant/orders?since=0', headers=GZIP)
+    delta = client.get(queue, '/api/restaurant/orders?since=5', headers=GZIP)
+    assert legacy.headers['ETag'] == snapshot.headers['ETag'] == delta.headers['ETag']
+
+    assert len(body(legacy)) == 20
+    assert body(snapshot)['full'] is True and len(body(snapshot)['orders']) == 20
+    assert body(delta)['full'] is False and len(body(delta)['orders']) == 15
+    # Served again from the compressed-body cache.
+    assert body(client.get(queue, '/api/restaurant/orders?since=5', headers=GZIP)) == body(delta)
+
+
+def test_compressed_queue_revalidates(queue, client):
+    response = client.get(queue, '/api/restaurant/orders', headers=GZIP)
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+
+    revalidated = client.get(queue, '/api/restaurant/orders', headers={**GZIP, 'If-None-Match': etag})
+    assert revalidated.status_code == 304
@@ -0,0 +1,28 @@
+from datetime import datetime, timedelta
+
+from backend.dispatch import release_orders
+from backend.models import db, Order, Restaurant
+
+
+def test_orders_finalized_while_held_are_not_released(database, make_user):
+    owner, customer = make_user('owner'), make_user('customer')
+    restaurant = Restaurant(name='Spice Route', address='1 Main St', city='Pune', owner_id=owner.id,
+                            is_verified=True, is_active=True, order_version=5)
+    db.session.add(restaurant)
+    db.session.flush()
+    release_at = datetime.utcnow() - timedelta(minutes=1)
+    orders = {}
+    for status in ('placed', 'cancelled', 'refunded'):
+        orders[status] = Order(user_id=customer.id, restaurant_id=restaurant.id, total_amount=100,
+                               order_type='takeaway', status=status, qr_payload=f'order-{status}',
+                               is_scheduled=True, scheduled_time=release_at + timedelta(minutes=30),
+                               release_at=release_at)
+        db.session.add(orders[status])
+    db.session.commit()
+
+    assert release_orders() == 1
+    db.session.commit()
+    db.session.expire_all()
+    assert orders['placed'].release_at is None and orders['placed'].change_version == 6
+    assert orders['cancelled'].release_at == release_at and orders['cancelled'].change_version != 6
+    assert restaurant.order_version == 6
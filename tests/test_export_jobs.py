@@ -0,0 +1,50 @@
+import uuid
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+from backend import export_jobs
+from backend.models import db, ExportJob
+from backend.scheduler import run_due_tasks, schedule_task
+
+
+def add_job(user, **fields):
+    job = ExportJob(id=uuid.uuid4().hex, kind='orders', format='csv', created_by=user.id, **fields)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+
+def test_scheduler_expires_results_and_stale_jobs(database, make_user, tmp_path):
+    admin = make_user('admin')
+    spooled = tmp_path / 'orders.csv'
+    spooled.write_text('Order ID\n')
+    finished = add_job(admin, status='completed', file_path=str(spooled),
+                       expires_at=datetime.utcnow() - timedelta(minutes=1))
+    stale = add_job(admin, status='running', created_at=datetime.utcnow() - timedelta(days=1))
+    schedule_task('expire_exports', delay=-1)
+    db.session.commit()
+
+    assert run_due_tasks() == 1
+    db.session.expire_all()
+    assert (finished.status, finished.file_path) == ('expired', None)
+    assert not spooled.exists()
+    assert stale.status == 'failed'
+
+
+def test_job_whose_process_died_is_failed(app, database, make_user):
+    job = add_job(make_user('admin'), status='running')
+
+    class Pool:
+        def shutdown(self, wait):
+            self.shut_down = True
+
+    pool = Pool()
+    app.extensions['export_executor'] = pool
+    future = Future()
+    future.set_exception(BrokenProcessPool("A process in the process pool was terminated abruptly."))
+    export_jobs._job_done(app, pool, job.id, future)
+
+    db.session.expire_all()
+    assert job.status == 'failed'
+    assert pool.shut_down and 'export_executor' not in app.extensions
@@ -0,0 +1,12 @@
+import pytest
+
+from backend import geo
+
+
+@pytest.mark.skipif(geo.np is None, reason="NumPy is not installed")
+def test_vectorized_distances_match_scalar_formula():
+    lats, lngs = [12.97, 18.52, 28.61, -33.87, 12.97], [77.59, 73.86, 77.21, 151.21, 77.59]
+    distances = geo.haversine_many(12.97, 77.59, lats, lngs)
+    assert isinstance(distances, list)
+    assert distances == pytest.approx([geo.haversine(12.97, 77.59, la, ln) for la, ln in zip(lats, lngs)])
+    assert distances[0] == 0
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.geocoding import GeocodingProvider, RateLimiter, RedisRateLimiter, geocode, rate_limiter
+from backend.models import db, GeocodeCache
+
+
+class FakeProvider(GeocodingProvider):
+    def __init__(self):
+        super().__init__({})
+        self.calls = 0
+
+    def geocode(self, address):
+        self.calls += 1
+        return 12.97, 77.59
+
+
+@pytest.fixture
+def provider(app, monkeypatch):
+    provider = FakeProvider()
+    monkeypatch.setitem(app.extensions, 'geocoder', provider)
+    return provider
+
+
+def test_provider_must_implement_geocode():
+    with pytest.raises(TypeError):
+        type('Incomplete', (GeocodingProvider,), {})({})
+
+
+def test_cache_hit_does_not_write(database, provider, captured_statements):
+    assert geocode('MG Road, Bengaluru') == (12.97, 77.59)
+    with captured_statements() as statements:
+        assert geocode('mg road,  Bengaluru!') == (12.97, 77.59)
+    assert provider.calls == 1
+    assert not [s for s, _ in statements if s.lstrip().upper().startswith('UPDATE')]
+
+
+def test_cache_hit_refreshes_stale_last_used_at(app, database, provider):
+    geocode('MG Road, Bengaluru')
+    entry = db.session.execute(db.select(GeocodeCache)).scalar_one()
+    stale = datetime.utcnow() - timedelta(seconds=app.config['GEOCODE_CACHE_TOUCH_INTERVAL'] + 60)
+    entry.last_used_at = stale
+    db.session.commit()
+
+    geocode('MG Road, Bengaluru')
+    db.session.refresh(entry)
+    assert entry.last_used_at > stale
+    assert provider.calls == 1
+
+
+def test_eviction_runs_once_per_interval(app, database, provider, captured_statements, monkeypatch):
+    monkeypatch.delitem(app.extensions, 'geocode_cache_evicted_at', raising=False)
+    with captured_statements() as statements:
+        for street in ('MG Road', 'Brigade Road', 'Church Street'):
+            geocode(f'{street}, Bengaluru')
+    assert provider.calls == 3
+    assert len([s for s, _ in statements if 'OFFSET' in s]) == 1
+
+
+def test_workers_share_the_rate_limit_through_redis(app):
+    config = dict(app.config, EVENT_BROKER='redis')
+    assert isinstance(rate_limiter(config), RedisRateLimiter)
+    assert isinstance(rate_limiter(dict(app.config, EVENT_BROKER='memory')), RateLimiter)
@@ -0,0 +1,57 @@
+import csv
+import io
+
+import pytest
+
+from backend import menu_import
+from backend.models import db, MenuItem, Restaurant
+
+URL = '/api/restaurant/menu/bulk-upload'
+HEADER = 'Category,Name,Description,Price,Food Type\n'
+
+
+@pytest.fixture
+def restaurant(app, database, make_user, monkeypatch):
+    monkeypatch.setitem(app.config, 'MENU_IMPORT_CHUNK_SIZE', 2)
+    owner = make_user('owner')
+    restaurant = Restaurant(name='Spice Route', address='1 Main St', city='Pune', owner_id=owner.id,
+                            is_verified=True, is_active=True)
+    db.session.add(restaurant)
+    db.session.commit()
+    return restaurant
+
+
+def upload(client, restaurant, text):
+    data = {'menu_file': (io.BytesIO(text.encode('utf-8')), 'menu.csv')}
+    return client.post(restaurant.owner, URL, data=data, content_type='multipart/form-data')
+
+
+def menu_state(restaurant):
+    db.session.expire_all()
+    return db.session.get(Restaurant, restaurant.id).menu_version, MenuItem.query.count()
+
+
+def test_file_unreadable_part_way_keeps_committed_chunks(restaurant, client):
+    oversized = 'x' * (csv.field_size_limit() + 1)
+    text = HEADER + ''.join(f'Mains,Dish {i},,100,Veg\n' for i in range(3)) + f'Mains,"{oversized}",,100,Veg\n'
+    response = upload(client, restaurant, text)
+    assert response.status_code == 201, response.get_data(as_text=True)
+    summary = response.get_json()
+    assert summary['imported'] == 3
+    assert summary['errorCount'] == 1 and summary['errors'][0]['row'] is None
+    assert menu_state(restaurant) == (1, 3)
+
+
+def test_failed_import_still_refreshes_committed_chunks(restaurant, client, monkeypatch):
+    parse_row = menu_import.parse_row
+
+    def failing(values):
+        if values[1] == 'Dish 2':
+            raise RuntimeError('boom')
+        return parse_row(values)
+
+    monkeypatch.setattr(menu_import, 'parse_row', failing)
+    text = HEADER + ''.join(f'Mains,Dish {i},,100,Veg\n' for i in range(4))
+    response = upload(client, restaurant, text)
+    assert response.status_code == 500
+    assert menu_state(restaurant) == (1, 2)
@@ -0,0 +1,89 @@
+import pytest
+
+from backend.models import db, Category, MenuItem, Restaurant
+from backend.orders import validate_cart, CartError
+
+
+@pytest.fixture
+def menus(database, make_user):
+    """ Two restaurants with ten menu items each; the last item of the first is unavailable. """
+    restaurants = []
+    for name in ('Spice Route', 'Dosa Corner'):
+        restaurant = Restaurant(name=name, address='1 Main St', city='Pune',
+                                owner_id=make_user('owner').id, is_verified=True, is_active=True)
+        category = Category(name='Mains', restaurant=restaurant)
+        for i in range(10):
+            db.session.add(MenuItem(name=f'{name} dish {i}', price=100 + i, restaurant=restaurant,
+                                    category=category, is_available=True))
+        db.session.add(restaurant)
+        restaurants.append(restaurant)
+    db.session.commit()
+    first, second = restaurants
+    items = MenuItem.query.filter_by(restaurant_id=first.id).order_by(MenuItem.id).all()
+    items[-1].is_available = False
+    db.session.commit()
+    return {
+        'restaurant_id': first.id,
+        'items': items[:-1],
+        'unavailable': items[-1],
+        'other_item': MenuItem.query.filter_by(restaurant_id=second.id).first(),
+    }
+
+
+def cart(*lines):
+    return [{'menu_item_id': item.id, 'quantity': quantity} for item, quantity in lines]
+
+
+def test_prices_every_line(menus):
+    first, second = menus['items'][:2]
+    order_items, subtotal = validate_cart(menus['restaurant_id'], cart((first, 2), (second, 1)))
+    assert [(i.menu_item_id, i.quantity, i.price_at_order) for i in order_items] == [
+        (first.id, 2, first.price), (second.id, 1, second.price)
+    ]
+    assert subtotal == first.price * 2 + second.price
+
+
+@pytest.mark.parametrize('line_count', [1, 9])
+def test_one_query_for_any_cart_size(menus, captured_statements, line_count):
+    lines = cart(*((item, 1) for item in menus['items'][:line_count]))
+    db.session.expire_all()  # nothing is answered from the identity map
+    with captured_statements() as statements:
+        order_items, _ = validate_cart(menus['restaurant_id'], lines)
+    assert len(order_items) == line_count
+    assert len(statements) == 1, [statement for statement, _ in statements]
+
+
+def test_repeated_item_is_fetched_once(menus, captured_statements):
+    item = menus['items'][0]
+    lines, price = cart((item, 1), (item, 2)), item.price
+    db.session.expire_all()
+    with captured_statements() as statements:
+        order_items, subtotal = validate_cart(menus['restaurant_id'], lines)
+    assert len(statements) == 1
+    assert subtotal == price * 3
+
+
+@pytest.mark.parametrize('bad_item', ['missing', 'unavailable', 'other_item'])
+def test_rejects_items_that_cannot_be_ordered(menus, captured_statements, bad_item):
+    bad_id = 999999 if bad_item == 'missing' else menus[bad_item].id
+    lines = cart(*((item, 1) for item in menus['items'][:3]))
+    lines.insert(1, {'menu_item_id': bad_id, 'quantity': 1})
+    db.session.expire_all()
+    with captured_statements() as statements:
+        with pytest.raises(CartError) as error:
+            validate_cart(menus['restaurant_id'], lines)
+    assert error.value.menu_item_id == bad_id
+    assert len(statements) == 1
+
+
+@pytest.mark.parametrize('lines', [
+    [],
+    [{'menu_item_id': 'abc', 'quantity': 1}],
+    [{'menu_item_id': 1, 'quantity': 0}],
+    [{'menu_item_id': 1, 'quantity': 'two'}],
+])
+def test_rejects_malformed_carts_without_querying(menus, captured_statements, lines):
+    with captured_statements() as statements:
+        with pytest.raises(CartError):
+            validate_cart(menus['restaurant_id'], lines)
+    assert statements == []
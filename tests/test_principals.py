@@ -0,0 +1,24 @@
+from backend.events import get_broker, get_hub
+from backend.models import db
+from backend.principals import PRINCIPALS_CHANNEL
+
+
+def test_commit_broadcasts_invalidated_users(database, make_user):
+    user = make_user('customer')
+    received = []
+    get_hub().add_listener(PRINCIPALS_CHANNEL, received.append)
+    user.active = False
+    db.session.commit()
+    assert {'type': 'principals_invalidated', 'user_ids': [user.id]} in received
+
+
+def test_broadcast_from_another_worker_drops_cached_user(app, database, make_user, client):
+    user = make_user('customer')
+    for _ in range(2):  # the second request is served from the cache
+        assert client.get(user, '/api/orders').status_code == 200
+    cache = app.extensions['principal_cache']
+    assert cache.users.get(user.id) is not None
+
+    # Another worker blocked the user: only its broadcast reaches this process.
+    get_broker().hub.dispatch(PRINCIPALS_CHANNEL, {'type': 'principals_invalidated', 'user_ids': [user.id]})
+    assert cache.users.get(user.id) is None
@@ -0,0 +1,148 @@
+"""
+EXPLAIN QUERY PLAN checks for the hot list queries. The schema is built by
+the migrations, each request's queries are captured as the routes build
+them and explained on SQLite, so a changed query or a missing index that
+makes them scan or sort fails here. Tests marked postgres repeat the key
+checks with EXPLAIN on the PostgreSQL server named by DATABASE_URL.
+"""
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import text
+
+from backend.models import db, Order, Restaurant, Review
+
+
+def seed_orders(make_user):
+    """ A restaurant with a history of 400 orders, most of them finished, and ANALYZE statistics. """
+    owner, customer, admin = make_user('owner'), make_user('customer'), make_user('admin')
+    restaurant = Restaurant(name='Spice Route', address='1 Main St', city='Pune', owner_id=owner.id,
+                            is_verified=True, is_active=True, order_version=400)
+    db.session.add(restaurant)
+    db.session.flush()
+    now = datetime.utcnow()
+    for i in range(400):
+        db.session.add(Order(
+            user_id=customer.id, restaurant_id=restaurant.id, total_amount=100, order_type='takeaway',
+            status='placed' if i % 20 == 0 else 'completed', qr_payload=f'order-{i}',
+            created_at=now - timedelta(minutes=i), change_version=400 - i
+        ))
+    db.session.flush()
+    for order in Order.query.filter_by(status='completed').limit(100):
+        db.session.add(Review(order_id=order.id, user_id=customer.id, restaurant_id=restaurant.id,
+                              rating=5, created_at=order.created_at))
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return {'owner': owner, 'customer': customer, 'admin': admin, 'restaurant': restaurant}
+
+
+@pytest.fixture
+def orders(migrated_database, make_user):
+    return seed_orders(make_user)
+
+
+@pytest.fixture
+def postgres_orders(postgres_database, make_user):
+    return seed_orders(make_user)
+
+
+def query_plans(statements, table):
+    """ The EXPLAIN (QUERY PLAN on SQLite) lines of each captured SELECT that reads `table`. """
+    plans = []
+    with db.engine.connect() as connection:
+        explain = 'EXPLAIN QUERY PLAN ' if connection.dialect.name == 'sqlite' else 'EXPLAIN '
+        if connection.dialect.name == 'postgresql':
+            # 400 rows fit in a few pages, where a sequential scan always wins;
+            # ruling it out asks whether the query can use an index at all.
+            connection.exec_driver_sql('SET enable_seqscan = off')
+        for statement, parameters in statements:
+            if not statement.startswith('SELECT') or f'FROM {table}' not in statement:
+                continue
+            rows = connection.exec_driver_sql(explain + statement, parameters)
+            plans.append([row[-1] for row in rows])
+    return plans
+
+
+def plan_for(client, captured_statements, user, url, table='"order"'):
+    with captured_statements() as statements:
+        response = client.get(user, url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    plans = query_plans(statements, table)
+    assert plans, f"No query on {table} for {url}"
+    return plans[-1]
+
+
+def uses_index(plan, index, table='order'):
+    return any(line.startswith(('SEARCH', 'SCAN')) and f' {table} USING ' in line and index in line for line in plan)
+
+
+def sorts(plan):
+    return any('TEMP B-TREE' in line for line in plan)
+
+
+def test_live_queue_uses_partial_index(orders, client, captured_statements):
+    plan = plan_for(client, captured_statements, orders['owner'], '/api/restaurant/orders')
+    assert uses_index(plan, 'ix_order_active_queue'), plan
+    assert not sorts(plan), plan
+
+
+def test_queue_changes_use_change_version_index(orders, client, captured_statements):
+    plan = plan_for(client, captured_statements, orders['owner'], '/api/restaurant/orders?since=390')
+    assert uses_index(plan, 'ix_order_restaurant_change'), plan
+
+
+def test_upcoming_orders_use_release_index(orders, client, captured_statements):
+    plan = plan_for(client, captured_statements, orders['owner'], '/api/restaurant/orders/upcoming')
+    assert uses_index(plan, 'ix_order_restaurant_release'), plan
+
+
+@pytest.mark.parametrize('url', ['/api/orders?limit=20', '/api/orders'])
+def test_order_history_uses_user_index(orders, client, captured_statements, url):
+    plan = plan_for(client, captured_statements, orders['customer'], url)
+    assert uses_index(plan, 'ix_order_user_created'), plan
+    assert not sorts(plan), plan
+
+
+def test_order_history_next_page_seeks_index(orders, client, captured_statements):
+    first = client.get(orders['customer'], '/api/orders?limit=20').get_json()
+    plan = plan_for(client, captured_statements, orders['customer'],
+                    f"/api/orders?limit=20&cursor={first['nextCursor']}")
+    assert uses_index(plan, 'ix_order_user_created'), plan
+    assert not sorts(plan), plan
+
+
+@pytest.mark.parametrize('url', ['/api/admin/orders?limit=20', '/api/admin/orders?limit=20&status=Placed'])
+def test_admin_orders_walk_created_at_index(orders, client, captured_statements, url):
+    plan = plan_for(client, captured_statements, orders['admin'], url)
+    assert uses_index(plan, 'ix_order_created_at'), plan
+    assert not sorts(plan), plan
+
+
+def test_admin_reviews_walk_created_at_index(orders, client, captured_statements):
+    plan = plan_for(client, captured_statements, orders['admin'], '/api/admin/reviews?limit=20', table='review')
+    assert uses_index(plan, 'ix_review_created_at', table='review'), plan
+    assert not sorts(plan), plan
+
+
+def test_restaurant_reviews_use_restaurant_index(orders, client, captured_statements):
+    url = f"/api/restaurants/{orders['restaurant'].id}/reviews?limit=20"
+    plan = plan_for(client, captured_statements, orders['customer'], url, table='review')
+    assert uses_index(plan, 'ix_review_restaurant_created', table='review'), plan
+    assert not sorts(plan), plan
+
+
+def uses_postgres_index(plan, index):
+    return any(f'using {index} on' in line.lower() for line in plan)
+
+
+@pytest.mark.postgres
+def test_live_queue_uses_partial_index_on_postgres(postgres_orders, client, captured_statements):
+    plan = plan_for(client, captured_statements, postgres_orders['owner'], '/api/restaurant/orders')
+    assert uses_postgres_index(plan, 'ix_order_active_queue'), plan
+
+
+@pytest.mark.postgres
+def test_queue_changes_use_change_version_index_on_postgres(postgres_orders, client, captured_statements):
+    plan = plan_for(client, captured_statements, postgres_orders['owner'], '/api/restaurant/orders?since=390')
+    assert uses_postgres_index(plan, 'ix_order_restaurant_change'), plan
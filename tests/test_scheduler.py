@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.models import db, ScheduledTask
+from backend.scheduler import TASK_HANDLERS, run_due_tasks, schedule_task
+
+
+@pytest.fixture
+def handlers():
+    """ Registers test task kinds for the duration of a test; records what each handler was given. """
+    calls = []
+
+    def record(tasks):
+        calls.append([task.target_id for task in tasks])
+
+    def fail(tasks):
+        raise RuntimeError("boom")
+
+    TASK_HANDLERS.update({'test_record': record, 'test_fail': fail})
+    yield calls
+    del TASK_HANDLERS['test_record'], TASK_HANDLERS['test_fail']
+
+
+def test_runs_due_tasks_of_a_kind_in_one_batch(database, handlers):
+    for target_id in (1, 2, 3):
+        schedule_task('test_record', delay=-60, target_id=target_id)
+    schedule_task('test_record', delay=3600, target_id=4)
+    db.session.commit()
+
+    assert run_due_tasks() == 3
+    assert handlers == [[1, 2, 3]]
+    assert [task.target_id for task in ScheduledTask.query.all()] == [4]
+
+
+def test_batch_size_caps_tasks_taken(database, handlers):
+    for target_id in range(5):
+        schedule_task('test_record', delay=-60 + target_id, target_id=target_id)
+    db.session.commit()
+
+    assert run_due_tasks(batch_size=2) == 2
+    assert handlers == [[0, 1]]
+    assert ScheduledTask.query.count() == 3
+
+
+def test_failing_kind_is_rescheduled_without_blocking_others(database, handlers):
+    now = datetime.utcnow()
+    schedule_task('test_fail', at=now - timedelta(minutes=2), target_id=1)
+    schedule_task('test_record', at=now - timedelta(minutes=1), target_id=2)
+    db.session.commit()
+
+    assert run_due_tasks(now=now) == 2
+    assert handlers == [[2]]
+    failed = ScheduledTask.query.one()
+    assert (failed.kind, failed.attempts) == ('test_fail', 1)
+    assert failed.due_at > now
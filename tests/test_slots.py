@@ -0,0 +1,23 @@
+from datetime import datetime, timedelta
+
+from backend.models import db, Order, Restaurant
+from backend.slots import _cache, _utc_offset
+
+
+def test_refunding_a_scheduled_order_frees_its_cached_slot(app, database, make_user, client):
+    owner, customer, admin = make_user('owner'), make_user('customer'), make_user('admin')
+    restaurant = Restaurant(name='Spice Route', address='1 Main St', city='Pune', owner_id=owner.id,
+                            is_verified=True, is_active=True, slot_capacity=1)
+    db.session.add(restaurant)
+    db.session.flush()
+    scheduled_time = (datetime.utcnow() + timedelta(days=1)).replace(minute=0, second=0, microsecond=0)
+    order = Order(user_id=customer.id, restaurant_id=restaurant.id, total_amount=100, order_type='takeaway',
+                  status='placed', qr_payload='order-1', is_scheduled=True, scheduled_time=scheduled_time)
+    db.session.add(order)
+    db.session.commit()
+
+    day = (scheduled_time + _utc_offset()).date()
+    _cache().set((restaurant.id, day), [(scheduled_time + _utc_offset(), 1)])
+    response = client.post(admin, f'/api/admin/orders/{order.id}/refund')
+    assert response.status_code == 200
+    assert _cache().get((restaurant.id, day)) is None